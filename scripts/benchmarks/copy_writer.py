@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Postgres COPY Writer Benchmark
+Loads synthetic events and catalog rows into a scratch copy of the
+supabase-schema.sql tables on a local Postgres, checks the merged results
+and reports rows per second
+"""
+
+import os
+import re
+import sys
+import argparse
+import random
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src'))
+
+from pendo_postgres import PostgresCopyWriter  # noqa: E402
+from pendo_sync import format_event, format_guide  # noqa: E402
+
+SCHEMA_FILES = ['supabase-schema.sql', os.path.join('supabase-migrations', '002_add_reports_table.sql')]
+
+# Only tables and indexes: RLS policies and functions need Supabase's auth schema
+_STATEMENT = re.compile(r'CREATE (?:TABLE|INDEX) IF NOT EXISTS .*?;', re.DOTALL)
+
+SCRATCH_SCHEMA = 'pendo_copy_bench'
+
+
+def create_tables(conn, schema: str) -> None:
+    with conn.cursor() as cur:
+        cur.execute(f'DROP SCHEMA IF EXISTS "{schema}" CASCADE')
+        cur.execute(f'CREATE SCHEMA "{schema}"')
+        cur.execute(f'SET search_path TO "{schema}"')
+        for name in SCHEMA_FILES:
+            with open(os.path.join(ROOT_DIR, name)) as f:
+                for statement in _STATEMENT.findall(f.read()):
+                    cur.execute(statement)
+    conn.commit()
+
+
+def synthetic_events(count: int, seed: int, city: str = None):
+    """Pendo-shaped event rows with stable ids"""
+    rng = random.Random(seed)
+    start = 1735689600000  # 2025-01-01, fixed so reruns produce the same ids
+    for i in range(count):
+        event = {
+            'guideId': f'guide-{rng.randrange(500)}',
+            'visitorId': f'visitor-{i}',
+            'accountId': f'account-{rng.randrange(2000)}',
+            'browserTime': start + i,
+            'remoteIp': '10.0.0.1',
+            'userAgent': 'benchmark',
+            'country': 'NZ',
+            'city': city or 'Auckland',
+            'url': f'https://app.example.com/page/{rng.randrange(100)}',
+            'parameters': {'step': rng.randrange(5)}
+        }
+        yield format_event(event, 'guideEvents', '2025-01-01T00:00:00+00:00')
+
+
+def run_benchmark(dsn: str, rows: int, batch_size: int, workers: int, keep: bool) -> bool:
+    import psycopg
+
+    conn = psycopg.connect(dsn)
+    create_tables(conn, SCRATCH_SCHEMA)
+    passed = True
+
+    def count(sql: str) -> int:
+        with conn.cursor() as cur:
+            cur.execute(sql)
+            value = cur.fetchone()[0]
+        conn.rollback()
+        return value
+
+    try:
+        with PostgresCopyWriter(dsn, batch_size=batch_size, workers=workers, schema=SCRATCH_SCHEMA) as writer:
+            written = writer.write_stream('pendo_events', synthetic_events(rows, seed=1))
+            loaded = count(f'SELECT count(*) FROM "{SCRATCH_SCHEMA}".pendo_events')
+            print(f"📥 Insert: {written} rows written, {loaded} in table")
+            passed &= written == rows == loaded
+
+            # Same ids again: every row must be updated in place, none added
+            writer.write_stream('pendo_events', synthetic_events(rows, seed=1, city='Wellington'))
+            updated = count(f"SELECT count(*) FROM \"{SCRATCH_SCHEMA}\".pendo_events WHERE city = 'Wellington'")
+            total = count(f'SELECT count(*) FROM "{SCRATCH_SCHEMA}".pendo_events')
+            print(f"🔁 Merge: {updated} rows updated, {total} in table")
+            passed &= updated == rows == total
+
+            # Catalog upserts must leave analytics columns untouched
+            guide = {'id': 'guide-1', 'name': 'Welcome', 'state': 'public', 'steps': [{}, {}]}
+            writer.write('pendo_guides', [format_guide(guide, '2025-01-01T00:00:00+00:00')])
+            with conn.cursor() as cur:
+                cur.execute(f'UPDATE "{SCRATCH_SCHEMA}".pendo_guides SET views = 42')
+            conn.commit()
+            writer.write('pendo_guides', [format_guide({**guide, 'name': 'Welcome v2'}, '2025-01-02T00:00:00+00:00')])
+            kept = count(f"SELECT count(*) FROM \"{SCRATCH_SCHEMA}\".pendo_guides "
+                         "WHERE views = 42 AND name = 'Welcome v2' AND steps = 2")
+            print(f"🧭 Catalog merge keeps analytics columns: {'yes' if kept == 1 else 'no'}")
+            passed &= kept == 1
+
+            for table, stats in writer.stats().items():
+                print(f"⏱️  {table}: {stats['rows']} rows in {stats['batches']} batches, "
+                      f"{stats['seconds']}s, {stats['rows_per_second']} rows/s")
+    finally:
+        if not keep:
+            with conn.cursor() as cur:
+                cur.execute(f'DROP SCHEMA IF EXISTS "{SCRATCH_SCHEMA}" CASCADE')
+            conn.commit()
+        conn.close()
+    return passed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--dsn', default=os.getenv('PENDO_DATABASE_URL') or os.getenv('DATABASE_URL'),
+                        help='Local Postgres connection string (default: PENDO_DATABASE_URL)')
+    parser.add_argument('--rows', type=int, default=100000, help='Synthetic events to load')
+    parser.add_argument('--batch-size', type=int, default=10000, help='Rows per COPY batch')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent batches')
+    parser.add_argument('--keep', action='store_true', help=f'Keep the {SCRATCH_SCHEMA} schema afterwards')
+    args = parser.parse_args()
+
+    if not args.dsn:
+        parser.error('pass --dsn or set PENDO_DATABASE_URL')
+
+    passed = run_benchmark(args.dsn, args.rows, args.batch_size, args.workers, args.keep)
+    print('✅ COPY writer checks passed' if passed else '❌ COPY writer checks failed')
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
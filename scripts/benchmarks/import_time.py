@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Client Import-Time Benchmark
+Measures the cost of importing the Pendo client modules in a fresh
+interpreter and fails when it exceeds the budget or pulls in heavy modules
+"""
+
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+from typing import Dict, List
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src')
+
+MODULES = ['pendo_client', 'pendo_client_v2']
+
+# Modules that must only be loaded once a client is actually used
+FORBIDDEN_AT_IMPORT = [
+    'requests', 'urllib3', 'dotenv', 'json', 'datetime', 'typing',
+    'logging', 'concurrent.futures', 'hashlib', 'sqlite3'
+]
+
+DEFAULT_BUDGET_MS = 5.0
+
+
+def measure_import(module: str) -> float:
+    """Cumulative import time of a module in milliseconds, from -X importtime"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=SRC_DIR, capture_output=True, text=True, check=True
+    )
+    for line in result.stderr.splitlines():
+        parts = [part.strip() for part in line.split('|')]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1000
+    raise RuntimeError(f"No import time reported for {module}")
+
+
+def loaded_forbidden_modules(module: str) -> List[str]:
+    """Heavy modules that importing `module` adds to sys.modules"""
+    probe = (
+        'import sys; before = set(sys.modules); '
+        f'import {module}; '
+        f'print(",".join(m for m in {FORBIDDEN_AT_IMPORT!r} if m in sys.modules and m not in before))'
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', probe],
+        cwd=SRC_DIR, capture_output=True, text=True, check=True
+    )
+    return [name for name in result.stdout.strip().split(',') if name]
+
+
+def run_benchmark(runs: int, budget_ms: float) -> Dict[str, Dict]:
+    # Compile once so every run measures a warm bytecode cache
+    subprocess.run([sys.executable, '-m', 'compileall', '-q', SRC_DIR], check=True)
+
+    results = {}
+    for module in MODULES:
+        timings = [measure_import(module) for _ in range(runs)]
+        median = statistics.median(timings)
+        forbidden = loaded_forbidden_modules(module)
+        results[module] = {
+            'median_ms': round(median, 3),
+            'max_ms': round(max(timings), 3),
+            'forbidden_imports': forbidden,
+            'passed': median <= budget_ms and not forbidden
+        }
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=15, help='Fresh interpreters per module')
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help='Maximum median import time per module')
+    args = parser.parse_args()
+
+    print(f"⏱️  Import-time budget: {args.budget_ms} ms (median of {args.runs} runs)")
+    results = run_benchmark(args.runs, args.budget_ms)
+
+    for module, result in results.items():
+        status = '✅' if result['passed'] else '❌'
+        print(f"{status} {module}: median {result['median_ms']} ms, max {result['max_ms']} ms")
+        if result['forbidden_imports']:
+            print(f"   Heavy modules loaded at import: {', '.join(result['forbidden_imports'])}")
+
+    return 0 if all(result['passed'] for result in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
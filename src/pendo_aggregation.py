@@ -0,0 +1,579 @@
+"""
+Pendo.io Aggregation Pipeline Builder
+Validated, canonical aggregation queries with filter and projection pushdown
+"""
+
+import re
+import copy
+import json
+import hashlib
+from dataclasses import dataclass
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Any
+
+# Sources that are event streams and therefore need a timeSeries window
+EVENT_SOURCES = {
+    'events', 'guideEvents', 'featureEvents', 'pageEvents', 'pollEvents', 'trackEvents'
+}
+
+# Entity type -> (event source, id field, per-row event count field or None for one event per row)
+ENTITY_EVENT_SOURCES = {
+    'guide': ('guideEvents', 'guideId', None),
+    'feature': ('featureEvents', 'featureId', 'numEvents'),
+    'page': ('pageEvents', 'pageId', 'numEvents')
+}
+
+_STRING_LITERAL = re.compile(r'"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'')
+_IDENTIFIER = re.compile(r'[A-Za-z_][A-Za-z0-9_]*(?:\.[A-Za-z0-9_]+)*')
+_CALL = re.compile(r'\s*\(')
+_KEYWORDS = {'true', 'false', 'null', 'undefined', 'in', 'and', 'or', 'not'}
+
+
+class PipelineError(ValueError):
+    """Raised when aggregation stages are combined in an invalid way"""
+
+
+def field_references(expression: Any) -> Set[str]:
+    """
+    Top-level field names an expression reads
+
+    String literals and function names are ignored, and dotted paths such as
+    `parameters.url` resolve to their root field (`parameters`).
+    """
+    if not isinstance(expression, str):
+        return set()
+    stripped = _STRING_LITERAL.sub('""', expression)
+    names = set()
+    for match in _IDENTIFIER.finditer(stripped):
+        start = match.start()
+        # Skip numeric suffixes like 1e10 and member accesses on literals
+        if start > 0 and (stripped[start - 1].isdigit() or stripped[start - 1] == '.'):
+            continue
+        # Function names are not fields
+        if _CALL.match(stripped, match.end()):
+            continue
+        root = match.group(0).split('.', 1)[0]
+        if root not in _KEYWORDS:
+            names.add(root)
+    return names
+
+
+def any_of(field: str, values: Iterable[str]) -> str:
+    """Filter expression matching rows whose field equals one of the values"""
+    return ' || '.join(f"{field} == {json.dumps(value)}" for value in sorted(set(values)))
+
+
+def canonical_json(query: Dict[str, Any]) -> str:
+    """Stable serialization: sorted keys and no insignificant whitespace"""
+    return json.dumps(query, sort_keys=True, separators=(',', ':'))
+
+
+def query_fingerprint(query: Dict[str, Any]) -> str:
+    """SHA-256 of the canonical query, suitable as a cache key"""
+    return hashlib.sha256(canonical_json(query).encode()).hexdigest()
+
+
+class _Stage:
+    """One pipeline stage plus the fields it reads and produces"""
+
+    def __init__(self, kind: str, spec: Any, reads: Set[str], produces: Optional[Dict[str, str]] = None):
+        self.kind = kind
+        self.spec = spec
+        self.reads = reads
+        # Output field -> input field for identity/rename projections, None if not a projection
+        self.produces = produces
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {self.kind: self.spec}
+
+
+class AggregationPipeline:
+    """
+    Fluent builder for /api/v1/aggregation queries
+
+    Stages are validated as they are added. build() emits a canonical query
+    where filters on raw event fields run right after the source and an
+    explicit projection keeps only the columns later stages use, so the
+    server never materializes fields the caller does not need.
+
+        query = (AggregationPipeline('guideEvents')
+                 .time_series(first=start_ms, count=7)
+                 .filter('type == "guideSeen"')
+                 .group(['guideId'], views=('count', None))
+                 .sort('-views')
+                 .limit(50)
+                 .build())
+    """
+
+    def __init__(self, source: str, **source_params):
+        """
+        Args:
+            source: Source name (e.g. 'guideEvents', 'visitors')
+            **source_params: Source scoping (e.g. guideId='abc'); omitted means all
+        """
+        self.source_name = source
+        self.source_params = source_params or None
+        self.time_window: Optional[Dict[str, Any]] = None
+        self._stages: List[_Stage] = []
+        self._limited = False
+
+    # Stage builders
+    def time_series(self, first: Any, count: int = None, last: Any = None,
+                    period: str = 'dayRange') -> 'AggregationPipeline':
+        """
+        Restrict an event source to a time window
+
+        Args:
+            first: Window start (epoch milliseconds or a Pendo date expression)
+            count: Number of periods from first (negative counts backwards)
+            last: Window end, as an alternative to count
+            period: 'dayRange', 'weekRange', 'monthRange' or 'hourRange'
+        """
+        if self.time_window is not None:
+            raise PipelineError("timeSeries can only be set once")
+        if self.source_name not in EVENT_SOURCES:
+            raise PipelineError(f"timeSeries does not apply to the {self.source_name} source")
+        if (count is None) == (last is None):
+            raise PipelineError("timeSeries needs exactly one of count or last")
+
+        window = {'period': period, 'first': first}
+        if count is not None:
+            window['count'] = count
+        else:
+            window['last'] = last
+        self.time_window = window
+        return self
+
+    def filter(self, expression: str) -> 'AggregationPipeline':
+        """Keep rows for which the expression is true"""
+        self._check_open('filter')
+        self._stages.append(_Stage('filter', expression, field_references(expression)))
+        return self
+
+    def select(self, *fields: str, **expressions: str) -> 'AggregationPipeline':
+        """
+        Project rows onto the given fields
+
+        Args:
+            *fields: Fields kept under their own name
+            **expressions: Output field -> source field or expression
+        """
+        self._check_open('select')
+        spec = {name: name for name in fields}
+        spec.update(expressions)
+        if not spec:
+            raise PipelineError("select needs at least one field")
+
+        reads = set()
+        for expression in spec.values():
+            reads |= field_references(expression)
+        produces = {out: expr for out, expr in spec.items() if isinstance(expr, str) and _IDENTIFIER.fullmatch(expr)}
+        self._stages.append(_Stage('select', dict(sorted(spec.items())), reads,
+                                   produces if len(produces) == len(spec) else {}))
+        return self
+
+    def group(self, keys: List[str], **aggregates) -> 'AggregationPipeline':
+        """
+        Group rows and aggregate each group
+
+        Args:
+            keys: Fields to group by
+            **aggregates: Output field -> (operation, input field or None),
+                e.g. views=('count', None), total=('sum', 'numEvents')
+        """
+        self._check_open('group')
+        if not keys:
+            raise PipelineError("group needs at least one key")
+
+        fields = []
+        reads = set(keys)
+        for name, (operation, input_field) in sorted(aggregates.items()):
+            fields.append({name: {operation: input_field}})
+            reads |= field_references(input_field)
+
+        spec = {'group': sorted(keys), 'fields': fields}
+        self._stages.append(_Stage('group', spec, reads))
+        return self
+
+    def sort(self, *fields: str) -> 'AggregationPipeline':
+        """Sort by fields; prefix a field with '-' for descending order"""
+        self._check_open('sort')
+        if not fields:
+            raise PipelineError("sort needs at least one field")
+        self._stages.append(_Stage('sort', list(fields), {field.lstrip('-') for field in fields}))
+        return self
+
+    def limit(self, count: int) -> 'AggregationPipeline':
+        """Truncate the result to at most count rows"""
+        if self._limited:
+            raise PipelineError("limit can only be set once")
+        if count <= 0:
+            raise PipelineError("limit must be positive")
+        self._stages.append(_Stage('limit', int(count), set()))
+        self._limited = True
+        return self
+
+    def _check_open(self, kind: str) -> None:
+        if self._limited:
+            raise PipelineError(f"{kind} cannot follow limit")
+
+    @property
+    def stages(self) -> List[Dict[str, Any]]:
+        """Stages after the source, as added and before any pushdown"""
+        return [stage.to_dict() for stage in self._stages]
+
+    def with_window(self, first: int, count: int, period: str = 'dayRange') -> 'AggregationPipeline':
+        """Copy of this pipeline over a different time window"""
+        if self.source_name not in EVENT_SOURCES:
+            raise PipelineError(f"timeSeries does not apply to the {self.source_name} source")
+        clone = copy.copy(self)
+        clone._stages = list(self._stages)
+        clone.time_window = {'period': period, 'first': first, 'count': count}
+        return clone
+
+    # Output
+    def _source_stage(self) -> Dict[str, Any]:
+        if self.source_name in EVENT_SOURCES and self.time_window is None:
+            raise PipelineError(f"The {self.source_name} source requires time_series()")
+        source = {self.source_name: self.source_params}
+        if self.time_window is not None:
+            source['timeSeries'] = dict(self.time_window)
+        return {'source': source}
+
+    def optimized_stages(self) -> List[Dict[str, Any]]:
+        """Stages after filter and projection pushdown, source first"""
+        stages = list(self._stages)
+
+        # Filter pushdown: hoist filters on raw fields ahead of every select and group
+        pushed, rest = [], []
+        for stage in stages:
+            if stage.kind == 'filter' and _reaches_source(stage.reads, rest):
+                pushed.append(stage)
+            else:
+                rest.append(stage)
+
+        # Projection pushdown: walk backwards collecting the raw fields still needed,
+        # trimming select outputs nothing downstream reads
+        needed: Optional[Set[str]] = None
+        stages = []
+        for stage in reversed(rest):
+            if stage.kind == 'select':
+                if needed is not None:
+                    spec = {out: expr for out, expr in stage.spec.items() if out in needed} or stage.spec
+                    stage = _Stage('select', spec, set().union(*map(field_references, spec.values())))
+                needed = set(stage.reads)
+            elif stage.kind == 'group':
+                needed = set(stage.reads)
+            elif needed is not None:
+                needed |= stage.reads
+            stages.append(stage)
+        rest = stages[::-1]
+
+        output = [self._source_stage()] + [stage.to_dict() for stage in pushed]
+        if needed and not (rest and rest[0].kind == 'select'):
+            output.append({'select': {name: name for name in sorted(needed)}})
+        output.extend(stage.to_dict() for stage in rest)
+        return output
+
+    def build(self, request_id: str = None) -> Dict[str, Any]:
+        """
+        Emit the aggregation query for PendoAPIClientV2.run_aggregation_query
+
+        Args:
+            request_id: Optional requestId echoed by Pendo
+
+        Returns:
+            Query dictionary
+        """
+        request = {'pipeline': self.optimized_stages()}
+        if request_id:
+            request['requestId'] = request_id
+        return {'response': {'mimeType': 'application/json'}, 'request': request}
+
+    def fingerprint(self) -> str:
+        """Canonical hash of the optimized pipeline (ignores requestId)"""
+        return query_fingerprint(self.build())
+
+
+def _reaches_source(fields: Set[str], stages: List[_Stage]) -> bool:
+    """True if every field passes unchanged from the source through the given stages"""
+    for stage in stages:
+        if stage.kind == 'group':
+            return False
+        if stage.kind == 'select':
+            if not stage.produces or any(stage.produces.get(field) != field for field in fields):
+                return False
+    return True
+
+
+# Time-window sharding
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+# Days covered by one timeSeries period
+PERIOD_DAYS = {'dayRange': 1, 'weekRange': 7}
+
+# How per-shard group aggregates combine into the aggregate over the full window
+MERGE_OPERATIONS = {'count': 'sum', 'sum': 'sum', 'min': 'min', 'max': 'max'}
+
+
+@dataclass(frozen=True)
+class Shard:
+    """Consecutive whole UTC days of a sharded time window, or part of one day at its edges"""
+
+    first: int
+    # Exclusive end in epoch milliseconds
+    last: int
+    # Result is expected to come from the cache of an earlier run
+    cached: bool = False
+
+    @property
+    def days(self) -> float:
+        """Length in days (an int for whole-day shards)"""
+        span = self.last - self.first
+        return span // DAY_MS if span % DAY_MS == 0 else span / DAY_MS
+
+    @property
+    def partial(self) -> bool:
+        """True if the shard does not start and end on UTC midnight"""
+        return bool(self.first % DAY_MS or self.last % DAY_MS)
+
+
+class ShardPlanner:
+    """
+    Splits a pipeline's timeSeries window into day shards and merges their results
+
+    Shards are handed out one at a time so each new shard can be sized from
+    what earlier ones cost: the planner keeps a smoothed rows-per-day and
+    seconds-per-day estimate and picks the largest shard expected to stay
+    under both targets.
+
+    Shard boundaries sit on UTC midnight. A window starting or ending
+    mid-day gets a partial shard at that edge, read as its whole day
+    narrowed by a browserTime filter; every other shard is whole days, so
+    its query is the same whatever time of day the window starts.
+
+    When closed_before is given, no shard straddles the last midnight
+    before it, so every shard is either fully closed (its result can never
+    change) or open. Whole-day closed shards cached by earlier runs, of
+    this or any other window over the same pipeline, are reused as-is and
+    the gaps between them are planned adaptively.
+
+    Row pipelines keep their trailing sort and limit on every shard (a
+    per-shard top N still contains the global top N), and reapply them after
+    concatenating shards in time order. Pipelines with a group stage run
+    without their trailing sort and limit; their per-shard groups are merged
+    with MERGE_OPERATIONS and then sorted and truncated.
+    """
+
+    def __init__(self, pipeline: AggregationPipeline, initial_days: int = 7, min_days: int = 1,
+                 max_days: int = 31, target_seconds: float = 10.0, target_rows: int = 50000,
+                 closed_before: int = None, cached_shards: Iterable[Tuple[int, int]] = ()):
+        """
+        Args:
+            pipeline: Pipeline over an event source with an absolute time_series window
+            initial_days: Size of the first shards, before anything is observed
+            min_days: Smallest shard size
+            max_days: Largest shard size
+            target_seconds: Latency a shard should stay under
+            target_rows: Result rows a shard should stay under
+            closed_before: Epoch milliseconds before which data is final
+            cached_shards: (first, days) of closed whole-day shards whose results are cached
+        """
+        self.pipeline = pipeline
+        self.min_days = min_days
+        self.max_days = max_days
+        self.target_seconds = target_seconds
+        self.target_rows = target_rows
+        self.days = max(min_days, min(initial_days, max_days))
+
+        self._shard_stages, self._merge_stages, self._group = _split_for_sharding(pipeline._stages)
+        self.first, total_days = _absolute_window(pipeline.time_window)
+        self.end = self.first + total_days * DAY_MS
+        self._next = self.first
+        # Whole UTC days of the window; partial days before and after them are edge shards
+        self._day_start = -(-self.first // DAY_MS) * DAY_MS
+        self._day_end = max(self._day_start, self.end - self.end % DAY_MS)
+        self.closed_before = closed_before
+        # Last UTC midnight at or before closed_before
+        self._closed_end = closed_before - closed_before % DAY_MS if closed_before is not None else self.first
+        self._cached = {
+            first: Shard(first, first + days * DAY_MS, cached=True) for first, days in cached_shards
+            if days >= 1 and first % DAY_MS == 0
+            and first >= self._day_start and first + days * DAY_MS <= min(self._day_end, self._closed_end)
+        }
+        self._rows_per_day: Optional[float] = None
+        self._seconds_per_day: Optional[float] = None
+
+    def next_shard(self) -> Optional[Shard]:
+        """The next unplanned shard, or None once the window is covered"""
+        if self._next >= self.end:
+            return None
+
+        if self._next < self._day_start:
+            shard = Shard(self._next, min(self._day_start, self.end))
+        elif self._next >= self._day_end:
+            shard = Shard(self._next, self.end)
+        else:
+            shard = self._cached.get(self._next)
+            if shard is None:
+                stop = self._day_end
+                if self._next < self._closed_end:
+                    later_cached = [first for first in self._cached if first > self._next]
+                    stop = min([stop, self._closed_end] + later_cached)
+                days = max(1, min(self.days, (stop - self._next) // DAY_MS))
+                shard = Shard(self._next, self._next + days * DAY_MS)
+        self._next = shard.last
+        return shard
+
+    def is_closed(self, shard: Shard) -> bool:
+        """True if the shard ends before closed_before, so its result is final"""
+        return shard.last <= self._closed_end
+
+    def is_reusable(self, shard: Shard) -> bool:
+        """True if the shard is closed whole days, so later windows can reuse its cached result"""
+        return not shard.partial and self.is_closed(shard)
+
+    def window_fingerprint(self) -> str:
+        """Hash of the shard pipeline without its time window, shared by all shards"""
+        return query_fingerprint({
+            'source': {self.pipeline.source_name: self.pipeline.source_params},
+            'stages': [stage.to_dict() for stage in self._shard_stages]
+        })
+
+    def query_for(self, shard: Shard) -> Dict[str, Any]:
+        """Aggregation query covering a single shard"""
+        if not shard.partial:
+            shard_pipeline = self.pipeline.with_window(shard.first, shard.days)
+            shard_pipeline._stages = list(self._shard_stages)
+            return shard_pipeline.build()
+
+        # Edge shards read their whole day, narrowed to the part inside the window
+        shard_pipeline = self.pipeline.with_window(shard.first - shard.first % DAY_MS, 1)
+        expression = f'browserTime >= {shard.first} && browserTime < {shard.last}'
+        shard_pipeline._stages = [_Stage('filter', expression, {'browserTime'})] + self._shard_stages
+        return shard_pipeline.build()
+
+    def observe(self, shard: Shard, rows: int, seconds: float, smoothing: float = 0.5) -> None:
+        """Record what a shard cost and resize the shards planned after it"""
+        rows_per_day = rows / shard.days
+        seconds_per_day = seconds / shard.days
+        if self._rows_per_day is None:
+            self._rows_per_day, self._seconds_per_day = rows_per_day, seconds_per_day
+        else:
+            self._rows_per_day += smoothing * (rows_per_day - self._rows_per_day)
+            self._seconds_per_day += smoothing * (seconds_per_day - self._seconds_per_day)
+
+        limits = [self.max_days]
+        if self._rows_per_day > 0:
+            limits.append(self.target_rows / self._rows_per_day)
+        if self._seconds_per_day > 0:
+            limits.append(self.target_seconds / self._seconds_per_day)
+        self.days = max(self.min_days, int(min(limits)))
+
+    def merge(self, shard_rows: Dict[int, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Combine per-shard result rows into the result over the whole window
+
+        Args:
+            shard_rows: Shard start (epoch milliseconds) to that shard's rows
+
+        Returns:
+            Merged rows in time order, or regrouped, sorted and limited
+        """
+        rows = list(chain.from_iterable(shard_rows[first] for first in sorted(shard_rows)))
+        if self._group is not None:
+            rows = _regroup(rows, self._group)
+        for stage in self._merge_stages:
+            if stage.kind == 'sort':
+                rows = _sort_rows(rows, stage.spec)
+            else:
+                rows = rows[:stage.spec]
+        return rows
+
+
+def result_rows(result: Any) -> List[Dict[str, Any]]:
+    """Rows of an aggregation response"""
+    if isinstance(result, list):
+        return result
+    return result.get('results') or []
+
+
+def _absolute_window(window: Optional[Dict[str, Any]]) -> Tuple[int, int]:
+    """Window start in epoch milliseconds and its length in days"""
+    if window is None:
+        raise PipelineError("Only pipelines with a time_series window can be sharded")
+    if window['period'] not in PERIOD_DAYS:
+        raise PipelineError(f"Cannot shard a {window['period']} window")
+    if not isinstance(window['first'], int) or 'count' not in window:
+        raise PipelineError("Sharding needs a window given as epoch milliseconds plus a count")
+
+    days = window['count'] * PERIOD_DAYS[window['period']]
+    if days < 0:
+        return window['first'] + days * DAY_MS, -days
+    return window['first'], days
+
+
+def _split_for_sharding(stages: List[_Stage]) -> Tuple[List[_Stage], List[_Stage], Optional[Dict]]:
+    """Stages each shard runs, stages reapplied after merging, and the group spec"""
+    groups = [index for index, stage in enumerate(stages) if stage.kind == 'group']
+    if len(groups) > 1:
+        raise PipelineError("Only pipelines with at most one group stage can be sharded")
+
+    if groups:
+        position = groups[0]
+        group = stages[position].spec
+        if any(stage.kind == 'limit' for stage in stages[:position]):
+            raise PipelineError("A limit before group cannot be sharded")
+        tail = stages[position + 1:]
+        if any(stage.kind not in ('sort', 'limit') for stage in tail):
+            raise PipelineError("Only sort and limit can follow group in a sharded pipeline")
+        for field in group['fields']:
+            for name, aggregate in field.items():
+                operation = next(iter(aggregate))
+                if operation not in MERGE_OPERATIONS:
+                    raise PipelineError(f"The {operation} aggregate of {name} cannot be merged across shards")
+        return stages[:position + 1], tail, group
+
+    position = len(stages)
+    while position and stages[position - 1].kind in ('sort', 'limit'):
+        position -= 1
+    if any(stage.kind == 'sort' for stage in stages[:position]):
+        raise PipelineError("sort must be one of the last stages of a sharded pipeline")
+    return stages, stages[position:], None
+
+
+def _regroup(rows: List[Dict[str, Any]], group: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Merge rows that share group keys using MERGE_OPERATIONS"""
+    operations = {}
+    for field in group['fields']:
+        for name, aggregate in field.items():
+            operations[name] = MERGE_OPERATIONS[next(iter(aggregate))]
+
+    merged: Dict[tuple, Dict[str, Any]] = {}
+    for row in rows:
+        key = tuple(row.get(name) for name in group['group'])
+        current = merged.get(key)
+        if current is None:
+            merged[key] = dict(row)
+            continue
+        for name, operation in operations.items():
+            value, other = current.get(name), row.get(name)
+            if value is None or other is None:
+                current[name] = other if value is None else value
+            elif operation == 'sum':
+                current[name] = value + other
+            elif operation == 'min':
+                current[name] = min(value, other)
+            else:
+                current[name] = max(value, other)
+    return list(merged.values())
+
+
+def _sort_rows(rows: List[Dict[str, Any]], fields: List[str]) -> List[Dict[str, Any]]:
+    """Client-side equivalent of a sort stage; missing values sort lowest"""
+    for field in reversed(fields):
+        name = field.lstrip('-')
+        rows = sorted(rows, key=lambda row: (row.get(name) is not None, row.get(name)),
+                      reverse=field.startswith('-'))
+    return rows
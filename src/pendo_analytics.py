@@ -0,0 +1,128 @@
+"""
+Pendo.io Local Analytics
+Vectorized per-entity guide, feature and page metrics over an EventFrame
+"""
+
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+from pendo_frame import ENTITY_TYPES, MISSING, EventFrame
+
+# Guide event types counted as completions unless told otherwise
+DEFAULT_COMPLETION_TYPES = ('guideCompleted',)
+
+
+class EntityMetrics:
+    """
+    Metrics for every entity of a frame, one numpy array per metric
+
+    Arrays are indexed by the frame's entity codes, so position i describes
+    frame.entity_ids[i]. Use get() or to_dict() for per-entity dicts.
+
+    Attributes:
+        events: Event count (sum of numEvents, or of view events when view types are given)
+        unique_visitors: Distinct visitors with at least one event
+        unique_accounts: Distinct accounts with at least one event
+        usage_per_user: events / unique_visitors
+        completions: Events whose type is a completion type
+        completion_rate: completions / events, as a percentage
+    """
+
+    METRICS = ('events', 'unique_visitors', 'unique_accounts', 'usage_per_user',
+               'completions', 'completion_rate')
+
+    def __init__(self, entity_ids: list, entity_types: np.ndarray, **metrics: np.ndarray):
+        self.entity_ids = entity_ids
+        self.entity_types = entity_types
+        for name in self.METRICS:
+            setattr(self, name, metrics[name])
+        self._index = None
+
+    def __len__(self) -> int:
+        return len(self.entity_ids)
+
+    def _row(self, position: int) -> Dict[str, Any]:
+        entity_type = int(self.entity_types[position])
+        row = {'entity_type': ENTITY_TYPES[entity_type] if entity_type != MISSING else None}
+        for name in self.METRICS:
+            value = getattr(self, name)[position]
+            row[name] = round(float(value), 2) if value.dtype.kind == 'f' else int(value)
+        return row
+
+    def get(self, entity_id: str) -> Optional[Dict[str, Any]]:
+        """Metrics of one entity, or None if it has no events"""
+        if self._index is None:
+            self._index = {entity_id: position for position, entity_id in enumerate(self.entity_ids)}
+        position = self._index.get(entity_id)
+        return None if position is None else self._row(position)
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        """Entity id to its metrics"""
+        return {entity_id: self._row(position) for position, entity_id in enumerate(self.entity_ids)}
+
+
+def compute_entity_metrics(frame: EventFrame, view_types: Iterable[str] = None,
+                           completion_types: Iterable[str] = DEFAULT_COMPLETION_TYPES) -> EntityMetrics:
+    """
+    Compute metrics for all entities in a single pass of array operations
+
+    Args:
+        frame: Events to summarize
+        view_types: Event types counted as views (all events if omitted)
+        completion_types: Event types counted as completions
+
+    Returns:
+        EntityMetrics covering every entity in frame.entity_ids
+    """
+    entity_count = len(frame.entity_ids)
+    has_entity = frame.entity != MISSING
+    entity = frame.entity[has_entity]
+    counts = frame.count[has_entity]
+    event_types = frame.event_type[has_entity]
+
+    view_mask = _type_mask(frame, event_types, view_types) if view_types is not None else None
+    events = np.bincount(entity, weights=counts if view_mask is None else counts * view_mask,
+                         minlength=entity_count).astype(np.int64)
+
+    completion_mask = _type_mask(frame, event_types, completion_types)
+    completions = np.bincount(entity, weights=counts * completion_mask, minlength=entity_count).astype(np.int64)
+
+    unique_visitors = _distinct_per_entity(entity, frame.visitor[has_entity], entity_count)
+    unique_accounts = _distinct_per_entity(entity, frame.account[has_entity], entity_count)
+
+    usage_per_user = np.where(unique_visitors > 0, events / np.maximum(unique_visitors, 1), 0.0)
+    completion_rate = np.where(events > 0, completions * 100.0 / np.maximum(events, 1), 0.0)
+
+    # Entity type of each entity code (its first event's type)
+    entity_types = np.full(entity_count, MISSING, dtype=np.int8)
+    entity_types[entity[::-1]] = frame.entity_type[has_entity][::-1]
+
+    return EntityMetrics(
+        frame.entity_ids, entity_types,
+        events=events,
+        unique_visitors=unique_visitors,
+        unique_accounts=unique_accounts,
+        usage_per_user=usage_per_user,
+        completions=completions,
+        completion_rate=completion_rate
+    )
+
+
+def _type_mask(frame: EventFrame, event_types: np.ndarray, names: Iterable[str]) -> np.ndarray:
+    """1 where the event type is one of names, else 0"""
+    codes = [frame.event_type_code(name) for name in names]
+    return np.isin(event_types, [code for code in codes if code != MISSING]).astype(np.int64)
+
+
+def _distinct_per_entity(entity: np.ndarray, values: np.ndarray, entity_count: int) -> np.ndarray:
+    """Number of distinct non-missing values per entity code"""
+    present = values != MISSING
+    stride = int(values.max(initial=0)) + 1
+    pairs = np.sort(entity[present].astype(np.int64) * stride + values[present])
+    # Sort-and-compare instead of np.unique, whose hash path is far slower on large int arrays
+    first_of_run = np.empty(len(pairs), dtype=bool)
+    first_of_run[:1] = True
+    np.not_equal(pairs[1:], pairs[:-1], out=first_of_run[1:])
+    distinct_entities = pairs[first_of_run] // stride
+    return np.bincount(distinct_entities, minlength=entity_count).astype(np.int64)
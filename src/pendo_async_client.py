@@ -0,0 +1,391 @@
+"""
+Pendo.io Async API Client
+asyncio counterpart of PendoAPIClientV2 built on aiohttp
+"""
+
+import os
+import json
+import socket
+import asyncio
+from dataclasses import replace
+from typing import Dict, Optional, Tuple, Union, Any
+from datetime import datetime
+from urllib.parse import urlsplit
+import logging
+
+import aiohttp
+
+from pendo_aggregation import AggregationPipeline
+from pendo_config import load_environment
+from pendo_client_v2 import PendoAPIError
+from pendo_transport import TransportConfig, PoolStats, WireStats, make_decompressor, supported_encodings
+from pendo_retry import RetryPolicy, get_rate_limiter, parse_retry_after
+
+
+class AsyncPendoAPIClient:
+    """
+    Asynchronous Pendo.io API Client
+
+    Mirrors the PendoAPIClientV2 method surface, but every call is a coroutine
+    running on a shared aiohttp session with a pooled keep-alive connector, so
+    a single worker can keep many requests in flight at once.
+
+    Use as an async context manager so the session is closed cleanly:
+
+        async with AsyncPendoAPIClient() as client:
+            guides, features = await asyncio.gather(
+                client.list_guides(), client.list_features()
+            )
+    """
+
+    def __init__(self, api_key: str = None, base_url: str = None, transport: TransportConfig = None,
+                 retry: RetryPolicy = None, requests_per_second: float = None):
+        """
+        Initialize the async Pendo API client
+
+        Args:
+            api_key: Pendo integration key
+            base_url: Working Pendo API base URL
+            transport: Connection pool and timeout settings
+            retry: Retry policy for throttled and failed requests
+            requests_per_second: Client-side pacing shared by all clients using this key
+        """
+        if api_key is None or base_url is None:
+            load_environment()
+
+        self.api_key = api_key or os.getenv('PENDO_API_KEY')
+        self.base_url = base_url or os.getenv('PENDO_BASE_URL', 'https://app.pendo.io')
+
+        if not self.api_key:
+            raise ValueError("API key is required. Set PENDO_API_KEY environment variable or pass api_key parameter")
+
+        self.headers = {
+            'X-Pendo-Integration-Key': self.api_key,
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+            'User-Agent': 'Pendo-API-Client-Async/1.0',
+            'Accept-Encoding': ', '.join(supported_encodings())
+        }
+        self.transport = transport or TransportConfig()
+        self.pool_stats = PoolStats()
+        self.wire_stats = WireStats()
+
+        # Aggregation is the only POST and it is read-only, so it is safe to replay
+        self.retry = retry or RetryPolicy(idempotent_methods=RetryPolicy.idempotent_methods | {'POST'})
+        self.rate_limiter = get_rate_limiter(self.api_key, requests_per_second) if requests_per_second else None
+
+        # The session is created lazily inside the running event loop
+        self.session: Optional[aiohttp.ClientSession] = None
+
+        self.logger = logging.getLogger(__name__)
+
+    async def __aenter__(self) -> 'AsyncPendoAPIClient':
+        self._ensure_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        """Create the pooled session on first use"""
+        if self.session is None or self.session.closed:
+            config = self.transport
+            connector = aiohttp.TCPConnector(
+                limit=config.max_connections,
+                limit_per_host=config.pool_maxsize,
+                keepalive_timeout=config.keep_alive_timeout if config.keep_alive else None,
+                force_close=not config.keep_alive,
+                socket_factory=self._socket_factory
+            )
+            self.session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=connector,
+                # Bodies are decompressed by _read_body so wire bytes can be counted
+                auto_decompress=False,
+                timeout=aiohttp.ClientTimeout(
+                    sock_connect=config.connect_timeout,
+                    sock_read=config.read_timeout
+                ),
+                trace_configs=[self._pool_trace_config()]
+            )
+        return self.session
+
+    def _socket_factory(self, addr_info) -> socket.socket:
+        """Open sockets with the configured TCP keepalive options"""
+        family, sock_type, proto, _, _ = addr_info
+        sock = socket.socket(family=family, type=sock_type, proto=proto)
+        self.transport.apply_socket_options(sock)
+        return sock
+
+    def _pool_trace_config(self) -> aiohttp.TraceConfig:
+        """Feed connector events into the pool hit/miss counters"""
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_create(session, context, params):
+            self.pool_stats.record(reused=False)
+
+        async def on_reuse(session, context, params):
+            self.pool_stats.record(reused=True)
+
+        trace_config.on_connection_create_end.append(on_create)
+        trace_config.on_connection_reuseconn.append(on_reuse)
+        return trace_config
+
+    async def close(self) -> None:
+        """Close the underlying session and release pooled connections"""
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    async def _read_body(self, response: aiohttp.ClientResponse, chunk_size: int = 65536) -> bytes:
+        """Read and incrementally decompress a body, recording wire and decoded sizes"""
+        encoding = response.headers.get('Content-Encoding')
+        decoder = make_decompressor(encoding)
+        parts = []
+        wire_bytes = 0
+
+        async for chunk in response.content.iter_chunked(chunk_size):
+            wire_bytes += len(chunk)
+            parts.append(decoder.decompress(chunk) if decoder else chunk)
+        if decoder is not None and hasattr(decoder, 'flush'):
+            parts.append(decoder.flush())
+
+        body = b''.join(parts)
+        self.wire_stats.record(urlsplit(str(response.url)).path, encoding, wire_bytes, len(body))
+        return body
+
+    async def _send(self, method: str, url: str, read_body: bool = True, retry: RetryPolicy = None,
+                    **kwargs) -> Tuple[int, bytes]:
+        """
+        Send a request through the rate limiter, retrying throttled and failed attempts
+
+        Args:
+            method: HTTP method
+            url: Absolute request URL
+            read_body: Read the body; when False only the status matters and the body is returned empty
+            retry: Retry policy for this request (defaults to the client's)
+            **kwargs: Additional request parameters
+
+        Returns:
+            Tuple of (status code, response body) for the final attempt
+        """
+        session = self._ensure_session()
+        retry = retry or self.retry
+        attempt = 0
+
+        while True:
+            if self.rate_limiter is not None:
+                wait = self.rate_limiter.reserve()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+
+            try:
+                async with session.request(method, url, **kwargs) as response:
+                    body = await self._read_body(response) if read_body else b''
+                    status = response.status
+                    retry_after = response.headers.get('Retry-After')
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                delay = retry.next_delay(method, attempt)
+                if delay is None:
+                    raise
+                self.logger.warning(f"{method} {url} failed ({e!r}), retry {attempt + 1} in {delay:.2f}s")
+            else:
+                if self.rate_limiter is not None:
+                    if status == 429:
+                        self.rate_limiter.throttle(parse_retry_after(retry_after), retry.max_retry_after)
+                    elif status < 400:
+                        self.rate_limiter.recover()
+
+                delay = retry.next_delay(method, attempt, status, retry_after)
+                if delay is None:
+                    return status, body
+                self.logger.warning(f"{method} {url} returned {status}, retry {attempt + 1} in {delay:.2f}s")
+
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _make_request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
+        """
+        Make HTTP request to Pendo API with enhanced error handling
+
+        Args:
+            method: HTTP method (GET, POST, PUT, DELETE)
+            endpoint: API endpoint
+            **kwargs: Additional request parameters
+
+        Returns:
+            Response data as dictionary
+        """
+        url = f"{self.base_url}{endpoint}"
+
+        try:
+            status, body = await self._send(method, url, **kwargs)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.logger.error(f"Request failed: {e!r}")
+            raise PendoAPIError(str(e) or e.__class__.__name__)
+
+        if status >= 400:
+            text = body.decode('utf-8', errors='replace')
+            self.logger.error(f"Request failed: HTTP {status} for {method} {endpoint}")
+            try:
+                error_data = json.loads(text)
+                message = error_data.get('message', text[:200]) if isinstance(error_data, dict) else text[:200]
+            except json.JSONDecodeError:
+                message = f"HTTP {status}: {text[:200]}"
+            raise PendoAPIError(message, status)
+
+        try:
+            data = json.loads(body)
+        except ValueError as e:
+            self.logger.error(f"Malformed JSON from {endpoint}: {e}")
+            raise PendoAPIError(f"Malformed JSON from {endpoint}: {e}", status)
+
+        self.logger.info(f"Successful {method} request to {endpoint}")
+        return data
+
+    async def get(self, endpoint: str, params: Dict = None) -> Dict[str, Any]:
+        """Make GET request"""
+        return await self._make_request('GET', endpoint, params=params)
+
+    async def post(self, endpoint: str, data: Dict = None) -> Dict[str, Any]:
+        """Make POST request"""
+        return await self._make_request('POST', endpoint, json=data)
+
+    async def put(self, endpoint: str, data: Dict = None) -> Dict[str, Any]:
+        """Make PUT request"""
+        return await self._make_request('PUT', endpoint, json=data)
+
+    async def delete(self, endpoint: str) -> Dict[str, Any]:
+        """Make DELETE request"""
+        return await self._make_request('DELETE', endpoint)
+
+    # Guide Methods
+    async def list_guides(self) -> Dict[str, Any]:
+        """List all guides"""
+        return await self.get('/api/v1/guide')
+
+    async def get_guide_schema(self) -> Dict[str, Any]:
+        """Get guide metadata schema"""
+        return await self.get('/api/v1/metadata/schema/guide')
+
+    # Feature Methods
+    async def list_features(self) -> Dict[str, Any]:
+        """List all features"""
+        return await self.get('/api/v1/feature')
+
+    # Page Methods
+    async def list_pages(self) -> Dict[str, Any]:
+        """List all pages"""
+        return await self.get('/api/v1/page')
+
+    # Report Methods
+    async def list_reports(self) -> Dict[str, Any]:
+        """List all reports"""
+        return await self.get('/api/v1/report')
+
+    # Metadata Methods
+    async def get_visitor_metadata_schema(self) -> Dict[str, Any]:
+        """Get visitor metadata schema"""
+        return await self.get('/api/v1/metadata/schema/visitor')
+
+    # Aggregation API
+    async def run_aggregation_query(self, query: Union[Dict[str, Any], AggregationPipeline]) -> Dict[str, Any]:
+        """
+        Run aggregation query
+
+        Args:
+            query: Aggregation query definition, or an AggregationPipeline to build
+
+        Returns:
+            Dictionary containing aggregation results
+        """
+        if isinstance(query, AggregationPipeline):
+            query = query.build()
+        return await self.post('/api/v1/aggregation', data=query)
+
+    # Utility Methods
+    async def test_connection(self) -> bool:
+        """Test API connection with the cheapest working endpoint"""
+        url = f"{self.base_url}/api/v1/metadata/schema/visitor"
+        try:
+            # Paced like any request and retried once; only the status line matters, so the body is never read
+            status, _ = await self._send('GET', url, read_body=False, retry=replace(self.retry, max_retries=1))
+            return status < 400
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return False
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Get connection pool hit/miss counters"""
+        return self.pool_stats.snapshot()
+
+    def get_wire_stats(self) -> Dict[str, Any]:
+        """Get compressed versus decompressed bytes received per endpoint"""
+        return self.wire_stats.snapshot()
+
+    async def get_data_overview(self, timeout: float = None) -> Dict[str, Any]:
+        """
+        Get overview of available data
+        Fetches guides, features, pages, and reports concurrently
+
+        A section that fails or exceeds the timeout carries an 'error' and the
+        others are still returned.
+
+        Args:
+            timeout: Seconds each section may take (defaults to the transport read timeout)
+        """
+        sections = {
+            'guides': self.list_guides,
+            'features': self.list_features,
+            'pages': self.list_pages,
+            'reports': self.list_reports
+        }
+        timeout = self.transport.read_timeout if timeout is None else timeout
+
+        results = await asyncio.gather(
+            *(asyncio.wait_for(fetch(), timeout) for fetch in sections.values()),
+            return_exceptions=True
+        )
+
+        overview = {'timestamp': datetime.now().isoformat()}
+        errors = {}
+        for name, items in zip(sections, results):
+            if isinstance(items, asyncio.TimeoutError):
+                errors[name] = f"Timed out after {timeout}s"
+            elif isinstance(items, Exception):
+                errors[name] = str(items)
+
+            if name in errors:
+                self.logger.error(f"Failed to get {name} for data overview: {errors[name]}")
+                overview[name] = {'count': 0, 'sample': None, 'error': errors[name]}
+                continue
+
+            overview[name] = {
+                'count': len(items) if isinstance(items, list) else 0,
+                'sample': items[0] if isinstance(items, list) and items else None
+            }
+
+        if len(errors) == len(sections):
+            return {'error': '; '.join(f"{name}: {error}" for name, error in errors.items())}
+
+        overview['partial'] = bool(errors)
+        return overview
+
+
+# Convenience function for easy client initialization
+def create_async_client() -> AsyncPendoAPIClient:
+    """Create async Pendo API client from environment variables"""
+    return AsyncPendoAPIClient()
+
+
+if __name__ == "__main__":
+    async def main():
+        async with create_async_client() as client:
+            overview = await client.get_data_overview()
+            if 'error' in overview:
+                print(f"❌ Failed to get data overview: {overview['error']}")
+                return
+            print("📊 Data Overview:")
+            for name in ('guides', 'features', 'pages', 'reports'):
+                print(f"   {name.title()}: {overview[name]['count']}")
+
+    asyncio.run(main())
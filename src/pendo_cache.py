@@ -0,0 +1,192 @@
+"""
+Pendo.io API Response Cache
+In-memory HTTP cache with per-endpoint TTLs, byte-bounded LRU eviction
+and ETag / Last-Modified revalidation
+"""
+
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Any
+from urllib.parse import urlencode
+
+# Schemas almost never change; listings change occasionally and are
+# revalidated cheaply with If-None-Match once their TTL lapses.
+DEFAULT_TTLS = {
+    '/api/v1/metadata/schema/': 3600,
+    '/api/v1/guide': 300,
+    '/api/v1/feature': 300,
+    '/api/v1/page': 300,
+    '/api/v1/report': 300
+}
+
+
+class CacheEntry:
+    """Parsed response body plus the validators needed to revalidate it"""
+
+    __slots__ = ('data', 'etag', 'last_modified', 'body_hash', 'size', 'expires_at')
+
+    def __init__(self, data: Any, etag: Optional[str], last_modified: Optional[str],
+                 body_hash: str, size: int, expires_at: float):
+        self.data = data
+        self.etag = etag
+        self.last_modified = last_modified
+        self.body_hash = body_hash
+        self.size = size
+        self.expires_at = expires_at
+
+    def is_fresh(self) -> bool:
+        return time.monotonic() < self.expires_at
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Request headers that let the server answer 304 Not Modified"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU cache of GET responses bounded by total body size
+
+    Only endpoints with a configured TTL are cached. A fresh entry is served
+    without touching the network; a stale entry is revalidated. When the
+    server answers 304, or returns a body whose hash matches the cached one,
+    the previously parsed data is reused and the JSON is not parsed again.
+
+    Cached data is shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, ttls: Dict[str, float] = None):
+        """
+        Args:
+            max_bytes: Upper bound on the summed body size of cached entries
+            ttls: Endpoint prefix to TTL seconds; the longest matching prefix wins.
+                A TTL of 0 caches the entry but revalidates it on every request.
+        """
+        self.max_bytes = max_bytes
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self._entries: 'OrderedDict[str, CacheEntry]' = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.revalidated = 0
+        self.unchanged = 0
+        self.misses = 0
+
+    def ttl_for(self, endpoint: str) -> Optional[float]:
+        """TTL for an endpoint, or None if it should not be cached"""
+        matches = [prefix for prefix in self.ttls if _matches_prefix(endpoint, prefix)]
+        if not matches:
+            return None
+        return self.ttls[max(matches, key=len)]
+
+    @staticmethod
+    def make_key(endpoint: str, params: Dict = None) -> str:
+        if not params:
+            return endpoint
+        return f"{endpoint}?{urlencode(sorted(params.items()), doseq=True)}"
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def record_hit(self) -> None:
+        with self._lock:
+            self.hits += 1
+
+    def refresh(self, key: str, ttl: float) -> Optional[CacheEntry]:
+        """Extend an entry after a 304 Not Modified"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.expires_at = time.monotonic() + ttl
+                self.revalidated += 1
+            return entry
+
+    def store(self, key: str, body: bytes, headers: Dict[str, str], ttl: float,
+              parse, previous: CacheEntry = None) -> Any:
+        """
+        Cache a 200 response and return its parsed data
+
+        Args:
+            key: Cache key
+            body: Raw response body
+            headers: Response headers
+            ttl: Seconds the entry stays fresh
+            parse: Callable turning the body into data, skipped if the body is unchanged
+            previous: Entry being revalidated, if any
+
+        Returns:
+            Parsed response data
+        """
+        body_hash = hashlib.sha256(body).hexdigest()
+        if previous is not None and previous.body_hash == body_hash:
+            data = previous.data
+            with self._lock:
+                self.unchanged += 1
+        else:
+            data = parse()
+            with self._lock:
+                self.misses += 1
+
+        entry = CacheEntry(
+            data=data,
+            etag=headers.get('ETag'),
+            last_modified=headers.get('Last-Modified'),
+            body_hash=body_hash,
+            size=len(body),
+            expires_at=time.monotonic() + ttl
+        )
+        if entry.size > self.max_bytes:
+            self.invalidate(key)
+            return data
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old.size
+            self._entries[key] = entry
+            self._size += entry.size
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= evicted.size
+        return data
+
+    def invalidate(self, key: str = None) -> None:
+        """Drop one entry, or everything when no key is given"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._size = 0
+                return
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._size -= entry.size
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'revalidated': self.revalidated,
+                'unchanged': self.unchanged,
+                'misses': self.misses
+            }
+
+
+def _matches_prefix(endpoint: str, prefix: str) -> bool:
+    """True if prefix covers whole path segments of endpoint ('/api/v1/guide' is not '/api/v1/guides')"""
+    if not endpoint.startswith(prefix):
+        return False
+    rest = endpoint[len(prefix):]
+    return not rest or prefix.endswith('/') or rest[0] in '/?'
@@ -3,16 +3,19 @@ Pendo.io API Client
 A comprehensive Python client for interacting with Pendo.io's API
 """
 
+from __future__ import annotations
+
 import os
-import requests
-import json
-from typing import Dict, List, Optional, Any
-from datetime import datetime
-import logging
-from dotenv import load_dotenv
+import time
 
-# Load environment variables from .env file
-load_dotenv()
+# Importing this module must stay free of side effects and heavy imports
+# (requests, dotenv, json, ...); they are loaded when first needed instead.
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Dict, List, Any, Iterator
+    import requests
+    from pendo_transport import TransportConfig
+    from pendo_retry import RetryPolicy
 
 
 class PendoAPIClient:
@@ -22,30 +25,94 @@ class PendoAPIClient:
     Handles authentication, request management, and all API interactions
     """
 
-    def __init__(self, api_key: str = None, base_url: str = None):
+    def __init__(self, api_key: str = None, base_url: str = None, transport: TransportConfig = None,
+                 retry: RetryPolicy = None, requests_per_second: float = None):
         """
         Initialize the Pendo API client
 
         Args:
             api_key: Pendo integration key
             base_url: Base URL for Pendo API
+            transport: Connection pool and timeout settings
+            retry: Retry policy for throttled and failed requests
+            requests_per_second: Client-side pacing shared by all clients using this key
         """
+        import logging
+        from pendo_config import load_environment
+        from pendo_transport import TransportConfig, WireStats, create_session
+        from pendo_retry import RetryPolicy, get_rate_limiter
+
+        if api_key is None or base_url is None:
+            load_environment()
+
         self.api_key = api_key or os.getenv('PENDO_API_KEY')
         self.base_url = base_url or os.getenv('PENDO_BASE_URL', 'https://api.pendo.io')
 
         if not self.api_key:
             raise ValueError("API key is required. Set PENDO_API_KEY environment variable or pass api_key parameter")
 
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.transport = transport or TransportConfig()
+        self.session, self.pool_stats = create_session(self.transport, {
             'X-Pendo-Integration-Key': self.api_key,
             'Content-Type': 'application/json',
             'Accept': 'application/json'
         })
+        self.wire_stats = WireStats()
 
-        # Setup logging
+        self.retry = retry or RetryPolicy()
+        self.rate_limiter = get_rate_limiter(self.api_key, requests_per_second) if requests_per_second else None
+
+        # Logging is configured by the application (see pendo_config.configure_logging)
         self.logger = logging.getLogger(__name__)
-        logging.basicConfig(level=logging.INFO)
+
+    def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request through the rate limiter, retrying throttled and failed attempts
+
+        Args:
+            method: HTTP method
+            url: Absolute request URL
+            **kwargs: Additional request parameters
+
+        Returns:
+            Final response (successful, non-retryable, or out of retries)
+        """
+        import requests
+        from pendo_retry import parse_retry_after
+
+        kwargs.setdefault('timeout', self.transport.timeout)
+        attempt = 0
+
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                delay = self.retry.next_delay(method, attempt)
+                if delay is None:
+                    raise
+                self.logger.warning(f"{method} {url} failed ({e}), retry {attempt + 1} in {delay:.2f}s")
+            else:
+                if not kwargs.get('stream'):
+                    self.wire_stats.record_response(response)
+
+                retry_after = response.headers.get('Retry-After')
+                if self.rate_limiter is not None:
+                    if response.status_code == 429:
+                        self.rate_limiter.throttle(parse_retry_after(retry_after), self.retry.max_retry_after)
+                    elif response.status_code < 400:
+                        self.rate_limiter.recover()
+
+                delay = self.retry.next_delay(method, attempt, response.status_code, retry_after)
+                if delay is None:
+                    return response
+                response.close()
+                self.logger.warning(f"{method} {url} returned {response.status_code}, retry {attempt + 1} in {delay:.2f}s")
+
+            time.sleep(delay)
+            attempt += 1
 
     def _make_request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
         """
@@ -59,10 +126,13 @@ class PendoAPIClient:
         Returns:
             Response data as dictionary
         """
+        import json
+        import requests
+
         url = f"{self.base_url}{endpoint}"
 
         try:
-            response = self.session.request(method, url, **kwargs)
+            response = self._send(method, url, **kwargs)
             response.raise_for_status()
 
             self.logger.info(f"Successful {method} request to {endpoint}")
@@ -97,6 +167,50 @@ class PendoAPIClient:
         """Make DELETE request"""
         return self._make_request('DELETE', endpoint)
 
+    def _iter_pages(self, endpoint: str, page_size: int = 100, prefetch: bool = True,
+                    params: Dict = None) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily yield records from a limit/offset paginated endpoint
+
+        Only the current page (and, with prefetch, the next one) is held in
+        memory, so memory use is flat regardless of the total record count.
+
+        Args:
+            endpoint: API endpoint
+            page_size: Records requested per page
+            prefetch: Fetch the next page in the background while the current one is consumed
+            params: Extra query parameters sent with every page request
+
+        Yields:
+            Individual records
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        def fetch_page(offset: int) -> List[Dict[str, Any]]:
+            query = dict(params or {}, limit=page_size, offset=offset)
+            payload = self.get(endpoint, params=query)
+            if isinstance(payload, list):
+                return payload
+            return payload.get('data') or payload.get('results') or []
+
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        try:
+            offset = 0
+            page = fetch_page(offset)
+            while page:
+                offset += page_size
+                has_more = len(page) >= page_size
+                pending = executor.submit(fetch_page, offset) if executor and has_more else None
+
+                yield from page
+
+                if not has_more:
+                    break
+                page = pending.result() if pending else fetch_page(offset)
+        finally:
+            if executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+
     # Campaign Management Methods
     def list_campaigns(self, limit: int = 20, offset: int = 0) -> Dict[str, Any]:
         """List all campaigns"""
@@ -137,9 +251,9 @@ class PendoAPIClient:
         """Track custom event"""
         return self.post('/api/v1/events', data=event_data)
 
-    def get_events(self, limit: int = 20, offset: int = 0) -> Dict[str, Any]:
-        """Retrieve event data"""
-        params = {'limit': limit, 'offset': offset}
+    def get_events(self, limit: int = 20, offset: int = 0, **params) -> Dict[str, Any]:
+        """Retrieve event data, optionally narrowed by filter and date query parameters"""
+        params = dict(params, limit=limit, offset=offset)
         return self.get('/api/v1/events', params=params)
 
     # Feedback Methods
@@ -197,6 +311,31 @@ class PendoAPIClient:
         """Get guide performance analytics"""
         return self.get(f'/api/v1/guides/{guide_id}/analytics')
 
+    # Streaming Pagination Methods
+    def iter_campaigns(self, page_size: int = 100, prefetch: bool = True) -> Iterator[Dict[str, Any]]:
+        """Iterate over all campaigns across pages"""
+        return self._iter_pages('/api/v1/campaigns', page_size, prefetch)
+
+    def iter_events(self, page_size: int = 100, prefetch: bool = True, **params) -> Iterator[Dict[str, Any]]:
+        """Iterate over all events across pages, with the same query parameters as get_events"""
+        return self._iter_pages('/api/v1/events', page_size, prefetch, params=params)
+
+    def iter_feedback(self, page_size: int = 100, prefetch: bool = True) -> Iterator[Dict[str, Any]]:
+        """Iterate over all feedback submissions across pages"""
+        return self._iter_pages('/api/v1/feedback', page_size, prefetch)
+
+    def iter_users(self, page_size: int = 100, prefetch: bool = True) -> Iterator[Dict[str, Any]]:
+        """Iterate over all users across pages"""
+        return self._iter_pages('/api/v1/users', page_size, prefetch)
+
+    def iter_accounts(self, page_size: int = 100, prefetch: bool = True) -> Iterator[Dict[str, Any]]:
+        """Iterate over all accounts across pages"""
+        return self._iter_pages('/api/v1/accounts', page_size, prefetch)
+
+    def iter_guides(self, page_size: int = 100, prefetch: bool = True) -> Iterator[Dict[str, Any]]:
+        """Iterate over all guides across pages"""
+        return self._iter_pages('/api/v1/guides', page_size, prefetch)
+
     # Utility Methods
     def test_connection(self) -> bool:
         """Test API connection and authentication"""
@@ -206,6 +345,14 @@ class PendoAPIClient:
         except PendoAPIError:
             return False
 
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Get connection pool hit/miss counters"""
+        return self.pool_stats.snapshot()
+
+    def get_wire_stats(self) -> Dict[str, Any]:
+        """Get compressed versus decompressed bytes received per endpoint"""
+        return self.wire_stats.snapshot()
+
     def get_rate_limit_info(self) -> Dict[str, Any]:
         """Get current rate limit information"""
         # This would need to be implemented based on actual API response headers
@@ -227,6 +374,9 @@ def create_client() -> PendoAPIClient:
 
 
 if __name__ == "__main__":
+    from pendo_config import configure_logging
+    configure_logging()
+
     # Example usage
     client = create_client()
 
@@ -3,16 +3,23 @@ Pendo.io API Client v2 - Production Ready
 Updated with discovered working endpoints and base URL
 """
 
-import os
-import requests
-import json
-from typing import Dict, List, Optional, Any
-from datetime import datetime
-import logging
-from dotenv import load_dotenv
+from __future__ import annotations
 
-# Load environment variables from .env file
-load_dotenv()
+import os
+import time
+
+# Importing this module must stay free of side effects and heavy imports
+# (requests, dotenv, json, ...); they are loaded when first needed instead.
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Dict, List, Tuple, Any, Iterator
+    import requests
+    from pendo_transport import TransportConfig
+    from pendo_retry import RetryPolicy
+    from pendo_cache import ResponseCache
+    from pendo_store import EntityStore
+    from pendo_aggregation import AggregationPipeline
+    from pendo_frame import EventFrame
 
 
 class PendoAPIClientV2:
@@ -23,31 +30,105 @@ class PendoAPIClientV2:
     Uses the correct base URL and endpoint structure.
     """
 
-    def __init__(self, api_key: str = None, base_url: str = None):
+    # Longest id list bulk_entity_totals filters server-side
+    MAX_FILTERED_IDS = 100
+
+    def __init__(self, api_key: str = None, base_url: str = None, transport: TransportConfig = None,
+                 retry: RetryPolicy = None, requests_per_second: float = None,
+                 cache: ResponseCache = None, store: EntityStore = None):
         """
         Initialize the Pendo API client with working configuration
 
         Args:
             api_key: Pendo integration key
             base_url: Working Pendo API base URL
+            transport: Connection pool and timeout settings
+            retry: Retry policy for throttled and failed requests
+            requests_per_second: Client-side pacing shared by all clients using this key
+            cache: Optional response cache for rarely changing GET endpoints
+            store: Optional on-disk store shared across processes for listings and aggregations
         """
+        import logging
+        from pendo_config import load_environment
+        from pendo_transport import TransportConfig, WireStats, create_session
+        from pendo_retry import RetryPolicy, get_rate_limiter
+
+        if api_key is None or base_url is None:
+            load_environment()
+
         self.api_key = api_key or os.getenv('PENDO_API_KEY')
         self.base_url = base_url or os.getenv('PENDO_BASE_URL', 'https://app.pendo.io')
 
         if not self.api_key:
             raise ValueError("API key is required. Set PENDO_API_KEY environment variable or pass api_key parameter")
 
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.transport = transport or TransportConfig()
+        self.session, self.pool_stats = create_session(self.transport, {
             'X-Pendo-Integration-Key': self.api_key,
             'Content-Type': 'application/json',
             'Accept': 'application/json',
             'User-Agent': 'Pendo-API-Client-V2/1.0'
         })
+        self.wire_stats = WireStats()
+
+        # Aggregation is the only POST and it is read-only, so it is safe to replay
+        self.retry = retry or RetryPolicy(idempotent_methods=RetryPolicy.idempotent_methods | {'POST'})
+        self.rate_limiter = get_rate_limiter(self.api_key, requests_per_second) if requests_per_second else None
+        self.cache = cache
+        self.store = store
+        self._store_prefix = None
 
-        # Setup logging
+        # Logging is configured by the application (see pendo_config.configure_logging)
         self.logger = logging.getLogger(__name__)
-        logging.basicConfig(level=logging.INFO)
+
+    def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request through the rate limiter, retrying throttled and failed attempts
+
+        Args:
+            method: HTTP method
+            url: Absolute request URL
+            **kwargs: Additional request parameters
+
+        Returns:
+            Final response (successful, non-retryable, or out of retries)
+        """
+        import requests
+        from pendo_retry import parse_retry_after
+
+        kwargs.setdefault('timeout', self.transport.timeout)
+        attempt = 0
+
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                delay = self.retry.next_delay(method, attempt)
+                if delay is None:
+                    raise
+                self.logger.warning(f"{method} {url} failed ({e}), retry {attempt + 1} in {delay:.2f}s")
+            else:
+                if not kwargs.get('stream'):
+                    self.wire_stats.record_response(response)
+
+                retry_after = response.headers.get('Retry-After')
+                if self.rate_limiter is not None:
+                    if response.status_code == 429:
+                        self.rate_limiter.throttle(parse_retry_after(retry_after), self.retry.max_retry_after)
+                    elif response.status_code < 400:
+                        self.rate_limiter.recover()
+
+                delay = self.retry.next_delay(method, attempt, response.status_code, retry_after)
+                if delay is None:
+                    return response
+                response.close()
+                self.logger.warning(f"{method} {url} returned {response.status_code}, retry {attempt + 1} in {delay:.2f}s")
+
+            time.sleep(delay)
+            attempt += 1
 
     def _make_request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
         """
@@ -61,13 +142,37 @@ class PendoAPIClientV2:
         Returns:
             Response data as dictionary
         """
+        import json
+        import requests
+
         url = f"{self.base_url}{endpoint}"
 
+        cache_key, cached, ttl = None, None, None
+        if self.cache is not None and method == 'GET':
+            ttl = self.cache.ttl_for(endpoint)
+            if ttl is not None:
+                cache_key = self.cache.make_key(endpoint, kwargs.get('params'))
+                cached = self.cache.get(cache_key)
+                if cached is not None and cached.is_fresh():
+                    self.cache.record_hit()
+                    return cached.data
+                if cached is not None:
+                    kwargs['headers'] = {**(kwargs.get('headers') or {}), **cached.conditional_headers()}
+
         try:
-            response = self.session.request(method, url, timeout=15, **kwargs)
+            response = self._send(method, url, **kwargs)
+
+            if cached is not None and response.status_code == 304:
+                self.cache.refresh(cache_key, ttl)
+                self.logger.info(f"Not modified: {method} request to {endpoint} served from cache")
+                return cached.data
+
             response.raise_for_status()
 
             self.logger.info(f"Successful {method} request to {endpoint}")
+            if cache_key is not None:
+                return self.cache.store(cache_key, response.content, response.headers, ttl,
+                                        parse=response.json, previous=cached)
             return response.json()
 
         except requests.exceptions.RequestException as e:
@@ -83,6 +188,89 @@ class PendoAPIClientV2:
 
             raise PendoAPIError(str(e))
 
+    def _stream_request(self, method: str, endpoint: str, key: str = None,
+                        chunk_size: int = 65536, **kwargs) -> Iterator[Any]:
+        """
+        Make HTTP request and decode the JSON array in the body incrementally
+
+        The body is parsed straight off the socket, so peak memory is bounded
+        by the largest single element rather than the full payload.
+
+        Args:
+            method: HTTP method
+            endpoint: API endpoint
+            key: Top-level key holding the array, or None if the body is the array
+            chunk_size: Bytes read from the socket per chunk
+            **kwargs: Additional request parameters
+
+        Yields:
+            Array elements, one at a time
+        """
+        import json
+        import requests
+        from pendo_stream import iter_json_array
+
+        url = f"{self.base_url}{endpoint}"
+
+        try:
+            response = self._send(method, url, stream=True, **kwargs)
+            response.raise_for_status()
+            decoded_bytes = 0
+
+            def chunks():
+                nonlocal decoded_bytes
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    decoded_bytes += len(chunk)
+                    yield chunk
+
+            try:
+                yield from iter_json_array(chunks(), key=key)
+            finally:
+                self.wire_stats.record_response(response, decoded_bytes=decoded_bytes)
+                response.close()
+
+            self.logger.info(f"Successful streamed {method} request to {endpoint}")
+
+        except requests.exceptions.RequestException as e:
+            self.logger.error(f"Request failed: {e}")
+
+            if hasattr(e, 'response') and e.response is not None:
+                try:
+                    error_data = e.response.json()
+                    raise PendoAPIError(error_data.get('message', str(e)), e.response.status_code)
+                except json.JSONDecodeError:
+                    raise PendoAPIError(f"HTTP {e.response.status_code}: {e.response.text[:200]}", e.response.status_code)
+
+            raise PendoAPIError(str(e))
+
+        except ValueError as e:
+            self.logger.error(f"Malformed JSON stream from {endpoint}: {e}")
+            raise PendoAPIError(f"Malformed JSON stream from {endpoint}: {e}")
+
+        except KeyError as e:
+            # An error envelope or a differently shaped body has no such top-level key
+            self.logger.error(f"Response from {endpoint} is missing key {e}")
+            raise PendoAPIError(f"Response from {endpoint} is missing key {e}")
+
+    def _store_key(self, key: str) -> str:
+        if self._store_prefix is None:
+            import hashlib
+            # Keys entries by subscription without writing the integration key to disk
+            self._store_prefix = hashlib.sha256(f"{self.base_url}|{self.api_key}".encode()).hexdigest()[:16]
+        return f"{self._store_prefix}:{key}"
+
+    def _stored(self, namespace: str, key: str, fetch, immutable: bool = False) -> Any:
+        """
+        Serve a result from the on-disk store when one is configured
+
+        Immutable results are kept until deleted instead of expiring with the namespace TTL.
+        """
+        if self.store is None:
+            return fetch()
+        if immutable:
+            return self.store.get_or_fetch(namespace, self._store_key(key), fetch, ttl=None)
+        return self.store.get_or_fetch(namespace, self._store_key(key), fetch)
+
     def get(self, endpoint: str, params: Dict = None) -> Dict[str, Any]:
         """Make GET request"""
         return self._make_request('GET', endpoint, params=params)
@@ -107,7 +295,7 @@ class PendoAPIClientV2:
         Returns:
             Dictionary containing list of guides
         """
-        return self.get('/api/v1/guide')
+        return self._stored('listing', '/api/v1/guide', lambda: self.get('/api/v1/guide'))
 
     def get_guide_schema(self) -> Dict[str, Any]:
         """
@@ -126,7 +314,7 @@ class PendoAPIClientV2:
         Returns:
             Dictionary containing list of features with analytics data
         """
-        return self.get('/api/v1/feature')
+        return self._stored('listing', '/api/v1/feature', lambda: self.get('/api/v1/feature'))
 
     # Working Page Management Methods
     def list_pages(self) -> Dict[str, Any]:
@@ -136,7 +324,7 @@ class PendoAPIClientV2:
         Returns:
             Dictionary containing list of pages with analytics data
         """
-        return self.get('/api/v1/page')
+        return self._stored('listing', '/api/v1/page', lambda: self.get('/api/v1/page'))
 
     # Working Report Methods
     def list_reports(self) -> Dict[str, Any]:
@@ -146,7 +334,44 @@ class PendoAPIClientV2:
         Returns:
             Dictionary containing list of available reports
         """
-        return self.get('/api/v1/report')
+        return self._stored('listing', '/api/v1/report', lambda: self.get('/api/v1/report'))
+
+    # Streaming Listing Methods
+    def iter_guides(self) -> Iterator[Dict[str, Any]]:
+        """
+        Stream all guides, decoding one guide at a time
+
+        Yields:
+            Guide dictionaries
+        """
+        return self._stream_request('GET', '/api/v1/guide')
+
+    def iter_features(self) -> Iterator[Dict[str, Any]]:
+        """
+        Stream all features, decoding one feature at a time
+
+        Yields:
+            Feature dictionaries
+        """
+        return self._stream_request('GET', '/api/v1/feature')
+
+    def iter_pages(self) -> Iterator[Dict[str, Any]]:
+        """
+        Stream all pages, decoding one page at a time
+
+        Yields:
+            Page dictionaries
+        """
+        return self._stream_request('GET', '/api/v1/page')
+
+    def iter_reports(self) -> Iterator[Dict[str, Any]]:
+        """
+        Stream all reports, decoding one report at a time
+
+        Yields:
+            Report dictionaries
+        """
+        return self._stream_request('GET', '/api/v1/report')
 
     # Working Metadata Methods
     def get_visitor_metadata_schema(self) -> Dict[str, Any]:
@@ -159,28 +384,262 @@ class PendoAPIClientV2:
         return self.get('/api/v1/metadata/schema/visitor')
 
     # Aggregation API (Advanced - needs additional testing)
-    def run_aggregation_query(self, query: Dict[str, Any]) -> Dict[str, Any]:
+    def run_aggregation_query(self, query: Dict[str, Any] | AggregationPipeline) -> Dict[str, Any]:
         """
         Run aggregation query (NEEDS TESTING)
 
         Args:
-            query: Aggregation query definition
+            query: Aggregation query definition, or an AggregationPipeline to build
 
         Returns:
             Dictionary containing aggregation results
         """
-        return self.post('/api/v1/aggregation', data=query)
+        from pendo_aggregation import AggregationPipeline
+
+        if isinstance(query, AggregationPipeline):
+            query = query.build()
+        return self._aggregate(query)
+
+    def _aggregate(self, query: Dict[str, Any], immutable: bool = False) -> Dict[str, Any]:
+        from pendo_aggregation import query_fingerprint
+
+        query_key = query_fingerprint(query)
+        return self._stored('aggregation', query_key, lambda: self.post('/api/v1/aggregation', data=query),
+                            immutable=immutable)
+
+    def iter_aggregation(self, query: Dict[str, Any] | AggregationPipeline) -> Iterator[Dict[str, Any]]:
+        """
+        Stream aggregation result rows one at a time, bypassing the store
+
+        Args:
+            query: Aggregation query definition, or an AggregationPipeline to build
+
+        Yields:
+            Result rows
+        """
+        from pendo_aggregation import AggregationPipeline
+
+        if isinstance(query, AggregationPipeline):
+            query = query.build()
+        return self._stream_request('POST', '/api/v1/aggregation', key='results', json=query)
+
+    def export_aggregation(self, query: Dict[str, Any] | AggregationPipeline, path: str,
+                           format: str = None, row_group_size: int = None, **options) -> Dict[str, Any]:
+        """
+        Stream aggregation results straight into a file in constant memory
+
+        Rows are decoded off the socket one at a time and written in bounded
+        row groups, so the full result never exists in memory. Exports bypass
+        the store.
+
+        Args:
+            query: Aggregation query definition, or an AggregationPipeline to build
+            path: Output file; .ndjson/.jsonl, .parquet or .arrow/.feather/.ipc
+            format: 'ndjson', 'parquet' or 'ipc' to override the extension
+            row_group_size: Rows per row group
+            **options: Extra columnar sink options (schema, compression)
+
+        Returns:
+            Dictionary with rows, row groups, bytes written and elapsed time
+        """
+        from pendo_aggregation import AggregationPipeline
+        from pendo_sink import open_sink
+
+        if isinstance(query, AggregationPipeline):
+            query = query.build()
+
+        with open_sink(path, format, row_group_size, **options) as sink:
+            sink.write_rows(self._stream_request('POST', '/api/v1/aggregation', key='results', json=query))
+        stats = sink.stats()
+        self.logger.info(f"Exported {stats['rows']} aggregation rows to {path} "
+                         f"({stats['bytes']} bytes in {stats['elapsed_seconds']}s)")
+        return stats
+
+    def fetch_event_frame(self, query: Dict[str, Any] | AggregationPipeline) -> EventFrame:
+        """
+        Run an event aggregation and load the rows into a columnar EventFrame
+
+        Rows are encoded as they stream in, so the result is never held as a
+        list of dicts.
+
+        Args:
+            query: Aggregation over guideEvents, featureEvents or pageEvents
+
+        Returns:
+            EventFrame with one row per result row
+        """
+        from pendo_aggregation import AggregationPipeline
+        from pendo_frame import EventFrame
+
+        if isinstance(query, AggregationPipeline):
+            query = query.build()
+        source = next(name for name in query['request']['pipeline'][0]['source'] if name != 'timeSeries')
+        rows = self._stream_request('POST', '/api/v1/aggregation', key='results', json=query)
+        return EventFrame.from_rows(rows, event_type=source)
+
+    def run_sharded_aggregation(self, pipeline: AggregationPipeline, shard_days: int = 7,
+                                max_workers: int = 4, target_seconds: float = 10.0,
+                                target_rows: int = 50000, settle_seconds: float = 3600) -> Dict[str, Any]:
+        """
+        Run an aggregation over a long window as concurrent day shards
+
+        Shards run on a thread pool and every request still passes through the
+        rate limiter. Each new shard is sized from the rows and latency of the
+        shards finished so far; results are merged in time order.
+
+        With a store configured, shards of whole UTC days that ended more
+        than settle_seconds ago are closed: their results are stored without
+        expiry and indexed by pipeline and day range, so later runs reuse
+        them whatever time of day their window starts, and only fetch the
+        open days, the partial days at the window edges and any gaps.
+
+        Args:
+            pipeline: Pipeline with an absolute time_series window
+            shard_days: Size of the first shards in days
+            max_workers: Shards in flight at once
+            target_seconds: Latency each shard should stay under
+            target_rows: Result rows each shard should stay under
+            settle_seconds: Delay after a day ends before its data is treated as final
+
+        Returns:
+            Dictionary with merged 'results' and per-shard 'shards' statistics
+        """
+        from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+        from pendo_aggregation import DAY_MS, ShardPlanner, result_rows
+
+        closed_before = int((time.time() - settle_seconds) * 1000)
+        index_key = None
+        cached_shards = []
+        if self.store is not None:
+            index_key = self._store_key(ShardPlanner(pipeline).window_fingerprint())
+            cached_shards = self.store.get('aggregation_shards', index_key) or []
+
+        planner = ShardPlanner(pipeline, initial_days=shard_days,
+                               target_seconds=target_seconds, target_rows=target_rows,
+                               closed_before=closed_before, cached_shards=cached_shards)
+
+        def run_shard(shard):
+            started = time.monotonic()
+            result = self._aggregate(planner.query_for(shard), immutable=planner.is_closed(shard))
+            return result_rows(result), time.monotonic() - started
+
+        shard_rows = {}
+        shard_stats = []
+        reusable = set()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = {}
+            while True:
+                while len(pending) < max_workers:
+                    shard = planner.next_shard()
+                    if shard is None:
+                        break
+                    pending[executor.submit(run_shard, shard)] = shard
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    shard = pending.pop(future)
+                    try:
+                        rows, seconds = future.result()
+                    except Exception:
+                        for other in pending:
+                            other.cancel()
+                        raise
+                    if not shard.cached:
+                        # Cache hits say nothing about what fetching costs
+                        planner.observe(shard, len(rows), seconds)
+                    shard_rows[shard.first] = rows
+                    if planner.is_reusable(shard):
+                        reusable.add((shard.first, shard.days))
+                    shard_stats.append({
+                        'first': shard.first,
+                        'days': shard.days,
+                        'rows': len(rows),
+                        'seconds': round(seconds, 3),
+                        'closed': planner.is_closed(shard),
+                        'cached': shard.cached
+                    })
+                    self.logger.debug(f"Aggregation shard {shard.first} ({shard.days}d): "
+                                      f"{len(rows)} rows in {seconds:.2f}s")
+
+        if index_key is not None:
+            # Keyed by UTC day range, so any later window covering these days reuses them
+            reusable.update(tuple(shard) for shard in cached_shards if shard[0] % DAY_MS == 0)
+            self.store.put('aggregation_shards', index_key, sorted(reusable), ttl=None)
+
+        return {
+            'results': planner.merge(shard_rows),
+            'shards': sorted(shard_stats, key=lambda stats: stats['first'])
+        }
+
+    def bulk_entity_totals(self, entity_type: str, ids: List[str],
+                           window: Tuple[int, int] = None) -> Dict[str, Dict[str, int]]:
+        """
+        Event and unique visitor totals for many guides, features or pages in one request
+
+        Runs a single aggregation grouped by entity id instead of one query per
+        entity. Short id lists are filtered server-side; long ones are grouped
+        over every entity and picked out of the result.
+
+        Args:
+            entity_type: 'guide', 'feature' or 'page'
+            ids: Entity ids to total
+            window: (first, days) with first in epoch milliseconds (defaults to the last 30 days, including today)
+
+        Returns:
+            Entity id to {'events': ..., 'unique_visitors': ...}, zero for ids without events
+        """
+        from pendo_aggregation import AggregationPipeline, ENTITY_EVENT_SOURCES, DAY_MS, any_of, result_rows
+
+        if entity_type not in ENTITY_EVENT_SOURCES:
+            raise ValueError(f"Unknown entity type {entity_type!r}; expected one of {sorted(ENTITY_EVENT_SOURCES)}")
+        source, id_field, count_field = ENTITY_EVENT_SOURCES[entity_type]
+        if window is None:
+            # Day-aligned so repeated calls within a day share one stored result
+            today = int(time.time() * 1000) // DAY_MS * DAY_MS
+            window = (today - 29 * DAY_MS, 30)
+
+        totals = {entity_id: {'events': 0, 'unique_visitors': 0} for entity_id in ids}
+        if not totals:
+            return totals
+
+        pipeline = AggregationPipeline(source).time_series(first=window[0], count=window[1])
+        if len(totals) <= self.MAX_FILTERED_IDS:
+            pipeline.filter(any_of(id_field, totals))
+        per_visitor = ('sum', count_field) if count_field else ('count', None)
+        pipeline.group([id_field, 'visitorId'], events=per_visitor)
+        pipeline.group([id_field], events=('sum', 'events'), unique_visitors=('count', None))
+
+        for row in result_rows(self.run_aggregation_query(pipeline)):
+            entity_totals = totals.get(row.get(id_field))
+            if entity_totals is not None:
+                entity_totals['events'] = row.get('events') or 0
+                entity_totals['unique_visitors'] = row.get('unique_visitors') or 0
+        return totals
 
     # Utility Methods
     def test_connection(self) -> bool:
-        """Test API connection using working endpoints"""
+        """Test API connection with the cheapest working endpoint"""
+        import requests
+
+        url = f"{self.base_url}/api/v1/metadata/schema/visitor"
         try:
-            # Test with a known working endpoint
-            response = self.list_guides()
-            return True
-        except PendoAPIError:
+            # Only the status line matters, so the body is never downloaded
+            response = self._send('GET', url, stream=True)
+            response.close()
+            return response.ok
+        except requests.exceptions.RequestException:
             return False
 
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Get connection pool hit/miss counters"""
+        return self.pool_stats.snapshot()
+
+    def get_wire_stats(self) -> Dict[str, Any]:
+        """Get compressed versus decompressed bytes received per endpoint"""
+        return self.wire_stats.snapshot()
+
     def get_api_status(self) -> Dict[str, Any]:
         """Get API status and capabilities"""
         status = {
@@ -205,42 +664,60 @@ class PendoAPIClientV2:
         }
         return status
 
-    def get_data_overview(self) -> Dict[str, Any]:
+    def get_data_overview(self, timeout: float = None) -> Dict[str, Any]:
         """
         Get overview of available data
         Returns counts of guides, features, pages, and reports
+
+        The four listings are fetched concurrently, so wall time is that of
+        the slowest one. A section that fails or exceeds the timeout carries
+        an 'error' and the others are still returned.
+
+        Args:
+            timeout: Seconds each section may take (defaults to the transport read timeout)
         """
+        from datetime import datetime
+        from concurrent.futures import ThreadPoolExecutor, wait
+
+        sections = {
+            'guides': self.list_guides,
+            'features': self.list_features,
+            'pages': self.list_pages,
+            'reports': self.list_reports
+        }
+        timeout = self.transport.read_timeout if timeout is None else timeout
+
+        executor = ThreadPoolExecutor(max_workers=len(sections))
         try:
-            guides = self.list_guides()
-            features = self.list_features()
-            pages = self.list_pages()
-            reports = self.list_reports()
-
-            overview = {
-                'timestamp': datetime.now().isoformat(),
-                'guides': {
-                    'count': len(guides) if isinstance(guides, list) else 0,
-                    'sample': guides[0] if isinstance(guides, list) and guides else None
-                },
-                'features': {
-                    'count': len(features) if isinstance(features, list) else 0,
-                    'sample': features[0] if isinstance(features, list) and features else None
-                },
-                'pages': {
-                    'count': len(pages) if isinstance(pages, list) else 0,
-                    'sample': pages[0] if isinstance(pages, list) and pages else None
-                },
-                'reports': {
-                    'count': len(reports) if isinstance(reports, list) else 0,
-                    'sample': reports[0] if isinstance(reports, list) and reports else None
-                }
+            futures = {name: executor.submit(fetch) for name, fetch in sections.items()}
+            wait(futures.values(), timeout=timeout)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        overview = {'timestamp': datetime.now().isoformat()}
+        errors = {}
+        for name, future in futures.items():
+            if not future.done():
+                errors[name] = f"Timed out after {timeout}s"
+            elif future.exception() is not None:
+                errors[name] = str(future.exception())
+
+            if name in errors:
+                self.logger.error(f"Failed to get {name} for data overview: {errors[name]}")
+                overview[name] = {'count': 0, 'sample': None, 'error': errors[name]}
+                continue
+
+            items = future.result()
+            overview[name] = {
+                'count': len(items) if isinstance(items, list) else 0,
+                'sample': items[0] if isinstance(items, list) and items else None
             }
 
-            return overview
+        if len(errors) == len(sections):
+            return {'error': '; '.join(f"{name}: {error}" for name, error in errors.items())}
 
-        except Exception as e:
-            self.logger.error(f"Failed to get data overview: {e}")
-            return {'error': str(e)}
+        overview['partial'] = bool(errors)
+        return overview
 
 
 class PendoAPIError(Exception):
@@ -260,6 +737,9 @@ def create_client() -> PendoAPIClientV2:
 
 # Example usage and quick test
 if __name__ == "__main__":
+    from pendo_config import configure_logging
+    configure_logging()
+
     print("🚀 Pendo API Client v2 - Production Ready")
     print("=" * 50)
 
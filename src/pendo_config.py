@@ -0,0 +1,64 @@
+"""
+Pendo.io Client Configuration
+Explicit environment loading and opt-in logging setup
+
+Nothing here runs at import time: the client modules call load_environment()
+only when a client is constructed without explicit credentials, and logging
+is left untouched unless an application calls configure_logging().
+"""
+
+import os
+
+_environment_loaded = False
+
+
+def load_environment(dotenv_path: str = None, override: bool = False) -> bool:
+    """
+    Load variables from a .env file into os.environ
+
+    The default .env lookup runs at most once per process; passing an
+    explicit dotenv_path always loads that file.
+
+    Args:
+        dotenv_path: Path to the .env file (searched for upwards from this package if omitted)
+        override: Replace variables that are already set
+
+    Returns:
+        True if a .env file was found and loaded
+    """
+    global _environment_loaded
+    if dotenv_path is None and _environment_loaded:
+        return False
+
+    from dotenv import load_dotenv, find_dotenv
+
+    if dotenv_path is None:
+        _environment_loaded = True
+        dotenv_path = _find_upwards('.env', os.path.dirname(os.path.abspath(__file__))) or find_dotenv(usecwd=True)
+        if not dotenv_path:
+            return False
+    return load_dotenv(dotenv_path, override=override)
+
+
+def _find_upwards(filename: str, directory: str) -> str:
+    """Look for filename in directory and each of its parents"""
+    while True:
+        candidate = os.path.join(directory, filename)
+        if os.path.isfile(candidate):
+            return candidate
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return ''
+        directory = parent
+
+
+def configure_logging(level: int = None) -> None:
+    """
+    Opt-in basic logging setup for scripts and notebooks
+
+    Args:
+        level: Logging level (defaults to INFO)
+    """
+    import logging
+
+    logging.basicConfig(level=logging.INFO if level is None else level)
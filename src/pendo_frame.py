@@ -0,0 +1,264 @@
+"""
+Pendo.io Columnar Event Store
+Typed, dictionary-encoded event columns built straight from aggregation rows
+"""
+
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+# Fixed categories for the entity_type column
+ENTITY_TYPES = ('guide', 'feature', 'page')
+
+# Row field holding the entity id, per entity type
+ENTITY_ID_FIELDS = {'guide': 'guideId', 'feature': 'featureId', 'page': 'pageId'}
+
+# Code used for missing visitor/account/entity values
+MISSING = -1
+
+
+class _Dictionary:
+    """Append-only value <-> integer code mapping"""
+
+    __slots__ = ('codes', 'values')
+
+    def __init__(self, values: Iterable[Any] = ()):
+        self.values: List[Any] = []
+        self.codes: Dict[Any, int] = {}
+        for value in values:
+            self.code(value)
+
+    def code(self, value: Any) -> int:
+        if value is None:
+            return MISSING
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def remap(self, values: Sequence[Any]) -> np.ndarray:
+        """Lookup table turning codes of another dictionary into codes of this one"""
+        return np.fromiter((self.code(value) for value in values), dtype=np.int32, count=len(values))
+
+
+class EventFrameBuilder:
+    """
+    Accumulates event rows into compact typed buffers
+
+    Rows can be appended one at a time as they stream off the network;
+    only the encoded columns are kept, never the row dicts themselves.
+    Rows without an event time are skipped and counted in `skipped`.
+    """
+
+    def __init__(self, event_type: str = None):
+        """
+        Args:
+            event_type: Event type for rows without a 'type' field (e.g. the source name)
+        """
+        self.default_event_type = event_type
+        self._timestamp = array('q')
+        self._count = array('i')
+        self._entity = array('i')
+        self._entity_type = array('b')
+        self._visitor = array('i')
+        self._account = array('i')
+        self._event_type = array('h')
+        self._entity_ids = _Dictionary()
+        self._visitor_ids = _Dictionary()
+        self._account_ids = _Dictionary()
+        self._event_types = _Dictionary()
+        self.skipped = 0
+
+    def append(self, row: Dict[str, Any]) -> None:
+        """Encode one aggregation row (or a formatted pendo_events row)"""
+        timestamp = row.get('browserTime', row.get('browser_time'))
+        if timestamp is None:
+            self.skipped += 1
+            return
+
+        entity_type, entity_id = _entity_of(row)
+        self._timestamp.append(_to_millis(timestamp))
+        self._count.append(1 if row.get('numEvents') is None else int(row['numEvents']))
+        self._entity.append(self._entity_ids.code(entity_id))
+        self._entity_type.append(ENTITY_TYPES.index(entity_type) if entity_type in ENTITY_TYPES else MISSING)
+        self._visitor.append(self._visitor_ids.code(row.get('visitorId', row.get('visitor_id'))))
+        self._account.append(self._account_ids.code(row.get('accountId', row.get('account_id'))))
+        event_type = row.get('type') or row.get('event_type') or self.default_event_type
+        self._event_type.append(self._event_types.code(event_type))
+
+    def extend(self, rows: Iterable[Dict[str, Any]]) -> 'EventFrameBuilder':
+        for row in rows:
+            self.append(row)
+        return self
+
+    def build(self) -> 'EventFrame':
+        return EventFrame(
+            timestamp=np.frombuffer(self._timestamp, dtype=np.int64).copy(),
+            count=np.frombuffer(self._count, dtype=np.int32).copy(),
+            entity=np.frombuffer(self._entity, dtype=np.int32).copy(),
+            entity_type=np.frombuffer(self._entity_type, dtype=np.int8).copy(),
+            visitor=np.frombuffer(self._visitor, dtype=np.int32).copy(),
+            account=np.frombuffer(self._account, dtype=np.int32).copy(),
+            event_type=np.frombuffer(self._event_type, dtype=np.int16).copy(),
+            entity_ids=list(self._entity_ids.values),
+            visitor_ids=list(self._visitor_ids.values),
+            account_ids=list(self._account_ids.values),
+            event_types=list(self._event_types.values)
+        )
+
+
+class EventFrame:
+    """
+    In-memory columnar table of Pendo events
+
+    Columns are numpy arrays: int64 epoch-millisecond timestamps, int32 event
+    counts (numEvents, or 1 per raw event), and integer codes into the
+    entity, visitor, account and event type dictionaries (-1 when missing).
+    A month of events costs roughly 30 bytes per event plus one copy of each
+    distinct id, instead of a Python dict per event.
+
+    Frames are immutable by convention; filtering returns a new frame that
+    shares the dictionaries.
+    """
+
+    COLUMNS = ('timestamp', 'count', 'entity', 'entity_type', 'visitor', 'account', 'event_type')
+
+    def __init__(self, timestamp: np.ndarray, count: np.ndarray, entity: np.ndarray,
+                 entity_type: np.ndarray, visitor: np.ndarray, account: np.ndarray,
+                 event_type: np.ndarray, entity_ids: List[str], visitor_ids: List[str],
+                 account_ids: List[str], event_types: List[str]):
+        self.timestamp = timestamp
+        self.count = count
+        self.entity = entity
+        self.entity_type = entity_type
+        self.visitor = visitor
+        self.account = account
+        self.event_type = event_type
+        self.entity_ids = entity_ids
+        self.visitor_ids = visitor_ids
+        self.account_ids = account_ids
+        self.event_types = event_types
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]], event_type: str = None) -> 'EventFrame':
+        """
+        Build a frame from aggregation result rows
+
+        Args:
+            rows: Rows from guideEvents/featureEvents/pageEvents (any iterable, e.g. a stream)
+            event_type: Event type for rows without a 'type' field
+
+        Returns:
+            EventFrame
+        """
+        return EventFrameBuilder(event_type).extend(rows).build()
+
+    @classmethod
+    def empty(cls) -> 'EventFrame':
+        return EventFrameBuilder().build()
+
+    @classmethod
+    def concat(cls, frames: Sequence['EventFrame']) -> 'EventFrame':
+        """Stack frames, merging their dictionaries"""
+        if not frames:
+            return cls.empty()
+
+        merged = {name: _Dictionary() for name in ('entity_ids', 'visitor_ids', 'account_ids', 'event_types')}
+        columns = {name: [] for name in cls.COLUMNS}
+        for frame in frames:
+            columns['timestamp'].append(frame.timestamp)
+            columns['count'].append(frame.count)
+            columns['entity_type'].append(frame.entity_type)
+            for column, dictionary in (('entity', 'entity_ids'), ('visitor', 'visitor_ids'),
+                                       ('account', 'account_ids'), ('event_type', 'event_types')):
+                codes = getattr(frame, column)
+                # The trailing MISSING entry is what code -1 indexes
+                lookup = np.append(merged[dictionary].remap(getattr(frame, dictionary)), MISSING)
+                columns[column].append(lookup[codes].astype(codes.dtype))
+
+        return cls(**{name: np.concatenate(parts) for name, parts in columns.items()},
+                   **{name: dictionary.values for name, dictionary in merged.items()})
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the columns and dictionaries"""
+        import sys
+
+        column_bytes = sum(getattr(self, name).nbytes for name in self.COLUMNS)
+        dictionary_bytes = sum(
+            sys.getsizeof(values) + sum(sys.getsizeof(value) for value in values)
+            for values in (self.entity_ids, self.visitor_ids, self.account_ids, self.event_types)
+        )
+        return column_bytes + dictionary_bytes
+
+    def take(self, selector: np.ndarray) -> 'EventFrame':
+        """Rows selected by a boolean mask or index array"""
+        return EventFrame(
+            **{name: getattr(self, name)[selector] for name in self.COLUMNS},
+            entity_ids=self.entity_ids, visitor_ids=self.visitor_ids,
+            account_ids=self.account_ids, event_types=self.event_types
+        )
+
+    def between(self, start: int = None, end: int = None) -> 'EventFrame':
+        """Events with start <= timestamp < end (epoch milliseconds)"""
+        mask = np.ones(len(self), dtype=bool)
+        if start is not None:
+            mask &= self.timestamp >= start
+        if end is not None:
+            mask &= self.timestamp < end
+        return self.take(mask)
+
+    def of_entity_type(self, entity_type: str) -> 'EventFrame':
+        return self.take(self.entity_type == ENTITY_TYPES.index(entity_type))
+
+    def event_type_code(self, event_type: str) -> int:
+        """Code of an event type, or MISSING if the frame has none of it"""
+        try:
+            return self.event_types.index(event_type)
+        except ValueError:
+            return MISSING
+
+    def iter_rows(self) -> Iterator[Dict[str, Any]]:
+        """Decode rows back into dicts, for inspection and debugging"""
+        for index in range(len(self)):
+            entity_type = int(self.entity_type[index])
+            yield {
+                'browserTime': int(self.timestamp[index]),
+                'numEvents': int(self.count[index]),
+                'entity_type': ENTITY_TYPES[entity_type] if entity_type != MISSING else None,
+                'entity_id': _decode(self.entity_ids, self.entity[index]),
+                'visitorId': _decode(self.visitor_ids, self.visitor[index]),
+                'accountId': _decode(self.account_ids, self.account[index]),
+                'type': _decode(self.event_types, self.event_type[index])
+            }
+
+
+def _entity_of(row: Dict[str, Any]) -> tuple:
+    """(entity_type, entity_id) of an aggregation or pendo_events row"""
+    for entity_type, field in ENTITY_ID_FIELDS.items():
+        value = row.get(field)
+        if value:
+            return entity_type, value
+    if row.get('entity_id'):
+        return row.get('entity_type'), row['entity_id']
+    return None, None
+
+
+def _to_millis(value: Any) -> int:
+    if isinstance(value, str):
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        if parsed.tzinfo is None:
+            # Naive times are UTC, like epoch milliseconds, whatever the host's timezone
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return int(parsed.timestamp() * 1000)
+    return int(value)
+
+
+def _decode(values: List[Any], code: int) -> Optional[Any]:
+    return values[code] if code != MISSING else None
@@ -0,0 +1,107 @@
+"""
+Pendo.io Usage Heatmap
+Day-of-week x hour event matrices from event time, in any timezone
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from pendo_frame import ENTITY_TYPES, EventFrame
+from pendo_rollup import HOUR_MS, RollupStore
+from pendo_sketch import DAY_MS
+
+# UTC offsets only change on quarter-hour boundaries, so one lookup per quarter hour is exact
+_OFFSET_BUCKET_MS = 15 * 60 * 1000
+
+# 1970-01-01 was a Thursday; rows are numbered like Postgres DOW (0 = Sunday)
+_EPOCH_DOW = 4
+
+
+def _utc_offsets(timestamps: np.ndarray, tz: str) -> np.ndarray:
+    """UTC offset in milliseconds at each timestamp, looking up each quarter hour once"""
+    if tz == 'UTC':
+        return np.zeros(len(timestamps), dtype=np.int64)
+
+    zone = ZoneInfo(tz)
+    buckets = timestamps // _OFFSET_BUCKET_MS
+    unique_buckets, position = np.unique(buckets, return_inverse=True)
+    offsets = np.fromiter(
+        (datetime.fromtimestamp(int(bucket) * _OFFSET_BUCKET_MS / 1000, tz=timezone.utc)
+         .astimezone(zone).utcoffset().total_seconds() * 1000 for bucket in unique_buckets),
+        dtype=np.int64, count=len(unique_buckets)
+    )
+    return offsets[position]
+
+
+def _bucket(timestamps: np.ndarray, weights: np.ndarray, tz: str) -> np.ndarray:
+    """7 x 24 matrix of summed weights by local day of week and hour"""
+    local = timestamps + _utc_offsets(timestamps, tz)
+    day_of_week = (local // DAY_MS + _EPOCH_DOW) % 7
+    hour = (local % DAY_MS) // HOUR_MS
+    return np.bincount(day_of_week * 24 + hour, weights=weights, minlength=7 * 24) \
+        .reshape(7, 24).astype(np.int64)
+
+
+def usage_heatmap(frame: EventFrame, tz: str = 'UTC', start: int = None, end: int = None,
+                  entity_type: str = None) -> np.ndarray:
+    """
+    Event counts by day of week and hour of event time (browserTime)
+
+    Args:
+        frame: Events to count
+        tz: IANA timezone the days and hours are bucketed in
+        start: Only events at or after this epoch-millisecond time
+        end: Only events before this epoch-millisecond time
+        entity_type: Only 'guide', 'feature' or 'page' events
+
+    Returns:
+        int64 array of shape (7, 24); row 0 is Sunday
+    """
+    if start is not None or end is not None:
+        frame = frame.between(start, end)
+    if entity_type is not None:
+        frame = frame.take(frame.entity_type == ENTITY_TYPES.index(entity_type))
+    return _bucket(frame.timestamp, frame.count, tz)
+
+
+def heatmap_from_rollups(rollups: RollupStore, start_day: str, end_day: str, tz: str = 'UTC',
+                         entity_ids: Iterable[str] = None, entity_type: str = None) -> np.ndarray:
+    """
+    Usage heatmap built from daily rollups instead of raw events
+
+    Cost depends on the number of days in the range, never on the number of
+    events. Rollups hold UTC hours, so in timezones with a non-whole-hour
+    offset each UTC hour is attributed to the local hour it starts in.
+
+    Args:
+        rollups: Rollup store to read
+        start_day: First UTC day ('YYYY-MM-DD')
+        end_day: Last UTC day, inclusive
+        tz: IANA timezone the days and hours are bucketed in
+        entity_ids: Only these entities
+        entity_type: Only 'guide', 'feature' or 'page' rollups
+
+    Returns:
+        int64 array of shape (7, 24); row 0 is Sunday
+    """
+    hourly = rollups.hourly_counts(start_day, end_day, entity_ids, entity_type)
+    if not hourly:
+        return np.zeros((7, 24), dtype=np.int64)
+
+    day_starts = np.array([
+        int(datetime.fromisoformat(day).replace(tzinfo=timezone.utc).timestamp() * 1000) for day in hourly
+    ], dtype=np.int64)
+    hour_starts = (day_starts[:, None] + np.arange(24, dtype=np.int64) * HOUR_MS).ravel()
+    counts = np.concatenate(list(hourly.values()))
+    return _bucket(hour_starts, counts, tz)
+
+
+def heatmap_rows(matrix: np.ndarray) -> List[Dict[str, Any]]:
+    """Non-empty cells as rows shaped like the get_usage_heatmap SQL function"""
+    return [
+        {'day_of_week': int(day), 'hour': int(hour), 'count': int(matrix[day, hour])}
+        for day, hour in zip(*np.nonzero(matrix))
+    ]
@@ -0,0 +1,375 @@
+"""
+Pendo.io Staged Sync Pipeline
+Fetch, transform and write stages on worker threads joined by bounded queues
+"""
+
+import time
+import queue
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from pendo_sync import ENTITY_SYNC, EVENT_SOURCES, SyncEngine, SyncRun, batched, format_event
+
+# Marks the end of a stage's input; one per worker
+_DONE = object()
+
+# Seconds between checks for a failed stage while blocked on a queue
+_POLL_SECONDS = 0.1
+
+
+class PipelineAborted(Exception):
+    """Raised inside workers to unwind once another stage has failed"""
+
+
+class Stage:
+    """
+    One step of a StagedPipeline
+
+    The function receives one item and returns an iterable of items for the
+    next stage (empty to drop the item, several to fan out). Iterables are
+    consumed lazily, so a generator that yields as it fetches hands work
+    downstream while it is still fetching.
+    """
+
+    def __init__(self, name: str, function: Callable[[Any], Iterable[Any]], workers: int = 1,
+                 queue_size: int = 4):
+        """
+        Args:
+            name: Stage name used in stats and thread names
+            function: Item -> iterable of output items
+            workers: Threads running this stage
+            queue_size: Capacity of the queue feeding this stage
+        """
+        if workers < 1 or queue_size < 1:
+            raise ValueError("workers and queue_size must be at least 1")
+        self.name = name
+        self.function = function
+        self.workers = workers
+        self.queue_size = queue_size
+        self.items = 0
+        self.outputs = 0
+        self.busy_seconds = 0.0
+        self.blocked_seconds = 0.0
+        self.idle_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def _record(self, busy: float, blocked: float, idle: float, outputs: int) -> None:
+        with self._lock:
+            self.items += 1
+            self.outputs += outputs
+            self.busy_seconds += busy
+            self.blocked_seconds += blocked
+            self.idle_seconds += idle
+
+    def stats(self, elapsed: float) -> Dict[str, Any]:
+        """
+        Throughput and where the stage's time went
+
+        busy is time spent in the stage function, blocked is time waiting for
+        room downstream (backpressure) and idle is time waiting for input.
+        """
+        capacity = elapsed * self.workers
+        return {
+            'workers': self.workers,
+            'items': self.items,
+            'outputs': self.outputs,
+            'busy_seconds': round(self.busy_seconds, 3),
+            'blocked_seconds': round(self.blocked_seconds, 3),
+            'idle_seconds': round(self.idle_seconds, 3),
+            'utilization': round(self.busy_seconds / capacity, 3) if capacity else 0.0
+        }
+
+
+class StagedPipeline:
+    """
+    Runs stages concurrently, each on its own worker threads
+
+    Stages are connected by bounded queues. A stage that outpaces the next
+    one blocks once the queue between them is full, so memory holds at most
+    the queue capacities plus one item per worker, and every stage keeps
+    working as long as the slowest one does. The first exception raised by
+    any worker stops the pipeline and is re-raised by run().
+    """
+
+    def __init__(self, stages: List[Stage]):
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+        self.stages = stages
+        self.logger = logging.getLogger(__name__)
+        self._queues: List[queue.Queue] = []
+        self._failed = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._error_lock = threading.Lock()
+        self.elapsed = 0.0
+
+    def run(self, inputs: Iterable[Any]) -> Dict[str, Dict[str, Any]]:
+        """
+        Push inputs through every stage and wait until all are processed
+
+        Returns:
+            Stage name to its stats
+        """
+        self._queues = [queue.Queue(maxsize=stage.queue_size) for stage in self.stages]
+        self._failed.clear()
+        self._error = None
+        remaining = [stage.workers for stage in self.stages]
+        remaining_lock = threading.Lock()
+
+        def worker(index: int) -> None:
+            stage = self.stages[index]
+            inbox = self._queues[index]
+            outbox = self._queues[index + 1] if index + 1 < len(self.stages) else None
+            try:
+                while True:
+                    waited = time.perf_counter()
+                    item = self._get(inbox)
+                    idle = time.perf_counter() - waited
+                    if item is _DONE:
+                        break
+                    busy = blocked = 0.0
+                    outputs = 0
+                    started = time.perf_counter()
+                    for output in stage.function(item) or ():
+                        produced = time.perf_counter()
+                        busy += produced - started
+                        if outbox is not None:
+                            self._put(outbox, output)
+                        started = time.perf_counter()
+                        blocked += started - produced
+                        outputs += 1
+                    busy += time.perf_counter() - started
+                    stage._record(busy, blocked, idle, outputs)
+            except PipelineAborted:
+                return
+            except BaseException as e:
+                self._fail(e)
+                return
+
+            # The last worker of a stage to finish tells every worker of the next stage
+            with remaining_lock:
+                remaining[index] -= 1
+                last = remaining[index] == 0
+            if last and outbox is not None:
+                try:
+                    for _ in range(self.stages[index + 1].workers):
+                        self._put(outbox, _DONE)
+                except PipelineAborted:
+                    pass
+
+        threads = [
+            threading.Thread(target=worker, args=(index,), name=f'pendo-{stage.name}-{number}', daemon=True)
+            for index, stage in enumerate(self.stages)
+            for number in range(stage.workers)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+
+        try:
+            for item in inputs:
+                self._put(self._queues[0], item)
+            for _ in range(self.stages[0].workers):
+                self._put(self._queues[0], _DONE)
+        except PipelineAborted:
+            pass
+        except BaseException as e:
+            self._fail(e)
+
+        for thread in threads:
+            thread.join()
+        self.elapsed = time.perf_counter() - started
+
+        if self._error is not None:
+            raise self._error
+        return self.stats()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {stage.name: stage.stats(self.elapsed) for stage in self.stages}
+
+    def _fail(self, error: BaseException) -> None:
+        with self._error_lock:
+            if self._error is None:
+                self._error = error
+                self.logger.error(f"Pipeline stopped: {error}")
+        self._failed.set()
+
+    def _put(self, target: queue.Queue, item: Any) -> None:
+        while True:
+            if self._failed.is_set():
+                raise PipelineAborted()
+            try:
+                target.put(item, timeout=_POLL_SECONDS)
+                return
+            except queue.Full:
+                continue
+
+    def _get(self, source: queue.Queue) -> Any:
+        while True:
+            if self._failed.is_set():
+                raise PipelineAborted()
+            try:
+                return source.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                continue
+
+
+class _ShardTracker:
+    """Commits an event shard once every batch fetched for it has been written"""
+
+    def __init__(self, engine: SyncEngine, synced_at: str):
+        self.engine = engine
+        self.synced_at = synced_at
+        self.marks: Dict[str, int] = {}
+        self.written: Dict[str, int] = {}
+        self._shards: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def start(self, source: str, mark: int) -> None:
+        self.marks[source] = mark
+        self.written[source] = 0
+
+    def fetched(self, run: SyncRun, source: str, unit: str, batches: int) -> None:
+        self._update(run, source, unit, total=batches)
+
+    def wrote(self, run: SyncRun, source: str, unit: str, records: int, latest: int) -> None:
+        self._update(run, source, unit, records=records, latest=latest)
+
+    def _update(self, run: SyncRun, source: str, unit: str, total: int = None,
+                records: int = 0, latest: int = 0) -> None:
+        with self._lock:
+            shard = self._shards.setdefault((source, unit), {'total': None, 'done': 0, 'records': 0})
+            if total is not None:
+                shard['total'] = total
+            else:
+                shard['done'] += 1
+                shard['records'] += records
+                self.written[source] += records
+                self.marks[source] = max(self.marks[source], latest)
+            if shard['total'] is None or shard['done'] < shard['total']:
+                return
+            del self._shards[(source, unit)]
+            # Checkpoint under the lock so marks are committed in the order they advanced
+            self.engine.commit_event_shard(run, source, unit, shard['records'], self.marks[source], self.synced_at)
+
+
+class PipelinedSync:
+    """
+    Incremental sync with fetching, formatting and writing overlapped
+
+    Event shards of every source go through three stages: fetch streams a
+    shard from the aggregation API in batches, transform formats each batch
+    into pendo_events rows, and write upserts them (and feeds rollups). The
+    stages run concurrently on their own worker threads with bounded queues
+    between them, so the network and the database are busy at the same time
+    while memory stays bounded by the queue sizes times the batch size.
+
+    Marks, checkpoints and resumption behave as in SyncEngine: a shard is
+    committed once all of its batches are written, in whatever order the
+    write workers finish them. The writer must be safe to call from
+    several threads when write_workers is above one.
+    """
+
+    def __init__(self, engine: SyncEngine, fetch_workers: int = 2, transform_workers: int = 1,
+                 write_workers: int = 2, queue_size: int = 4):
+        """
+        Args:
+            engine: Sync engine providing the client, writer, marks and checkpoints
+            fetch_workers: Shards fetched concurrently
+            transform_workers: Batches formatted concurrently
+            write_workers: Batches written concurrently
+            queue_size: Batches buffered between two stages
+        """
+        self.engine = engine
+        self.fetch_workers = fetch_workers
+        self.transform_workers = transform_workers
+        self.write_workers = write_workers
+        self.queue_size = queue_size
+        self.logger = logging.getLogger(__name__)
+
+    def sync_events(self, sources: Iterable[str] = EVENT_SOURCES) -> Dict[str, Any]:
+        """
+        Sync the events of several sources through one pipeline
+
+        Returns:
+            Source to its result, plus 'pipeline' with per-stage stats
+        """
+        engine = self.engine
+        synced_at = datetime.now(timezone.utc).isoformat()
+        tracker = _ShardTracker(engine, synced_at)
+
+        runs: Dict[str, SyncRun] = {}
+        shards = []
+        for source in sources:
+            run = engine.start_event_run(source)
+            runs[source] = run
+            tracker.start(source, engine.get_state(source).get('last_event_time', 0))
+            shards.extend((source, run, unit, first, last) for unit, first, last in engine.pending_event_shards(run))
+
+        def fetch(shard):
+            source, run, unit, first, last = shard
+            count = 0
+            events = engine.client.iter_aggregation(engine.event_pipeline(source, first, last))
+            for batch in batched(events, engine.event_batch_size):
+                count += 1
+                yield source, run, unit, batch
+            tracker.fetched(run, source, unit, count)
+
+        def transform(item):
+            source, run, unit, batch = item
+            rows = [format_event(event, source, synced_at) for event in batch]
+            yield source, run, unit, batch, rows
+
+        def write(item):
+            source, run, unit, batch, rows = item
+            records = engine.writer.write('pendo_events', rows)
+            if engine.rollups is not None:
+                engine.ingest_rollups(batch, source)
+            tracker.wrote(run, source, unit, records, max(event.get('browserTime') or 0 for event in batch))
+            return ()
+
+        pipeline = StagedPipeline([
+            Stage('fetch', fetch, self.fetch_workers, self.queue_size),
+            Stage('transform', transform, self.transform_workers, self.queue_size),
+            Stage('write', write, self.write_workers, self.queue_size)
+        ])
+        try:
+            stats = pipeline.run(shards)
+        except Exception as e:
+            for run in runs.values():
+                engine.checkpoints.finish(run, error=str(e))
+            raise
+
+        results: Dict[str, Any] = {}
+        for source, run in runs.items():
+            mark = engine.finish_event_run(run, source, tracker.marks[source], synced_at)
+            results[source] = {'records': tracker.written[source], 'last_event_time': mark, **run.summary()}
+        results['pipeline'] = {'seconds': round(pipeline.elapsed, 3), 'shards': len(shards), 'stages': stats}
+        self.logger.info(f"Pipelined sync wrote {sum(tracker.written.values())} events from {len(shards)} "
+                         f"shards in {pipeline.elapsed:.2f}s")
+        return results
+
+    def run(self, entity_types: Iterable[str] = tuple(ENTITY_SYNC),
+            event_sources: Iterable[str] = EVENT_SOURCES) -> Dict[str, Dict[str, Any]]:
+        """
+        Sync entity types (through the engine; their deltas are small) then events through the pipeline
+
+        Returns:
+            Name to its result, as SyncEngine.run, plus 'pipeline' stats
+        """
+        results = self.engine.run(entity_types=entity_types, event_sources=())
+        started = time.perf_counter()
+        try:
+            event_results = self.sync_events(event_sources)
+        except Exception as e:
+            self.logger.error(f"Pipelined event sync failed: {e}")
+            seconds = round(time.perf_counter() - started, 3)
+            event_results = {source: {'records': 0, 'status': 'failed', 'error': str(e), 'seconds': seconds}
+                             for source in event_sources}
+        else:
+            for source in event_sources:
+                event_results[source]['status'] = 'completed'
+            self.engine.prune_rollup_events()
+        results.update(event_results)
+        return results
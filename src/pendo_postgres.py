@@ -0,0 +1,204 @@
+"""
+Pendo.io Postgres Bulk Writer
+COPY-based upserts into the supabase-schema.sql tables, in parallel batches
+"""
+
+import os
+import json
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, List, Tuple
+
+from pendo_sync import SyncWriter, batched
+
+
+class PostgresCopyWriter(SyncWriter):
+    """
+    Sync writer that streams rows into Postgres with COPY
+
+    Each batch is copied into a temporary staging table shaped like the
+    target and merged with one set-based INSERT ... ON CONFLICT DO UPDATE,
+    in a single transaction per batch. Only the columns present in the rows
+    are written, so upserting catalog rows leaves analytics columns alone.
+
+    Batches run on `workers` connections at once; at most two batches per
+    worker are buffered, so memory stays bounded however many rows are
+    streamed. Requires psycopg 3.
+    """
+
+    def __init__(self, dsn: str = None, batch_size: int = 10000, workers: int = 4, schema: str = 'public'):
+        """
+        Args:
+            dsn: Connection string (defaults to PENDO_DATABASE_URL, then DATABASE_URL)
+            batch_size: Rows per COPY batch and merge transaction
+            workers: Batches written concurrently, one connection each
+            schema: Schema holding the tables
+        """
+        try:
+            import psycopg
+        except ImportError:
+            raise ImportError("psycopg is required for the Postgres writer: pip install 'psycopg[binary]'")
+
+        self.dsn = dsn or os.getenv('PENDO_DATABASE_URL') or os.getenv('DATABASE_URL')
+        if not self.dsn:
+            raise ValueError("No Postgres DSN: pass dsn or set PENDO_DATABASE_URL")
+        self.batch_size = batch_size
+        self.workers = workers
+        self.schema = schema
+        self.logger = logging.getLogger(__name__)
+        self._psycopg = psycopg
+        self._connections: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='pendo-copy')
+        self._tables: Dict[str, Tuple[Dict[str, str], List[str]]] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    # Connections
+    def _acquire(self):
+        try:
+            return self._connections.get_nowait()
+        except queue.Empty:
+            return self._psycopg.connect(self.dsn)
+
+    def _release(self, conn) -> None:
+        # Broken connections are dropped; a fresh one is opened on demand
+        if not conn.closed:
+            self._connections.put(conn)
+
+    def _table_info(self, table: str) -> Tuple[Dict[str, str], List[str]]:
+        """Column name -> data type, and the primary key columns, read from the catalog once"""
+        if table not in self._tables:
+            conn = self._acquire()
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(
+                        'SELECT column_name, data_type FROM information_schema.columns '
+                        'WHERE table_schema = %s AND table_name = %s ORDER BY ordinal_position',
+                        (self.schema, table)
+                    )
+                    columns = dict(cur.fetchall())
+                    cur.execute(
+                        'SELECT a.attname FROM pg_index i '
+                        'JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey) '
+                        'WHERE i.indrelid = %s::regclass AND i.indisprimary',
+                        (f'"{self.schema}"."{table}"',)
+                    )
+                    primary_key = [name for name, in cur.fetchall()]
+                conn.rollback()
+            finally:
+                self._release(conn)
+            if not columns:
+                raise ValueError(f"Table {self.schema}.{table} does not exist")
+            if not primary_key:
+                raise ValueError(f"Table {self.schema}.{table} has no primary key to merge on")
+            self._tables[table] = (columns, primary_key)
+        return self._tables[table]
+
+    # Writing
+    def write(self, table: str, rows: List[Dict[str, Any]]) -> int:
+        return self.write_stream(table, rows)
+
+    def write_stream(self, table: str, rows: Iterable[Dict[str, Any]]) -> int:
+        """
+        Upsert any iterable of rows, batch by batch
+
+        Rows with the same key within a batch collapse to the last one.
+
+        Returns:
+            Number of rows merged
+        """
+        columns, primary_key = self._table_info(table)
+        started = time.perf_counter()
+        pending = set()
+        written = batches = 0
+        try:
+            for batch in batched(rows, self.batch_size):
+                batches += 1
+                if len(pending) >= self.workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    written += sum(future.result() for future in done)
+                pending.add(self._executor.submit(self._merge_batch, table, columns, primary_key, batch))
+            written += sum(future.result() for future in wait(pending).done)
+        finally:
+            # Never leave batches running past a failure
+            for future in pending:
+                future.cancel()
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            stats = self._stats.setdefault(table, {'rows': 0, 'batches': 0, 'seconds': 0.0})
+            stats['rows'] += written
+            stats['batches'] += batches
+            stats['seconds'] += elapsed
+        if written:
+            self.logger.info(f"Merged {written} rows into {table} in {elapsed:.2f}s "
+                             f"({written / elapsed if elapsed else 0:.0f} rows/s)")
+        return written
+
+    def _merge_batch(self, table: str, table_columns: Dict[str, str], primary_key: List[str],
+                     batch: List[Dict[str, Any]]) -> int:
+        """COPY one batch into a staging table and merge it into the target"""
+        from psycopg import sql
+
+        # Last row wins for duplicate keys; ordering by key keeps lock order stable across workers
+        unique = {tuple(row.get(name) for name in primary_key): row for row in batch}
+        ordered = [unique[key] for key in sorted(unique, key=lambda key: tuple(map(str, key)))]
+        present = set().union(*ordered)
+        names = [name for name in table_columns if name in present]
+        missing = [name for name in primary_key if name not in names]
+        if missing:
+            raise ValueError(f"Rows for {table} lack primary key columns {missing}")
+        json_columns = {name for name in names if table_columns[name] in ('json', 'jsonb')}
+
+        target = sql.Identifier(self.schema, table)
+        stage = sql.Identifier(f'_stage_{table}')
+        column_list = sql.SQL(', ').join(map(sql.Identifier, names))
+        updates = [name for name in names if name not in primary_key]
+        on_conflict = sql.SQL('DO UPDATE SET {}').format(sql.SQL(', ').join(
+            sql.SQL('{0} = EXCLUDED.{0}').format(sql.Identifier(name)) for name in updates
+        )) if updates else sql.SQL('DO NOTHING')
+
+        conn = self._acquire()
+        try:
+            with conn.transaction(), conn.cursor() as cur:
+                cur.execute(sql.SQL('CREATE TEMP TABLE {} (LIKE {} INCLUDING DEFAULTS) ON COMMIT DROP')
+                            .format(stage, target))
+                with cur.copy(sql.SQL('COPY {} ({}) FROM STDIN').format(stage, column_list)) as copy:
+                    for row in ordered:
+                        copy.write_row([
+                            json.dumps(row.get(name)) if name in json_columns and row.get(name) is not None
+                            else row.get(name)
+                            for name in names
+                        ])
+                cur.execute(sql.SQL('INSERT INTO {target} ({columns}) SELECT {columns} FROM {stage} '
+                                    'ON CONFLICT ({key}) {action}').format(
+                    target=target, columns=column_list, stage=stage,
+                    key=sql.SQL(', ').join(map(sql.Identifier, primary_key)), action=on_conflict
+                ))
+        finally:
+            self._release(conn)
+        return len(ordered)
+
+    # Reporting
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-table rows, batches, seconds spent and rows per second"""
+        return {
+            table: {**stats, 'seconds': round(stats['seconds'], 3),
+                    'rows_per_second': round(stats['rows'] / stats['seconds']) if stats['seconds'] else 0}
+            for table, stats in self._stats.items()
+        }
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        while not self._connections.empty():
+            self._connections.get_nowait().close()
+
+    def __enter__(self) -> 'PostgresCopyWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
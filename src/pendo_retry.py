@@ -0,0 +1,215 @@
+"""
+Pendo.io API Retry and Rate Limiting
+Exponential backoff with Retry-After support and per-key token-bucket pacing
+"""
+
+import time
+import random
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, FrozenSet, Optional, Tuple
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Retry behaviour for throttled and failed requests
+
+    429 and 503 responses are always retried because the server did not
+    process the request. Other retryable statuses and connection errors are
+    only retried for methods listed in idempotent_methods.
+
+    Attributes:
+        max_retries: Retries after the initial attempt
+        backoff_factor: Base delay in seconds, doubled on every attempt
+        max_backoff: Upper bound for computed backoff delays
+        max_retry_after: Upper bound for server supplied Retry-After delays
+        jitter: Apply full jitter to computed backoff delays
+        retry_statuses: HTTP statuses worth retrying
+        idempotent_methods: Methods that are safe to replay after a server error
+    """
+
+    max_retries: int = 5
+    backoff_factor: float = 0.5
+    max_backoff: float = 30.0
+    max_retry_after: float = 300.0
+    jitter: bool = True
+    retry_statuses: Tuple[int, ...] = (429, 500, 502, 503, 504)
+    idempotent_methods: FrozenSet[str] = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+
+    def backoff(self, attempt: int) -> float:
+        """Exponential backoff delay for a zero-based attempt number"""
+        delay = min(self.max_backoff, self.backoff_factor * (2 ** attempt))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+    def next_delay(self, method: str, attempt: int, status_code: int = None,
+                   retry_after: str = None) -> Optional[float]:
+        """
+        Decide whether to retry and for how long to wait
+
+        Args:
+            method: HTTP method of the failed request
+            attempt: Zero-based number of the attempt that just failed
+            status_code: Response status, or None for a connection error
+            retry_after: Raw Retry-After header value, if any
+
+        Returns:
+            Seconds to sleep before retrying, or None to give up
+        """
+        if attempt >= self.max_retries:
+            return None
+
+        if status_code is None:
+            retryable = method.upper() in self.idempotent_methods
+        elif status_code in (429, 503):
+            retryable = status_code in self.retry_statuses
+        else:
+            retryable = status_code in self.retry_statuses and method.upper() in self.idempotent_methods
+
+        if not retryable:
+            return None
+
+        server_delay = parse_retry_after(retry_after)
+        if server_delay is not None:
+            return min(server_delay, self.max_retry_after)
+        return self.backoff(attempt)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header
+
+    Args:
+        value: Either delay-seconds or an HTTP-date
+
+    Returns:
+        Seconds to wait, or None if the header is missing or malformed
+    """
+    if not value:
+        return None
+
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class TokenBucket:
+    """
+    Thread-safe token-bucket rate limiter with adaptive rate
+
+    Tokens refill continuously at `rate` per second up to `capacity`.
+    Callers reserve a token before each request and sleep for the returned
+    delay, which paces concurrent workers in arrival order. On a 429 the rate
+    is halved (never below min_rate) and the bucket is drained; each success
+    then adds recovery_step back until the configured rate is reached again.
+    """
+
+    def __init__(self, rate: float, capacity: float = None, min_rate: float = None,
+                 recovery_step: float = None):
+        """
+        Args:
+            rate: Target sustained requests per second
+            capacity: Burst size (defaults to one second worth of tokens)
+            min_rate: Floor for the adaptive rate (defaults to 5% of rate)
+            recovery_step: Rate regained per successful request (defaults to 1% of rate)
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity else max(1.0, self.max_rate)
+        self.min_rate = float(min_rate) if min_rate else self.max_rate * 0.05
+        self.recovery_step = float(recovery_step) if recovery_step else self.max_rate * 0.01
+
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated_at
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated_at = now
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """
+        Take tokens from the bucket, going into debt if necessary
+
+        Returns:
+            Seconds the caller must wait before sending its request
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """Block until the requested tokens are available"""
+        delay = self.reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+
+    def throttle(self, retry_after: float = None, max_retry_after: float = 300.0) -> None:
+        """
+        Back off after the server reported a rate limit
+
+        Args:
+            retry_after: Server supplied cool-down in seconds, if any
+            max_retry_after: Upper bound for the cool-down, so a bad header cannot stall every caller
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = max(self.min_rate, self.rate / 2)
+            # Hold every waiter back for the server's cool-down period
+            penalty = min(retry_after, max_retry_after) * self.rate if retry_after else 0.0
+            self._tokens = min(self._tokens, 0.0) - penalty
+
+    def recover(self) -> None:
+        """Creep back towards the configured rate after a success"""
+        if self.rate >= self.max_rate:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = min(self.max_rate, self.rate + self.recovery_step)
+
+
+_rate_limiters: Dict[str, TokenBucket] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(api_key: str, rate: float, capacity: float = None) -> TokenBucket:
+    """
+    Get the process-wide token bucket for an integration key
+
+    Pendo enforces limits per integration key, so every client built with the
+    same key shares one bucket. The first caller's rate and capacity win;
+    a later caller asking for a different rate is warned.
+    """
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(api_key)
+        if limiter is None:
+            limiter = TokenBucket(rate, capacity)
+            _rate_limiters[api_key] = limiter
+        elif float(rate) != limiter.max_rate:
+            logging.getLogger(__name__).warning(
+                f"Rate limiter for this key already runs at {limiter.max_rate:g} requests/s; "
+                f"ignoring requested {rate:g} requests/s"
+            )
+        return limiter
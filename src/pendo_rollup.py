@@ -0,0 +1,317 @@
+"""
+Pendo.io Daily Rollups
+Incrementally maintained entity x day counters and distinct-count sketches
+"""
+
+import time
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from pendo_frame import ENTITY_TYPES, MISSING, EventFrame
+from pendo_sketch import DAY_MS, DEFAULT_PRECISION, HyperLogLog, daily_sketches
+from pendo_store import EntityStore
+
+HOUR_MS = 60 * 60 * 1000
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS rollup_daily (
+      entity_id TEXT NOT NULL,
+      day TEXT NOT NULL,
+      entity_type TEXT,
+      events INTEGER NOT NULL,
+      hourly BLOB NOT NULL,
+      visitors BLOB NOT NULL,
+      accounts BLOB NOT NULL,
+      updated_at REAL NOT NULL,
+      PRIMARY KEY (entity_id, day)
+    )
+    """,
+    'CREATE INDEX IF NOT EXISTS rollup_daily_day ON rollup_daily (day)',
+    """
+    CREATE TABLE IF NOT EXISTS rollup_batches (
+      batch_id TEXT PRIMARY KEY,
+      events INTEGER NOT NULL,
+      ingested_at REAL NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS rollup_events (
+      event_id TEXT PRIMARY KEY,
+      ingested_at REAL NOT NULL
+    )
+    """
+)
+
+
+class DailyRollup:
+    """Counters for one entity on one UTC day"""
+
+    __slots__ = ('entity_id', 'day', 'entity_type', 'events', 'hourly', 'visitors', 'accounts')
+
+    def __init__(self, entity_id: str, day: str, entity_type: Optional[str], events: int,
+                 hourly: np.ndarray, visitors: HyperLogLog, accounts: HyperLogLog):
+        self.entity_id = entity_id
+        self.day = day
+        self.entity_type = entity_type
+        self.events = events
+        self.hourly = hourly
+        self.visitors = visitors
+        self.accounts = accounts
+
+    def merge(self, other: 'DailyRollup') -> 'DailyRollup':
+        """Add another rollup of the same entity and day into this one"""
+        self.events += other.events
+        self.hourly = self.hourly + other.hourly
+        self.visitors.merge(other.visitors)
+        self.accounts.merge(other.accounts)
+        self.entity_type = self.entity_type or other.entity_type
+        return self
+
+
+class RollupStore:
+    """
+    Entity x day rollups kept in the shared SQLite entity store
+
+    Each row holds the day's event count, its 24 UTC hourly counts and
+    HyperLogLog sketches of distinct visitors and accounts. Ingesting a
+    batch of events only touches the (entity, day) rows it contains and
+    merges into them, so events may arrive in any order and late events
+    for old days are simply added. Batches ingested with a batch_id, and
+    events ingested with their ids through ingest_rows, are recorded and
+    never applied twice.
+
+    Range queries read one row per entity per day instead of raw events.
+    """
+
+    def __init__(self, store: EntityStore = None, precision: int = DEFAULT_PRECISION):
+        """
+        Args:
+            store: Entity store whose database holds the rollup tables (default store if omitted)
+            precision: HyperLogLog precision for new sketches
+        """
+        self.store = store or EntityStore()
+        self.precision = precision
+        with self.store.transaction() as conn:
+            for statement in _SCHEMA:
+                conn.execute(statement)
+
+    # Ingestion
+    def ingest(self, frame: EventFrame, batch_id: str = None) -> int:
+        """
+        Merge a frame of events into the rollups
+
+        Args:
+            frame: New events, in any order and for any days
+            batch_id: Identifier of this batch; a batch already ingested is skipped
+
+        Returns:
+            Number of (entity, day) rows updated
+        """
+        if batch_id is not None and self._has_batch(batch_id):
+            return 0
+
+        updates = self._build_rollups(frame)
+        with self.store.transaction() as conn:
+            # Re-check inside the write lock so concurrent writers cannot double-apply
+            if batch_id is not None:
+                if conn.execute('SELECT 1 FROM rollup_batches WHERE batch_id = ?', (batch_id,)).fetchone():
+                    return 0
+                conn.execute('INSERT INTO rollup_batches (batch_id, events, ingested_at) VALUES (?, ?, ?)',
+                             (batch_id, int(frame.count.sum()), time.time()))
+            self._apply(conn, updates)
+        return len(updates)
+
+    def ingest_rows(self, rows: Iterable[Dict[str, Any]], event_ids: Iterable[str],
+                    event_type: str = None) -> int:
+        """
+        Merge raw event rows into the rollups, skipping events already ingested
+
+        Unlike batch ids, event ids do not depend on how events were batched,
+        so re-reading a window (an overlap, or a shard retried after a crash
+        with late events in it) never counts an event twice.
+
+        Args:
+            rows: Aggregation event rows
+            event_ids: Stable id of each row, in the same order
+            event_type: Event type for rows without a 'type' field
+
+        Returns:
+            Number of (entity, day) rows updated
+        """
+        now = time.time()
+        with self.store.transaction() as conn:
+            new_rows = [row for row, event_id in zip(rows, event_ids) if conn.execute(
+                'INSERT OR IGNORE INTO rollup_events (event_id, ingested_at) VALUES (?, ?)', (event_id, now)
+            ).rowcount]
+            if not new_rows:
+                return 0
+            updates = self._build_rollups(EventFrame.from_rows(new_rows, event_type=event_type))
+            self._apply(conn, updates)
+        return len(updates)
+
+    def _apply(self, conn: Any, updates: List[DailyRollup]) -> None:
+        """Merge rollups into their stored rows inside an open store transaction"""
+        for rollup in updates:
+            row = conn.execute(
+                'SELECT entity_type, events, hourly, visitors, accounts FROM rollup_daily '
+                'WHERE entity_id = ? AND day = ?', (rollup.entity_id, rollup.day)
+            ).fetchone()
+            if row is not None:
+                rollup = self._decode(rollup.entity_id, rollup.day, row).merge(rollup)
+            conn.execute(
+                'INSERT OR REPLACE INTO rollup_daily '
+                '(entity_id, day, entity_type, events, hourly, visitors, accounts, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (rollup.entity_id, rollup.day, rollup.entity_type, rollup.events,
+                 rollup.hourly.astype('<i8').tobytes(), rollup.visitors.to_bytes(),
+                 rollup.accounts.to_bytes(), time.time())
+            )
+
+    def prune(self, before: float) -> int:
+        """
+        Forget ids of events ingested before an instant, once no sync can re-read them
+
+        Args:
+            before: Epoch seconds; ids ingested earlier are dropped
+
+        Returns:
+            Number of event ids dropped
+        """
+        with self.store.transaction() as conn:
+            return conn.execute('DELETE FROM rollup_events WHERE ingested_at < ?', (before,)).rowcount
+
+    def _has_batch(self, batch_id: str) -> bool:
+        row = self.store.execute('SELECT 1 FROM rollup_batches WHERE batch_id = ?', (batch_id,)).fetchone()
+        return row is not None
+
+    def _build_rollups(self, frame: EventFrame) -> List[DailyRollup]:
+        """Per (entity, day) rollups of a frame, computed with array operations"""
+        has_entity = frame.entity != MISSING
+        if not has_entity.any():
+            return []
+
+        entity = frame.entity[has_entity].astype(np.int64)
+        timestamp = frame.timestamp[has_entity]
+        days = timestamp // DAY_MS
+        first_day = int(days.min())
+        day_count = int(days.max()) - first_day + 1
+        hours = (timestamp % DAY_MS) // HOUR_MS
+
+        counts = frame.count[has_entity]
+        groups = entity * day_count + (days - first_day)
+        unique_groups = _sorted_unique(groups)
+        # 24 hourly counts for every (entity, day) group in one bincount
+        position = np.searchsorted(unique_groups, groups)
+        hourly = np.bincount(position * 24 + hours, weights=counts,
+                             minlength=len(unique_groups) * 24).reshape(-1, 24).astype(np.int64)
+
+        entity_types = np.full(len(frame.entity_ids), MISSING, dtype=np.int8)
+        entity_types[entity] = frame.entity_type[has_entity]
+
+        visitors = daily_sketches(frame, 'visitor', self.precision)
+        accounts = daily_sketches(frame, 'account', self.precision)
+
+        rollups = []
+        for group, group_hourly in zip(unique_groups.tolist(), hourly):
+            code, day_offset = divmod(group, day_count)
+            entity_id = frame.entity_ids[code]
+            day = _day_string(first_day + day_offset)
+            entity_type = int(entity_types[code])
+            rollups.append(DailyRollup(
+                entity_id, day, ENTITY_TYPES[entity_type] if entity_type != MISSING else None,
+                int(group_hourly.sum()), group_hourly,
+                visitors.get((entity_id, day)) or HyperLogLog(self.precision),
+                accounts.get((entity_id, day)) or HyperLogLog(self.precision)
+            ))
+        return rollups
+
+    def _decode(self, entity_id: str, day: str, row: Tuple) -> DailyRollup:
+        entity_type, events, hourly, visitors, accounts = row
+        return DailyRollup(entity_id, day, entity_type, events,
+                           np.frombuffer(hourly, dtype='<i8').astype(np.int64),
+                           HyperLogLog.from_bytes(visitors), HyperLogLog.from_bytes(accounts))
+
+    # Queries
+    def daily(self, start_day: str, end_day: str, entity_ids: Iterable[str] = None,
+              entity_type: str = None) -> Iterable[DailyRollup]:
+        """
+        Rollup rows for days start_day..end_day (inclusive, 'YYYY-MM-DD')
+
+        Args:
+            start_day: First day
+            end_day: Last day
+            entity_ids: Restrict to these entities
+            entity_type: Restrict to 'guide', 'feature' or 'page'
+        """
+        where, parameters = _range_filter(start_day, end_day, entity_ids, entity_type)
+        sql = ('SELECT entity_id, day, entity_type, events, hourly, visitors, accounts FROM rollup_daily '
+               f'WHERE {where} ORDER BY entity_id, day')
+        for entity_id, day, *row in self.store.execute(sql, parameters):
+            yield self._decode(entity_id, day, row)
+
+    def totals(self, start_day: str, end_day: str, entity_ids: Iterable[str] = None,
+               entity_type: str = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Per-entity totals over a day range, answered from rollups
+
+        Returns:
+            Entity id to events, unique_visitors and unique_accounts
+        """
+        merged: Dict[str, DailyRollup] = {}
+        for rollup in self.daily(start_day, end_day, entity_ids, entity_type):
+            current = merged.get(rollup.entity_id)
+            merged[rollup.entity_id] = rollup if current is None else current.merge(rollup)
+
+        return {
+            entity_id: {
+                'entity_type': rollup.entity_type,
+                'events': rollup.events,
+                'unique_visitors': rollup.visitors.count(),
+                'unique_accounts': rollup.accounts.count()
+            }
+            for entity_id, rollup in merged.items()
+        }
+
+    def hourly_counts(self, start_day: str, end_day: str, entity_ids: Iterable[str] = None,
+                      entity_type: str = None) -> Dict[str, np.ndarray]:
+        """Day to its 24 UTC hourly event counts, summed over the selected entities"""
+        where, parameters = _range_filter(start_day, end_day, entity_ids, entity_type)
+        counts: Dict[str, np.ndarray] = {}
+        for day, hourly in self.store.execute(f'SELECT day, hourly FROM rollup_daily WHERE {where}', parameters):
+            values = np.frombuffer(hourly, dtype='<i8').astype(np.int64)
+            counts[day] = counts[day] + values if day in counts else values
+        return counts
+
+
+def _range_filter(start_day: str, end_day: str, entity_ids: Optional[Iterable[str]],
+                  entity_type: Optional[str]) -> Tuple[str, tuple]:
+    """WHERE clause and parameters selecting rollup rows"""
+    clauses = ['day >= ?', 'day <= ?']
+    parameters = [start_day, end_day]
+    if entity_type is not None:
+        clauses.append('entity_type = ?')
+        parameters.append(entity_type)
+    if entity_ids is not None:
+        entity_ids = list(entity_ids)
+        clauses.append(f"entity_id IN ({','.join('?' * len(entity_ids))})")
+        parameters.extend(entity_ids)
+    return ' AND '.join(clauses), tuple(parameters)
+
+
+def _day_string(day_number: int) -> str:
+    """'YYYY-MM-DD' of a day number counted from the Unix epoch"""
+    return date.fromordinal(_EPOCH_ORDINAL + day_number).isoformat()
+
+
+def _sorted_unique(values: np.ndarray) -> np.ndarray:
+    """np.unique for integer arrays via sort-and-compare (avoids the slow hash path)"""
+    ordered = np.sort(values)
+    first_of_run = np.empty(len(ordered), dtype=bool)
+    first_of_run[:1] = True
+    np.not_equal(ordered[1:], ordered[:-1], out=first_of_run[1:])
+    return ordered[first_of_run]
@@ -0,0 +1,205 @@
+"""
+Pendo.io Aggregation Export Sinks
+Constant-memory writers that persist streamed result rows as NDJSON, Parquet or Arrow IPC
+"""
+
+import os
+import json
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+# File extension -> sink format
+FORMAT_EXTENSIONS = {
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+    '.parquet': 'parquet',
+    '.arrow': 'ipc',
+    '.feather': 'ipc',
+    '.ipc': 'ipc'
+}
+
+
+class RowSink:
+    """
+    Base class for sinks that buffer rows into bounded row groups
+
+    Rows are held in memory only until a row group fills up, then written
+    and dropped, so exporting any number of rows needs memory for just one
+    row group. Use as a context manager or call close() to flush the tail.
+    """
+
+    format = None
+
+    def __init__(self, path: str, row_group_size: int = 10000):
+        """
+        Args:
+            path: Output file
+            row_group_size: Rows buffered before each write
+        """
+        if row_group_size <= 0:
+            raise ValueError("row_group_size must be positive")
+        self.path = path
+        self.row_group_size = row_group_size
+        self.rows = 0
+        self.row_groups = 0
+        self.bytes_written = 0
+        self.closed = False
+        self._buffer: List[Dict[str, Any]] = []
+        self._started = time.monotonic()
+        self._finished: Optional[float] = None
+
+    def write(self, row: Dict[str, Any]) -> None:
+        self._buffer.append(row)
+        if len(self._buffer) >= self.row_group_size:
+            self.flush()
+
+    def write_rows(self, rows: Iterable[Dict[str, Any]]) -> 'RowSink':
+        """Write every row of an iterable, typically a streamed aggregation"""
+        for row in rows:
+            self.write(row)
+        return self
+
+    def flush(self) -> None:
+        """Write buffered rows as one row group"""
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+        self._write_group(batch)
+        self.rows += len(batch)
+        self.row_groups += 1
+
+    def close(self) -> Dict[str, Any]:
+        """Flush remaining rows, close the file and return the stats"""
+        if not self.closed:
+            self.flush()
+            self._close()
+            self.closed = True
+            self._finished = time.monotonic()
+        return self.stats()
+
+    def stats(self) -> Dict[str, Any]:
+        """Rows, bytes and elapsed time of the export"""
+        elapsed = (self._finished or time.monotonic()) - self._started
+        return {
+            'path': self.path,
+            'format': self.format,
+            'rows': self.rows,
+            'row_groups': self.row_groups,
+            'bytes': self.bytes_written,
+            'elapsed_seconds': round(elapsed, 3),
+            'rows_per_second': round(self.rows / elapsed, 1) if elapsed > 0 else None
+        }
+
+    def _write_group(self, rows: List[Dict[str, Any]]) -> None:
+        raise NotImplementedError
+
+    def _close(self) -> None:
+        raise NotImplementedError
+
+    def __enter__(self) -> 'RowSink':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+class NDJSONSink(RowSink):
+    """One JSON object per line"""
+
+    format = 'ndjson'
+
+    def __init__(self, path: str, row_group_size: int = 10000):
+        super().__init__(path, row_group_size)
+        self._file = open(path, 'wb')
+
+    def _write_group(self, rows: List[Dict[str, Any]]) -> None:
+        data = ''.join(json.dumps(row, separators=(',', ':')) + '\n' for row in rows).encode('utf-8')
+        self._file.write(data)
+        self.bytes_written += len(data)
+
+    def _close(self) -> None:
+        self._file.close()
+
+
+class ArrowSink(RowSink):
+    """
+    Columnar Parquet or Arrow IPC file written one row group at a time
+
+    Requires pyarrow. The schema is inferred from the first row group;
+    later groups are cast to it, and fields that first appear after the
+    first group are dropped.
+    """
+
+    def __init__(self, path: str, format: str = 'parquet', row_group_size: int = 50000,
+                 schema: Any = None, compression: str = 'zstd'):
+        """
+        Args:
+            path: Output file
+            format: 'parquet' or 'ipc'
+            row_group_size: Rows per Parquet row group / IPC record batch
+            schema: Explicit pyarrow schema (inferred from the first rows if omitted)
+            compression: Codec for column data
+        """
+        if format not in ('parquet', 'ipc'):
+            raise ValueError(f"Unsupported columnar format {format!r}")
+        try:
+            import pyarrow
+        except ImportError:
+            raise ImportError("pyarrow is required for Parquet and Arrow IPC exports: pip install pyarrow")
+
+        super().__init__(path, row_group_size)
+        self.format = format
+        self.schema = schema
+        self.compression = compression
+        self._pa = pyarrow
+        self._stream = pyarrow.OSFile(path, 'wb')
+        self._writer = None
+
+    def _open_writer(self) -> None:
+        if self.format == 'parquet':
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(self._stream, self.schema, compression=self.compression)
+        else:
+            options = self._pa.ipc.IpcWriteOptions(compression=self.compression)
+            self._writer = self._pa.ipc.new_file(self._stream, self.schema, options=options)
+
+    def _write_group(self, rows: List[Dict[str, Any]]) -> None:
+        table = self._pa.Table.from_pylist(rows, schema=self.schema)
+        if self._writer is None:
+            self.schema = table.schema
+            self._open_writer()
+        if self.format == 'parquet':
+            self._writer.write_table(table, row_group_size=len(rows))
+        else:
+            self._writer.write_table(table, max_chunksize=len(rows))
+        self.bytes_written = self._stream.tell()
+
+    def _close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self.bytes_written = self._stream.tell()
+        self._stream.close()
+
+
+def open_sink(path: str, format: str = None, row_group_size: int = None, **options) -> RowSink:
+    """
+    Create a sink for a path, inferring the format from its extension
+
+    Args:
+        path: Output file (.ndjson/.jsonl, .parquet, or .arrow/.feather/.ipc)
+        format: 'ndjson', 'parquet' or 'ipc' to override the extension
+        row_group_size: Rows per row group (sink default if omitted)
+        **options: Extra ArrowSink options (schema, compression)
+
+    Returns:
+        Open sink
+    """
+    if format is None:
+        format = FORMAT_EXTENSIONS.get(os.path.splitext(path)[1].lower())
+        if format is None:
+            raise ValueError(f"Cannot infer export format from {path!r}; pass format=")
+
+    sizing = {} if row_group_size is None else {'row_group_size': row_group_size}
+    if format == 'ndjson':
+        return NDJSONSink(path, **sizing)
+    return ArrowSink(path, format=format, **sizing, **options)
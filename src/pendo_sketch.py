@@ -0,0 +1,325 @@
+"""
+Pendo.io Distinct-Count Sketches
+Mergeable, serializable HyperLogLog counters for unique visitors and accounts
+"""
+
+import zlib
+import struct
+import hashlib
+from datetime import date
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from pendo_frame import MISSING, EventFrame
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+DEFAULT_PRECISION = 12
+
+_FORMAT_VERSION = 1
+_SPARSE, _DENSE = 0, 1
+_HEADER = struct.Struct('<BBBI')
+
+
+def hash_values(values: Iterable[Any]) -> np.ndarray:
+    """
+    Stable 64-bit hashes of values (their str form), identical across processes
+
+    Args:
+        values: Ids to hash
+
+    Returns:
+        uint64 array with one hash per value
+    """
+    digests = b''.join(hashlib.blake2b(str(value).encode(), digest_size=8).digest() for value in values)
+    return np.frombuffer(digests, dtype='<u8').astype(np.uint64)
+
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    """Exact bit length of each uint64 (0 for 0), by binary search on shifts"""
+    remaining = values.copy()
+    length = np.zeros(len(values), dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        wide = remaining >= np.uint64(1 << shift)
+        length[wide] += shift
+        remaining[wide] >>= np.uint64(shift)
+    length += (remaining > 0).astype(np.uint8)
+    return length
+
+
+def _register_updates(hashes: np.ndarray, precision: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Register index and rank (position of the first 1-bit) for each hash"""
+    index = (hashes >> np.uint64(64 - precision)).astype(np.uint32)
+    tail_bits = 64 - precision
+    tail = hashes & np.uint64((1 << tail_bits) - 1)
+    rank = (tail_bits + 1 - _bit_length(tail).astype(np.int16)).astype(np.uint8)
+    return index, rank
+
+
+def _max_by_index(index: np.ndarray, rank: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Sorted unique register indexes with the largest rank seen for each"""
+    if len(index) == 0:
+        return index.astype(np.uint32), rank.astype(np.uint8)
+    order = np.lexsort((rank, index))
+    index, rank = index[order], rank[order]
+    last_of_run = np.empty(len(index), dtype=bool)
+    last_of_run[-1] = True
+    np.not_equal(index[1:], index[:-1], out=last_of_run[:-1])
+    return index[last_of_run], rank[last_of_run]
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct counter
+
+    With m = 2**precision registers the relative standard error is
+    1.04 / sqrt(m): about 1.6% at the default precision of 12 (4 KiB dense).
+    Small sketches are kept sparse, as (register, rank) pairs, and switch to
+    dense registers once that stops saving space, so a per-entity, per-day
+    sketch with a handful of visitors costs bytes rather than kilobytes.
+
+    Sketches with the same precision merge losslessly (register-wise max),
+    so day sketches combine into week, month or cross-shard counts without
+    rereading events, and merging is idempotent and order independent.
+    """
+
+    def __init__(self, precision: int = DEFAULT_PRECISION):
+        """
+        Args:
+            precision: log2 of the register count, 4 to 16
+        """
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        self.precision = precision
+        self.m = 1 << precision
+        self._dense = None
+        self._index = np.empty(0, dtype=np.uint32)
+        self._rank = np.empty(0, dtype=np.uint8)
+
+    @property
+    def error_bound(self) -> float:
+        """Relative standard error of count()"""
+        return 1.04 / (self.m ** 0.5)
+
+    @property
+    def is_sparse(self) -> bool:
+        return self._dense is None
+
+    # Updates
+    def add(self, value: Any) -> None:
+        self.add_hashes(hash_values([value]))
+
+    def update(self, values: Iterable[Any]) -> 'HyperLogLog':
+        self.add_hashes(hash_values(values))
+        return self
+
+    def add_hashes(self, hashes: np.ndarray) -> None:
+        """Add pre-computed hash_values() hashes"""
+        self._apply(*_register_updates(hashes, self.precision))
+
+    def _apply(self, index: np.ndarray, rank: np.ndarray) -> None:
+        if self._dense is not None:
+            np.maximum.at(self._dense, index, rank)
+            return
+        self._index, self._rank = _max_by_index(np.concatenate([self._index, index]),
+                                                np.concatenate([self._rank, rank]))
+        # A sparse entry costs 3 bytes against 1 byte per dense register
+        if len(self._index) * 3 > self.m:
+            self._densify()
+
+    def _densify(self) -> None:
+        self._dense = np.zeros(self.m, dtype=np.uint8)
+        self._dense[self._index] = self._rank
+        self._index = self._rank = None
+
+    def merge(self, other: 'HyperLogLog') -> 'HyperLogLog':
+        """Fold another sketch into this one (in place) and return self"""
+        if other.precision != self.precision:
+            raise ValueError(f"Cannot merge precision {other.precision} into {self.precision}")
+        if other._dense is not None:
+            if self._dense is None:
+                self._densify()
+            np.maximum(self._dense, other._dense, out=self._dense)
+        else:
+            self._apply(other._index, other._rank)
+        return self
+
+    @classmethod
+    def union(cls, sketches: Iterable['HyperLogLog'], precision: int = DEFAULT_PRECISION) -> 'HyperLogLog':
+        """New sketch counting the union of the given sketches"""
+        sketches = list(sketches)
+        result = cls(sketches[0].precision if sketches else precision)
+        for sketch in sketches:
+            result.merge(sketch)
+        return result
+
+    def copy(self) -> 'HyperLogLog':
+        return HyperLogLog(self.precision).merge(self)
+
+    # Estimation
+    def count(self) -> int:
+        """Estimated number of distinct values added"""
+        # Ertl's improved estimator: unbiased from zero to huge cardinalities
+        # without empirical bias tables or a linear-counting switch
+        q = 64 - self.precision
+        if self._dense is not None:
+            histogram = np.bincount(self._dense, minlength=q + 2)
+        else:
+            histogram = np.bincount(self._rank, minlength=q + 2)
+            histogram[0] += self.m - len(self._index)
+
+        m = self.m
+        if histogram[0] == m:
+            return 0
+        z = m * _tau(1 - histogram[q + 1] / m)
+        for k in range(q, 0, -1):
+            z = 0.5 * (z + histogram[k])
+        z += m * _sigma(histogram[0] / m)
+        return int(round(m * m / (2 * np.log(2)) / z))
+
+    # Serialization
+    def to_bytes(self) -> bytes:
+        """Compact, versioned binary form (zlib-compressed registers)"""
+        if self._dense is not None:
+            header = _HEADER.pack(_FORMAT_VERSION, self.precision, _DENSE, self.m)
+            payload = self._dense.tobytes()
+        else:
+            header = _HEADER.pack(_FORMAT_VERSION, self.precision, _SPARSE, len(self._index))
+            payload = self._index.astype('<u2').tobytes() + self._rank.tobytes()
+        return header + zlib.compress(payload)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'HyperLogLog':
+        version, precision, mode, size = _HEADER.unpack_from(data)
+        if version != _FORMAT_VERSION:
+            raise ValueError(f"Unsupported sketch format version {version}")
+        payload = zlib.decompress(data[_HEADER.size:])
+        sketch = cls(precision)
+        if mode == _DENSE:
+            sketch._dense = np.frombuffer(payload, dtype=np.uint8).copy()
+            sketch._index = sketch._rank = None
+        else:
+            sketch._index = np.frombuffer(payload[:2 * size], dtype='<u2').astype(np.uint32)
+            sketch._rank = np.frombuffer(payload[2 * size:], dtype=np.uint8).copy()
+        return sketch
+
+    @classmethod
+    def _from_registers(cls, precision: int, index: np.ndarray, rank: np.ndarray) -> 'HyperLogLog':
+        """Sketch from sorted unique register indexes and their ranks"""
+        sketch = cls(precision)
+        sketch._index, sketch._rank = index.astype(np.uint32), rank.astype(np.uint8)
+        if len(index) * 3 > sketch.m:
+            sketch._densify()
+        return sketch
+
+
+def _sigma(x: float) -> float:
+    if x == 1:
+        return float('inf')
+    y, z = 1.0, x
+    while True:
+        x *= x
+        previous = z
+        z += x * y
+        y += y
+        if z == previous:
+            return z
+
+
+def _tau(x: float) -> float:
+    if x == 0 or x == 1:
+        return 0.0
+    y, z = 1.0, 1 - x
+    while True:
+        x = x ** 0.5
+        previous = z
+        y *= 0.5
+        z -= (1 - x) ** 2 * y
+        if z == previous:
+            return z / 3
+
+
+def daily_sketches(frame: EventFrame, column: str = 'visitor',
+                   precision: int = DEFAULT_PRECISION) -> Dict[Tuple[str, str], HyperLogLog]:
+    """
+    One sketch per entity per UTC day, built in a single vectorized pass
+
+    Args:
+        frame: Events to sketch
+        column: 'visitor' or 'account'
+        precision: Sketch precision
+
+    Returns:
+        (entity id, 'YYYY-MM-DD') to the sketch of distinct values that day
+    """
+    codes = getattr(frame, column)
+    dictionary = frame.visitor_ids if column == 'visitor' else frame.account_ids
+    present = (codes != MISSING) & (frame.entity != MISSING)
+    if not present.any():
+        return {}
+
+    # Hash each distinct id once, then index by code
+    hashes = hash_values(dictionary)[codes[present]]
+    index, rank = _register_updates(hashes, precision)
+    days = frame.timestamp[present] // DAY_MS
+    first_day = int(days.min())
+    day_count = int(days.max()) - first_day + 1
+    groups = frame.entity[present].astype(np.int64) * day_count + (days - first_day)
+
+    keys, ranks = _max_by_index(groups * (1 << precision) + index, rank)
+    key_groups = keys >> precision
+    boundaries = np.flatnonzero(np.diff(key_groups)) + 1
+    starts = np.concatenate([[0], boundaries])
+    ends = np.concatenate([boundaries, [len(keys)]])
+
+    sketches = {}
+    for start, end in zip(starts, ends):
+        group = int(key_groups[start])
+        entity_id = frame.entity_ids[group // day_count]
+        day = date.fromordinal(date(1970, 1, 1).toordinal() + first_day + group % day_count).isoformat()
+        register_index = keys[start:end] & ((1 << precision) - 1)
+        sketches[(entity_id, day)] = HyperLogLog._from_registers(precision, register_index, ranks[start:end])
+    return sketches
+
+
+class SketchRangeIndex:
+    """
+    Constant-time distinct counts over any range of consecutive days
+
+    Because sketch union is idempotent, a sparse table of unions over
+    power-of-two spans answers any [first, last] range with the union of two
+    overlapping spans, regardless of the range length. Building the index
+    costs O(days * log(days)) merges.
+    """
+
+    def __init__(self, sketches: Sequence[HyperLogLog]):
+        """
+        Args:
+            sketches: One sketch per consecutive day (use empty sketches for gaps)
+        """
+        if not sketches:
+            raise ValueError("SketchRangeIndex needs at least one day")
+        self.levels: List[List[HyperLogLog]] = [list(sketches)]
+        span = 1
+        while span * 2 <= len(sketches):
+            previous = self.levels[-1]
+            self.levels.append([
+                previous[start].copy().merge(previous[start + span])
+                for start in range(len(sketches) - span * 2 + 1)
+            ])
+            span *= 2
+
+    def __len__(self) -> int:
+        return len(self.levels[0])
+
+    def union(self, first: int, last: int) -> HyperLogLog:
+        """Sketch of days first..last (inclusive, zero-based positions)"""
+        if not 0 <= first <= last < len(self):
+            raise IndexError(f"Day range {first}..{last} outside 0..{len(self) - 1}")
+        level = (last - first + 1).bit_length() - 1
+        span = 1 << level
+        return self.levels[level][first].copy().merge(self.levels[level][last - span + 1])
+
+    def count(self, first: int, last: int) -> int:
+        return self.union(first, last).count()
@@ -0,0 +1,161 @@
+"""
+Pendo.io Persistent Entity Store
+Single-file SQLite cache shared by every process on the host
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Callable, Dict, Optional, Any
+
+DEFAULT_STORE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'pendo', 'pendo_store.sqlite3')
+
+# Seconds before a namespace's entries expire; None keeps them until replaced
+DEFAULT_NAMESPACE_TTLS = {
+    'listing': 900,
+    'aggregation': 900
+}
+
+# Sentinel meaning "use the namespace's default TTL"
+_NAMESPACE_TTL = object()
+
+# Sentinel telling a miss apart from a stored JSON null
+_MISSING = object()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+  namespace TEXT NOT NULL,
+  key TEXT NOT NULL,
+  value TEXT NOT NULL,
+  stored_at REAL NOT NULL,
+  expires_at REAL,
+  PRIMARY KEY (namespace, key)
+)
+"""
+
+
+class EntityStore:
+    """
+    Persistent key/value cache for API listings and aggregation results
+
+    Backed by one SQLite database in WAL mode, so any number of readers can
+    run concurrently with a writer, and every write is an atomic transaction.
+    Cron jobs, CLI tools and notebooks pointed at the same path share one
+    warm copy of the data. Connections are opened per thread and per process.
+    """
+
+    def __init__(self, path: str = None, ttls: Dict[str, Optional[float]] = None,
+                 busy_timeout: float = 30.0):
+        """
+        Args:
+            path: Database file (defaults to PENDO_STORE_PATH or ~/.cache/pendo/pendo_store.sqlite3)
+            ttls: Namespace to default TTL in seconds
+            busy_timeout: Seconds to wait for another process's write lock
+        """
+        self.path = path or os.getenv('PENDO_STORE_PATH', DEFAULT_STORE_PATH)
+        self.ttls = dict(DEFAULT_NAMESPACE_TTLS if ttls is None else ttls)
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with self._write() as conn:
+            conn.execute(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Connection owned by the current thread of the current process"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _write(self) -> '_WriteTransaction':
+        return _WriteTransaction(self._connection())
+
+    def execute(self, sql: str, parameters: tuple = ()) -> sqlite3.Cursor:
+        """Run a read statement on this thread's connection (for tables layered on the store)"""
+        return self._connection().execute(sql, parameters)
+
+    def transaction(self) -> '_WriteTransaction':
+        """Atomic write transaction on this thread's connection, as a context manager"""
+        return self._write()
+
+    def get(self, namespace: str, key: str, default: Any = None) -> Optional[Any]:
+        """Return a live entry, or default if it is missing or expired"""
+        row = self._connection().execute(
+            'SELECT value FROM entries WHERE namespace = ? AND key = ? '
+            'AND (expires_at IS NULL OR expires_at > ?)',
+            (namespace, key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def put(self, namespace: str, key: str, value: Any, ttl: Optional[float] = _NAMESPACE_TTL,
+            conn: sqlite3.Connection = None) -> None:
+        """
+        Store a JSON-serializable value
+
+        Args:
+            namespace: Entry group (e.g. 'listing', 'aggregation')
+            key: Entry key within the namespace
+            value: Data to store
+            ttl: Seconds until expiry; defaults to the namespace TTL, None never expires
+            conn: Connection of an open transaction() to write in, instead of a transaction of its own
+        """
+        if ttl is _NAMESPACE_TTL:
+            ttl = self.ttls.get(namespace)
+        now = time.time()
+        payload = json.dumps(value, separators=(',', ':'))
+        sql = ('INSERT OR REPLACE INTO entries (namespace, key, value, stored_at, expires_at) '
+               'VALUES (?, ?, ?, ?, ?)')
+        parameters = (namespace, key, payload, now, now + ttl if ttl is not None else None)
+        if conn is not None:
+            conn.execute(sql, parameters)
+            return
+        with self._write() as conn:
+            conn.execute(sql, parameters)
+
+    def get_or_fetch(self, namespace: str, key: str, fetch: Callable[[], Any],
+                     ttl: Optional[float] = _NAMESPACE_TTL) -> Any:
+        """Return the stored value, calling fetch() and storing its result on a miss"""
+        value = self.get(namespace, key, _MISSING)
+        if value is _MISSING:
+            value = fetch()
+            self.put(namespace, key, value, ttl)
+        return value
+
+    def delete(self, namespace: str, key: str = None) -> None:
+        """Delete one entry, or a whole namespace when no key is given"""
+        with self._write() as conn:
+            if key is None:
+                conn.execute('DELETE FROM entries WHERE namespace = ?', (namespace,))
+            else:
+                conn.execute('DELETE FROM entries WHERE namespace = ? AND key = ?', (namespace, key))
+
+    def purge_expired(self) -> int:
+        """Remove expired entries and return how many were dropped"""
+        with self._write() as conn:
+            cursor = conn.execute(
+                'DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?',
+                (time.time(),)
+            )
+            return cursor.rowcount
+
+
+class _WriteTransaction:
+    """Run a `with` block as one atomic IMMEDIATE transaction"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
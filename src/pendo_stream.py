@@ -0,0 +1,147 @@
+"""
+Pendo.io Streaming JSON Decoder
+Incrementally parses large JSON array responses one element at a time
+"""
+
+import json
+import codecs
+from typing import Any, Iterable, Iterator, Union
+
+_WHITESPACE = ' \t\n\r'
+_NUMBER_CHARS = '0123456789+-.eE'
+_COMPACT_THRESHOLD = 1 << 16
+
+
+class _JSONStreamReader:
+    """
+    Character buffer over a stream of byte chunks
+
+    Consumed text is dropped as parsing advances, so the buffer only ever
+    holds the element currently being decoded plus one unread chunk.
+    """
+
+    def __init__(self, chunks: Iterable[Union[bytes, str]], encoding: str = 'utf-8'):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self._json = json.JSONDecoder()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        """Append the next chunk to the buffer; returns False at end of stream"""
+        if self.eof:
+            return False
+
+        for chunk in self._chunks:
+            if not chunk:
+                continue
+            text = chunk if isinstance(chunk, str) else self._decoder.decode(chunk)
+            if text:
+                if self.pos > _COMPACT_THRESHOLD and self.pos * 2 > len(self.buf):
+                    self.buf = self.buf[self.pos:]
+                    self.pos = 0
+                self.buf += text
+                return True
+
+        self.buf += self._decoder.decode(b'', final=True)
+        self.eof = True
+        return False
+
+    def _fill_until(self, size: int) -> None:
+        """Grow the unread part of the buffer to at least `size` characters"""
+        while len(self.buf) - self.pos < size and self._fill():
+            pass
+
+    def skip_whitespace(self) -> None:
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf) or not self._fill():
+                return
+
+    def next_char(self) -> str:
+        self.skip_whitespace()
+        if self.pos >= len(self.buf):
+            raise ValueError("Unexpected end of JSON stream")
+        char = self.buf[self.pos]
+        self.pos += 1
+        return char
+
+    def expect(self, expected: str) -> None:
+        char = self.next_char()
+        if char != expected:
+            raise ValueError(f"Expected {expected!r} at offset {self.pos - 1}, found {char!r}")
+
+    def read_value(self) -> Any:
+        """Decode one complete JSON value starting at the current position"""
+        self.skip_whitespace()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                # Double the window before retrying so large values decode in linear time
+                self._fill_until(2 * (len(self.buf) - self.pos) or 1)
+                continue
+
+            # A number is only complete once a character that cannot continue it follows:
+            # raw_decode accepts the prefix of '3.14' or '1e5' split after '3.' or '1e'
+            if (not self.eof and isinstance(value, (int, float)) and not isinstance(value, bool)
+                    and (end == len(self.buf) or self.buf[end] in _NUMBER_CHARS)):
+                self._fill_until(len(self.buf) - self.pos + 1)
+                continue
+
+            self.pos = end
+            return value
+
+    def seek_key(self, key: str) -> None:
+        """Position the reader on the value of a top-level object key"""
+        self.expect('{')
+        if self.peek() == '}':
+            raise KeyError(key)
+
+        while True:
+            name = self.read_value()
+            self.expect(':')
+            if name == key:
+                return
+            self.read_value()
+            if self.next_char() == '}':
+                raise KeyError(key)
+
+    def peek(self) -> str:
+        self.skip_whitespace()
+        return self.buf[self.pos] if self.pos < len(self.buf) else ''
+
+
+def iter_json_array(chunks: Iterable[Union[bytes, str]], key: str = None,
+                    encoding: str = 'utf-8') -> Iterator[Any]:
+    """
+    Yield the elements of a JSON array as they arrive
+
+    Args:
+        chunks: Raw response body chunks (e.g. response.iter_content())
+        key: Top-level object key holding the array, or None if the body is the array itself.
+            Values of keys preceding it are decoded and discarded.
+        encoding: Text encoding of the body
+
+    Yields:
+        Decoded array elements, one at a time
+    """
+    reader = _JSONStreamReader(chunks, encoding)
+    if key is not None:
+        reader.seek_key(key)
+
+    reader.expect('[')
+    if reader.peek() == ']':
+        return
+
+    while True:
+        yield reader.read_value()
+        char = reader.next_char()
+        if char == ']':
+            return
+        if char != ',':
+            raise ValueError(f"Expected ',' or ']' at offset {reader.pos - 1}, found {char!r}")
@@ -0,0 +1,710 @@
+"""
+Pendo.io Incremental Sync Engine
+High-water-mark sync of catalog entities and events into a pluggable writer
+"""
+
+import json
+import time
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from pendo_aggregation import AggregationPipeline, canonical_json
+from pendo_client_v2 import PendoAPIClientV2
+from pendo_store import EntityStore
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+EVENT_SOURCES = ('guideEvents', 'featureEvents', 'pageEvents')
+
+_CHECKPOINT_SCHEMA = (
+    # Same columns as sync_status in supabase-schema.sql, plus the scope and plan needed to resume
+    """
+    CREATE TABLE IF NOT EXISTS sync_status (
+      id INTEGER PRIMARY KEY AUTOINCREMENT,
+      scope TEXT NOT NULL,
+      entity_type TEXT NOT NULL,
+      last_sync_start REAL,
+      last_sync_end REAL,
+      status TEXT,
+      records_processed INTEGER DEFAULT 0,
+      error_message TEXT,
+      plan TEXT NOT NULL,
+      created_at REAL NOT NULL
+    )
+    """,
+    'CREATE INDEX IF NOT EXISTS sync_status_scope ON sync_status (scope, id)',
+    """
+    CREATE TABLE IF NOT EXISTS sync_checkpoints (
+      run_id INTEGER NOT NULL,
+      unit TEXT NOT NULL,
+      records INTEGER NOT NULL,
+      committed_at REAL NOT NULL,
+      PRIMARY KEY (run_id, unit)
+    )
+    """
+)
+
+_HASH_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entity_hashes (
+  scope TEXT NOT NULL,
+  entity_id TEXT NOT NULL,
+  hash TEXT NOT NULL,
+  updated_at REAL NOT NULL,
+  PRIMARY KEY (scope, entity_id)
+)
+"""
+
+# SQLite's default limit on bound parameters is 999
+_SQLITE_MAX_PARAMETERS = 900
+
+
+def _iso(milliseconds: Optional[int], default: Optional[str] = None) -> Optional[str]:
+    """ISO-8601 UTC time of an epoch-millisecond value"""
+    if not milliseconds:
+        return default
+    return datetime.fromtimestamp(milliseconds / 1000, tz=timezone.utc).isoformat()
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+# Row transforms (same columns as the sync-pendo-incremental edge function)
+def format_guide(guide: Dict[str, Any], synced_at: str) -> Dict[str, Any]:
+    steps = guide.get('steps') or []
+    return {
+        'id': guide['id'],
+        'name': guide.get('name') or 'Unnamed Guide',
+        'state': guide.get('state'),
+        'created_at': _iso(guide.get('createdAt'), synced_at),
+        'last_updated_at': _iso(guide.get('lastUpdatedAt'), synced_at),
+        'steps': len(steps),
+        'steps_data': steps,
+        'last_synced': synced_at
+    }
+
+
+def format_feature(feature: Dict[str, Any], synced_at: str) -> Dict[str, Any]:
+    return {
+        'id': feature['id'],
+        'name': feature.get('name') or 'Unnamed Feature',
+        'created_at': _iso(feature.get('createdAt'), synced_at),
+        'last_updated_at': _iso(feature.get('lastUpdatedAt'), synced_at),
+        'last_synced': synced_at
+    }
+
+
+def format_page(page: Dict[str, Any], synced_at: str) -> Dict[str, Any]:
+    return {
+        'id': page['id'],
+        'name': page.get('name') or 'Unnamed Page',
+        'url': page.get('url') or '',
+        'created_at': _iso(page.get('createdAt'), synced_at),
+        'last_updated_at': _iso(page.get('lastUpdatedAt'), synced_at),
+        'last_synced': synced_at
+    }
+
+
+def format_report(report: Dict[str, Any], synced_at: str) -> Dict[str, Any]:
+    return {
+        'id': report['id'],
+        'name': report.get('name') or 'Unnamed Report',
+        'description': report.get('description'),
+        'last_success_run_at': _iso(report.get('lastSuccessRunAt')),
+        'configuration': report.get('configuration') or {},
+        'created_at': _iso(report.get('createdAt'), synced_at),
+        'last_updated_at': _iso(_updated_at(report), synced_at),
+        'last_synced': synced_at
+    }
+
+
+def format_event(event: Dict[str, Any], source: str, synced_at: str) -> Dict[str, Any]:
+    """pendo_events row of an aggregation event row; the id is stable across runs"""
+    location = event.get('location') or {}
+    entity_id = event.get('guideId') or event.get('featureId') or event.get('pageId')
+    entity_type = ('guide' if event.get('guideId') else 'feature' if event.get('featureId')
+                   else 'page' if event.get('pageId') else None)
+    return {
+        'id': event.get('id') or _event_id(event, source, entity_type, entity_id),
+        'event_type': source,
+        'entity_id': entity_id,
+        'entity_type': entity_type,
+        'visitor_id': event.get('visitorId'),
+        'account_id': event.get('accountId'),
+        'browser_time': _iso(event.get('browserTime'), synced_at),
+        'remote_ip': event.get('remoteIp'),
+        'user_agent': event.get('userAgent'),
+        'country': location.get('country') or event.get('country'),
+        'region': location.get('region') or event.get('region'),
+        'city': location.get('city') or event.get('city'),
+        'metadata': {'url': event.get('url'), **(event.get('parameters') or {})},
+        'created_at': synced_at
+    }
+
+
+def _event_id(event: Dict[str, Any], source: str, entity_type: Optional[str], entity_id: Optional[str]) -> str:
+    """Stable id of an event row without one (a content hash when it has no time)"""
+    if event.get('browserTime') is None:
+        return f"{source}_{hashlib.sha256(canonical_json(event).encode()).hexdigest()}"
+    parts = (event.get('visitorId') or 'unknown', event['browserTime'], source, entity_type or '',
+             entity_id or '', event.get('type') or '')
+    return '_'.join(str(part) for part in parts)
+
+
+def _updated_at(item: Dict[str, Any]) -> int:
+    """Last modification time in epoch milliseconds (reports call it updatedAt)"""
+    return item.get('lastUpdatedAt') or item.get('updatedAt') or 0
+
+
+# Entity type -> (table, aggregation source that can filter on lastUpdatedAt or None, listing stream, row transform)
+ENTITY_SYNC = {
+    'guide': ('pendo_guides', 'guides', 'iter_guides', format_guide),
+    'feature': ('pendo_features', 'features', 'iter_features', format_feature),
+    'page': ('pendo_pages', 'pages', 'iter_pages', format_page),
+    'report': ('pendo_reports', None, 'iter_reports', format_report)
+}
+
+
+class SyncWriter:
+    """
+    Destination for synced rows
+
+    Writers must upsert on the table's primary key ('id'), so rewriting a
+    row that was already written (e.g. events in the overlap window) is
+    harmless.
+    """
+
+    def write(self, table: str, rows: List[Dict[str, Any]]) -> int:
+        """
+        Upsert rows into a table
+
+        Returns:
+            Number of rows written
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryWriter(SyncWriter):
+    """Keeps upserted rows in memory, keyed by table and id (dry runs and tooling)"""
+
+    def __init__(self):
+        self.tables: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    def write(self, table: str, rows: List[Dict[str, Any]]) -> int:
+        target = self.tables.setdefault(table, {})
+        for row in rows:
+            target[row['id']] = row
+        return len(rows)
+
+
+@dataclass
+class SyncRun:
+    """One sync of one entity type or event source, as recorded in sync_status"""
+    id: int
+    entity_type: str
+    plan: Dict[str, Any]
+    committed: Set[str] = field(default_factory=set)
+    records_processed: int = 0
+    resumed: bool = False
+
+    def summary(self) -> Dict[str, Any]:
+        return {'run_id': self.id, 'resumed': self.resumed, 'records_processed': self.records_processed,
+                'units_committed': len(self.committed)}
+
+
+class CheckpointStore:
+    """
+    Durable sync runs and their committed units, kept in the entity store
+
+    Every sync of an entity type or event source is a row in sync_status
+    ('running', 'completed' or 'failed'). Each unit of work it finishes (a
+    page of entities, a shard of events) is recorded in sync_checkpoints in
+    the same transaction as the high-water mark it advances. Starting a
+    scope whose latest run did not complete resumes that run, with its
+    original plan and the units it already committed.
+
+    Writers upsert, so a unit written but not yet checkpointed when a run
+    dies is rewritten harmlessly. Only one sync per scope should run at a time.
+    """
+
+    def __init__(self, store: EntityStore = None):
+        self.store = store or EntityStore()
+        with self.store.transaction() as conn:
+            for statement in _CHECKPOINT_SCHEMA:
+                conn.execute(statement)
+
+    def start(self, scope: str, entity_type: str, plan: Callable[[], Dict[str, Any]]) -> SyncRun:
+        """
+        Resume the scope's unfinished run, or begin a new one
+
+        Args:
+            scope: Key identifying what is synced (subscription and entity type)
+            entity_type: Name recorded in sync_status
+            plan: Builds the plan of a new run (e.g. its event window)
+
+        Returns:
+            The run, with its committed units when resumed
+        """
+        now = time.time()
+        with self.store.transaction() as conn:
+            row = conn.execute(
+                'SELECT id, status, records_processed, plan FROM sync_status WHERE scope = ? '
+                'ORDER BY id DESC LIMIT 1', (scope,)
+            ).fetchone()
+            if row is not None and row[1] != 'completed':
+                run_id, status, records, run_plan = row
+                conn.execute("UPDATE sync_status SET status = 'running', error_message = NULL WHERE id = ?",
+                             (run_id,))
+                units = {unit for unit, in conn.execute('SELECT unit FROM sync_checkpoints WHERE run_id = ?',
+                                                        (run_id,))}
+                return SyncRun(run_id, entity_type, json.loads(run_plan), units, records, resumed=True)
+
+            run_plan = plan()
+            cursor = conn.execute(
+                'INSERT INTO sync_status (scope, entity_type, last_sync_start, status, records_processed, '
+                "plan, created_at) VALUES (?, ?, ?, 'running', 0, ?, ?)",
+                (scope, entity_type, now, json.dumps(run_plan), now)
+            )
+            return SyncRun(cursor.lastrowid, entity_type, run_plan)
+
+    def commit(self, run: SyncRun, unit: str, records: int,
+               entries: Iterable[Tuple[str, str, Any]] = (),
+               apply: Callable[[Any], None] = None) -> None:
+        """
+        Record a finished unit, together with what it advances
+
+        Args:
+            run: Run the unit belongs to
+            unit: Unit identifier, unique within the run
+            records: Rows the unit wrote
+            entries: Store entries (namespace, key, value) to write in the same transaction
+            apply: Called with the transaction's connection for other tables to update
+        """
+        with self.store.transaction() as conn:
+            if apply is not None:
+                apply(conn)
+            conn.execute('INSERT OR REPLACE INTO sync_checkpoints (run_id, unit, records, committed_at) '
+                         'VALUES (?, ?, ?, ?)', (run.id, unit, records, time.time()))
+            conn.execute('UPDATE sync_status SET records_processed = records_processed + ? WHERE id = ?',
+                         (records, run.id))
+            for namespace, key, value in entries:
+                self.store.put(namespace, key, value, ttl=None, conn=conn)
+        run.committed.add(unit)
+        run.records_processed += records
+
+    def finish(self, run: SyncRun, error: str = None, entries: Iterable[Tuple[str, str, Any]] = ()) -> None:
+        """Mark a run completed, or failed with an error (a failed run is resumed next time)"""
+        with self.store.transaction() as conn:
+            conn.execute('UPDATE sync_status SET status = ?, last_sync_end = ?, error_message = ? WHERE id = ?',
+                         ('failed' if error else 'completed', time.time(), error, run.id))
+            for namespace, key, value in entries:
+                self.store.put(namespace, key, value, ttl=None, conn=conn)
+
+    def unfinished(self, scope: str) -> bool:
+        """True if the scope's latest run did not complete, so it will be resumed"""
+        row = self.store.execute('SELECT status FROM sync_status WHERE scope = ? ORDER BY id DESC LIMIT 1',
+                                 (scope,)).fetchone()
+        return row is not None and row[0] != 'completed'
+
+    def history(self, entity_type: str = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """Most recent runs, newest first, as sync_status rows"""
+        columns = ('id', 'entity_type', 'last_sync_start', 'last_sync_end', 'status',
+                   'records_processed', 'error_message')
+        where, parameters = ('WHERE entity_type = ?', (entity_type,)) if entity_type else ('', ())
+        cursor = self.store.execute(f"SELECT {', '.join(columns)} FROM sync_status {where} "
+                                    'ORDER BY id DESC LIMIT ?', parameters + (limit,))
+        return [dict(zip(columns, row)) for row in cursor]
+
+
+# Bookkeeping columns left out of content hashes: a lastUpdatedAt bump alone is not a change
+VOLATILE_COLUMNS = ('last_updated_at', 'last_synced')
+
+
+def content_hash(row: Dict[str, Any]) -> str:
+    """SHA-256 of a row's canonical JSON without volatile columns, identical across runs and processes"""
+    content = {name: value for name, value in row.items() if name not in VOLATILE_COLUMNS}
+    return hashlib.sha256(canonical_json(content).encode()).hexdigest()
+
+
+class ContentHashIndex:
+    """
+    Content hash of every entity row last written, per scope
+
+    Lets a sync skip rows whose content is identical to what the database
+    already holds, even when Pendo bumped lastUpdatedAt or the marks were
+    reset for a full resync.
+    """
+
+    def __init__(self, store: EntityStore = None):
+        self.store = store or EntityStore()
+        with self.store.transaction() as conn:
+            conn.execute(_HASH_SCHEMA)
+
+    def hashes(self, scope: str, entity_ids: Iterable[str]) -> Dict[str, str]:
+        """Stored hash of each given entity that has one"""
+        entity_ids = list(entity_ids)
+        found = {}
+        for start in range(0, len(entity_ids), _SQLITE_MAX_PARAMETERS):
+            chunk = entity_ids[start:start + _SQLITE_MAX_PARAMETERS]
+            found.update(self.store.execute(
+                f"SELECT entity_id, hash FROM entity_hashes WHERE scope = ? "
+                f"AND entity_id IN ({','.join('?' * len(chunk))})", (scope, *chunk)
+            ).fetchall())
+        return found
+
+    def record(self, conn: Any, scope: str, hashes: Dict[str, str]) -> None:
+        """Store hashes inside an open store transaction"""
+        now = time.time()
+        conn.executemany(
+            'INSERT OR REPLACE INTO entity_hashes (scope, entity_id, hash, updated_at) VALUES (?, ?, ?, ?)',
+            [(scope, entity_id, value, now) for entity_id, value in hashes.items()]
+        )
+
+    def forget(self, scope: str = None) -> None:
+        """Drop the hashes of one scope, or all of them, so every row is written again"""
+        with self.store.transaction() as conn:
+            if scope is None:
+                conn.execute('DELETE FROM entity_hashes')
+            else:
+                conn.execute('DELETE FROM entity_hashes WHERE scope = ?', (scope,))
+
+
+class SyncEngine:
+    """
+    Incremental sync driven by per-entity-type high-water marks
+
+    Guides, features and pages are fetched through an aggregation filtered
+    on lastUpdatedAt, so only entities modified since the last run leave
+    Pendo; reports, which have no aggregation source, are streamed and
+    filtered locally. Events are fetched from the end of the last completed
+    run's window onwards (minus a small overlap for late-arriving events)
+    and written in batches.
+
+    Marks are kept in the entity store and only advance after the writer
+    has accepted the rows. Work is committed in units (pages of entities,
+    day shards of events) recorded by a CheckpointStore, so a run that dies
+    halfway resumes after its last committed unit. Entity rows whose content
+    hash is unchanged are not rewritten. Per-run work therefore
+    scales with what changed, not with the size of the catalog or the
+    event history.
+    """
+
+    STATE_NAMESPACE = 'sync_state'
+
+    def __init__(self, client: PendoAPIClientV2, writer: SyncWriter, store: EntityStore = None,
+                 initial_event_days: int = 7, event_overlap_seconds: float = 3600,
+                 event_batch_size: int = 5000, page_size: int = 500, event_shard_days: int = 1,
+                 rollups: Any = None, checkpoints: CheckpointStore = None,
+                 hashes: ContentHashIndex = None, on_change: Callable[[str, List[str]], None] = None):
+        """
+        Args:
+            client: Pendo API client
+            writer: Destination for rows
+            store: Entity store holding the high-water marks (the client's store, else the default)
+            initial_event_days: Days of events fetched on the first run
+            event_overlap_seconds: Re-read this much before the event mark to catch late events
+            event_batch_size: Event rows per write
+            page_size: Entities per write and checkpoint
+            event_shard_days: Days of events per checkpointed shard
+            rollups: Optional RollupStore fed with every event read, each counted once
+            checkpoints: Run and checkpoint records (kept in the same store as the marks by default)
+            hashes: Content hashes of written entity rows (same store by default)
+            on_change: Called with (entity_type, ids) after each page of changed entities is
+                committed, e.g. to recompute analytics for just those entities
+        """
+        self.client = client
+        self.writer = writer
+        self.store = store or client.store or EntityStore()
+        self.initial_event_days = initial_event_days
+        self.event_overlap_ms = int(event_overlap_seconds * 1000)
+        self.event_batch_size = event_batch_size
+        self.page_size = page_size
+        self.event_shard_days = event_shard_days
+        self.rollups = rollups
+        self.checkpoints = checkpoints or CheckpointStore(self.store)
+        self.hashes = hashes or ContentHashIndex(self.store)
+        self.on_change = on_change
+        self.logger = logging.getLogger(__name__)
+
+    # High-water marks
+    def _state_key(self, name: str) -> str:
+        return self.client._store_key(name)
+
+    def get_state(self, name: str) -> Dict[str, Any]:
+        """Stored state of an entity type or event source (empty before the first run)"""
+        return self.store.get(self.STATE_NAMESPACE, self._state_key(name)) or {}
+
+    def _save_state(self, name: str, state: Dict[str, Any]) -> None:
+        self.store.put(self.STATE_NAMESPACE, self._state_key(name), state, ttl=None)
+
+    def reset(self, name: str = None, rewrite: bool = False) -> None:
+        """
+        Forget the mark of one entity type or source, or all of them, forcing a full resync
+
+        Args:
+            name: Entity type or event source (all when omitted)
+            rewrite: Also forget content hashes, so unchanged entities are written again
+                (e.g. after the destination tables were emptied)
+        """
+        names = [name] if name else list(ENTITY_SYNC) + list(EVENT_SOURCES)
+        for each in names:
+            self.store.delete(self.STATE_NAMESPACE, self._state_key(each))
+            if rewrite:
+                self.hashes.forget(self._state_key(each))
+
+    # Entities
+    def changed_entities(self, entity_type: str, state: Dict[str, Any] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Entities modified since the entity type's high-water mark
+
+        Entities updated in the same millisecond as the mark are re-read and
+        skipped if they were already written at that millisecond.
+        """
+        table, source, listing, transform = ENTITY_SYNC[entity_type]
+        state = self.get_state(entity_type) if state is None else state
+        mark = state.get('last_updated_at', 0)
+        ids_at_mark = set(state.get('ids_at_mark', ()))
+
+        if source is not None:
+            items = self.client.iter_aggregation(
+                AggregationPipeline(source).filter(f'lastUpdatedAt >= {mark}')
+            )
+        else:
+            items = getattr(self.client, listing)()
+
+        for item in items:
+            updated_at = _updated_at(item)
+            if updated_at > mark or (updated_at == mark and item['id'] not in ids_at_mark):
+                yield item
+
+    def sync_entities(self, entity_type: str) -> Dict[str, Any]:
+        """
+        Write the entities of one type that changed since the last run
+
+        Changed entities are written in pages ordered by (lastUpdatedAt, id)
+        and the mark advances with each committed page, so a run that dies
+        halfway resumes after the last page it committed. Entities whose row
+        content hash matches the last one written are skipped.
+
+        Returns:
+            Dict with written row count, the new high-water mark and the run
+        """
+        table, source, listing, transform = ENTITY_SYNC[entity_type]
+        state_key = self._state_key(entity_type)
+        run = self.checkpoints.start(state_key, entity_type, dict)
+        synced_at = datetime.now(timezone.utc).isoformat()
+
+        try:
+            state = self.get_state(entity_type)
+            mark = state.get('last_updated_at', 0)
+            ids_at_mark = set(state.get('ids_at_mark', ()))
+            changed = sorted(self.changed_entities(entity_type, state),
+                             key=lambda item: (_updated_at(item), item['id']))
+
+            written = unchanged = 0
+            for page in batched(changed, self.page_size):
+                # Hash rows built without the sync time, so identical content hashes identically
+                hashes = {item['id']: content_hash(transform(item, '')) for item in page}
+                known = self.hashes.hashes(state_key, hashes)
+                modified = [item for item in page if known.get(item['id']) != hashes[item['id']]]
+                unchanged += len(page) - len(modified)
+                if modified:
+                    written += self.writer.write(table, [transform(item, synced_at) for item in modified])
+
+                for item in page:
+                    updated_at = _updated_at(item)
+                    if updated_at > mark:
+                        mark, ids_at_mark = updated_at, {item['id']}
+                    else:
+                        ids_at_mark.add(item['id'])
+                state = {'last_updated_at': mark, 'ids_at_mark': sorted(ids_at_mark), 'last_run': synced_at}
+                modified_hashes = {item['id']: hashes[item['id']] for item in modified}
+                self.checkpoints.commit(
+                    run, f"{mark}:{page[-1]['id']}", len(modified),
+                    [(self.STATE_NAMESPACE, state_key, state)],
+                    apply=lambda conn: self.hashes.record(conn, state_key, modified_hashes)
+                )
+                if modified and self.on_change is not None:
+                    self.on_change(entity_type, [item['id'] for item in modified])
+        except Exception as e:
+            self.checkpoints.finish(run, error=str(e))
+            raise
+
+        self.checkpoints.finish(run)
+        self.logger.info(f"Synced {written} changed {entity_type} records, skipped {unchanged} unchanged "
+                         f"(mark {_iso(mark)})")
+        return {'records': written, 'unchanged': unchanged, 'last_updated_at': mark, **run.summary()}
+
+    # Events
+    def event_pipeline(self, source: str, since: int, until: int = None) -> AggregationPipeline:
+        """Aggregation reading a source's events in [since, until) (epoch milliseconds)"""
+        until = until or _now_ms()
+        first_day = since - since % DAY_MS
+        days = (until - 1 - first_day) // DAY_MS + 1
+        return AggregationPipeline(source) \
+            .time_series(first=first_day, count=days) \
+            .filter(f'browserTime >= {since} && browserTime < {until}')
+
+    def event_shards(self, since: int, until: int) -> List[Tuple[int, int]]:
+        """Split [since, until) into windows ending on day boundaries, event_shard_days long"""
+        shards = []
+        start = since
+        while start < until:
+            end = min(start - start % DAY_MS + self.event_shard_days * DAY_MS, until)
+            shards.append((start, end))
+            start = end
+        return shards
+
+    def _event_start(self, state: Dict[str, Any]) -> int:
+        # Windows start from where the last completed run read through, so an idle source moves on too
+        if 'read_through' in state:
+            return max(state['read_through'] - self.event_overlap_ms, 0)
+        if 'last_event_time' in state:
+            return max(state['last_event_time'] - self.event_overlap_ms, 0)
+        return _now_ms() - self.initial_event_days * DAY_MS
+
+    def start_event_run(self, source: str) -> SyncRun:
+        """Resume the source's unfinished run, or start one whose window runs from its mark to now"""
+        def plan():
+            state = self.get_state(source)
+            return {'since': self._event_start(state), 'until': _now_ms() + 1}
+
+        return self.checkpoints.start(self._state_key(source), source, plan)
+
+    def pending_event_shards(self, run: SyncRun) -> List[Tuple[str, int, int]]:
+        """(unit, first, last) of the run's shards not committed yet"""
+        shards = self.event_shards(run.plan['since'], run.plan['until'])
+        return [(f'{first}-{last}', first, last) for first, last in shards if f'{first}-{last}' not in run.committed]
+
+    def _event_entries(self, source: str, mark: int, synced_at: str,
+                       read_through: int = None) -> List[Tuple[str, str, Any]]:
+        state = {'last_event_time': mark, 'last_run': synced_at}
+        if read_through is None:
+            read_through = self.get_state(source).get('read_through')
+        if read_through is not None:
+            state['read_through'] = read_through
+        return [(self.STATE_NAMESPACE, self._state_key(source), state)]
+
+    def commit_event_shard(self, run: SyncRun, source: str, unit: str, records: int, mark: int,
+                           synced_at: str) -> None:
+        """Checkpoint a fully written shard together with the source's advanced mark"""
+        self.checkpoints.commit(run, unit, records, self._event_entries(source, mark, synced_at))
+
+    def finish_event_run(self, run: SyncRun, source: str, mark: int, synced_at: str) -> int:
+        """Complete a run, recording its whole window as read through; returns the final mark"""
+        self.checkpoints.finish(run, entries=self._event_entries(source, mark, synced_at,
+                                                                 read_through=run.plan['until']))
+        return mark
+
+    def sync_events(self, source: str) -> Dict[str, Any]:
+        """
+        Write the events of one source since its high-water mark
+
+        The window is fixed when a run starts and read shard by shard; each
+        shard is checkpointed once all of its rows are written. A restarted
+        run reads the same window and skips the committed shards.
+
+        Returns:
+            Dict with written row count, the new high-water mark and the run
+        """
+        run = self.start_event_run(source)
+        synced_at = datetime.now(timezone.utc).isoformat()
+        mark = self.get_state(source).get('last_event_time', 0)
+
+        written = 0
+        try:
+            for unit, first, last in self.pending_event_shards(run):
+                shard_written = 0
+                for batch in batched(self.client.iter_aggregation(self.event_pipeline(source, first, last)),
+                                     self.event_batch_size):
+                    shard_written += self.writer.write(
+                        'pendo_events', [format_event(event, source, synced_at) for event in batch]
+                    )
+                    if self.rollups is not None:
+                        self.ingest_rollups(batch, source)
+                    mark = max(mark, max(event.get('browserTime') or 0 for event in batch))
+                written += shard_written
+                self.commit_event_shard(run, source, unit, shard_written, mark, synced_at)
+        except Exception as e:
+            self.checkpoints.finish(run, error=str(e))
+            raise
+
+        mark = self.finish_event_run(run, source, mark, synced_at)
+        self.logger.info(f"Synced {written} {source} since {_iso(run.plan['since'])}")
+        return {'records': written, 'last_event_time': mark, **run.summary()}
+
+    def ingest_rollups(self, batch: List[Dict[str, Any]], source: str) -> None:
+        """Add a batch of raw events to the rollup store, skipping events it already counted"""
+        # Deduplicated by event id, so late events in the overlap are counted and re-read ones are not
+        ids = [format_event(event, source, '')['id'] for event in batch]
+        self.rollups.ingest_rows(batch, ids, event_type=source)
+
+    def prune_rollup_events(self) -> int:
+        """
+        Drop rollup event ids that no future event window can re-read
+
+        Every source's next window starts at its read_through mark minus the
+        overlap, and an event was ingested no earlier than its own time, so
+        ids ingested before the earliest such start are never seen again.
+        Nothing is pruned while any source has a run left to resume.
+
+        Returns:
+            Number of event ids dropped
+        """
+        if self.rollups is None:
+            return 0
+        starts = []
+        for source in EVENT_SOURCES:
+            state = self.get_state(source)
+            if 'read_through' not in state or self.checkpoints.unfinished(self._state_key(source)):
+                return 0
+            starts.append(state['read_through'] - self.event_overlap_ms)
+        return self.rollups.prune(min(starts) / 1000)
+
+    # Runs
+    def run(self, entity_types: Iterable[str] = tuple(ENTITY_SYNC),
+            event_sources: Iterable[str] = EVENT_SOURCES) -> Dict[str, Dict[str, Any]]:
+        """
+        Sync every requested entity type and event source
+
+        A failure in one type is logged and reported without stopping the
+        others; its run is resumed from its last checkpoint next time.
+
+        Returns:
+            Name to its result: records, new mark, seconds, and error on failure
+        """
+        steps: List[tuple] = [(name, self.sync_entities) for name in entity_types]
+        steps += [(name, self.sync_events) for name in event_sources]
+
+        results = {}
+        for name, step in steps:
+            started = time.perf_counter()
+            try:
+                result = step(name)
+                result['status'] = 'completed'
+            except Exception as e:
+                self.logger.error(f"Sync of {name} failed: {e}")
+                result = {'records': 0, 'status': 'failed', 'error': str(e)}
+            result['seconds'] = round(time.perf_counter() - started, 3)
+            results[name] = result
+        if event_sources:
+            self.prune_rollup_events()
+        return results
+
+
+def batched(rows: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Group rows from any iterable into lists of at most size rows"""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
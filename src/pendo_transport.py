@@ -0,0 +1,363 @@
+"""
+Pendo.io API Transport Configuration
+Connection pooling, keep-alive, timeout tuning, compression negotiation and
+wire-size accounting shared by all clients
+"""
+
+import zlib
+import socket
+import time
+import threading
+import importlib.util
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Any
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import PoolManager
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.request import ACCEPT_ENCODING
+
+
+@dataclass
+class TransportConfig:
+    """
+    HTTP transport settings for the Pendo API clients
+
+    Attributes:
+        pool_connections: Number of per-host connection pools kept alive
+        pool_maxsize: Maximum pooled connections per host
+        pool_block: Block instead of opening throwaway connections when a host pool is exhausted
+        max_connections: Total connection cap (async client only)
+        keep_alive: Reuse connections between requests
+        keep_alive_timeout: Seconds an idle pooled connection may be reused for
+        connect_timeout: Seconds to wait for the TCP/TLS connection
+        read_timeout: Seconds to wait between bytes of the response
+        tcp_keepalive: Enable TCP keepalive probes on pooled sockets
+        tcp_keepidle: Idle seconds before the first keepalive probe
+        tcp_keepintvl: Seconds between keepalive probes
+        tcp_keepcnt: Failed probes before the socket is dropped
+    """
+
+    pool_connections: int = 10
+    pool_maxsize: int = 10
+    pool_block: bool = False
+    max_connections: int = 100
+    keep_alive: bool = True
+    keep_alive_timeout: float = 15.0
+    connect_timeout: float = 15.0
+    read_timeout: float = 15.0
+    tcp_keepalive: bool = True
+    tcp_keepidle: int = 60
+    tcp_keepintvl: int = 15
+    tcp_keepcnt: int = 4
+
+    @property
+    def timeout(self) -> Tuple[float, float]:
+        """(connect, read) timeout tuple in the form requests expects"""
+        return (self.connect_timeout, self.read_timeout)
+
+    def socket_options(self) -> List[Tuple[int, int, int]]:
+        """Socket options applied to every new pooled connection"""
+        options = list(HTTPConnection.default_socket_options)
+        if not self.tcp_keepalive:
+            return options
+
+        options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+        # Fine-grained probe timing is platform specific
+        for name, value in (('TCP_KEEPIDLE', self.tcp_keepidle),
+                            ('TCP_KEEPINTVL', self.tcp_keepintvl),
+                            ('TCP_KEEPCNT', self.tcp_keepcnt)):
+            if hasattr(socket, name):
+                options.append((socket.IPPROTO_TCP, getattr(socket, name), value))
+        return options
+
+    def apply_socket_options(self, sock: socket.socket) -> None:
+        """Apply socket_options() to an already created socket"""
+        for level, name, value in self.socket_options():
+            sock.setsockopt(level, name, value)
+
+
+class PoolStats:
+    """
+    Thread-safe connection pool hit/miss counters
+
+    A hit is a request served on an already-open pooled connection; a miss is
+    a request that had to open a new connection (and pay the TLS handshake).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, reused: bool) -> None:
+        with self._lock:
+            if reused:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    @property
+    def reuse_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def reset(self) -> None:
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'reuse_ratio': round(self.hits / total, 4) if total else 0.0
+            }
+
+
+class _TrackedPoolMixin:
+    """Counts connection reuse and retires connections idle past keep_alive_timeout"""
+
+    pool_stats: PoolStats = None
+    idle_timeout: float = None
+
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout=timeout)
+
+        released_at = getattr(conn, '_pendo_released_at', None)
+        if (conn.sock is not None and self.idle_timeout is not None
+                and released_at is not None
+                and time.monotonic() - released_at > self.idle_timeout):
+            conn.close()
+
+        if self.pool_stats is not None:
+            self.pool_stats.record(reused=conn.sock is not None)
+        return conn
+
+    def _put_conn(self, conn):
+        if conn is not None:
+            conn._pendo_released_at = time.monotonic()
+        super()._put_conn(conn)
+
+
+class _TrackedHTTPConnectionPool(_TrackedPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class _TrackedHTTPSConnectionPool(_TrackedPoolMixin, HTTPSConnectionPool):
+    pass
+
+
+class _TrackedPoolManager(PoolManager):
+    """PoolManager that hands its PoolStats to every host pool it creates"""
+
+    def __init__(self, *args, pool_stats: PoolStats = None, idle_timeout: float = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool_stats = pool_stats
+        self.idle_timeout = idle_timeout
+        self.pool_classes_by_scheme = {
+            'http': _TrackedHTTPConnectionPool,
+            'https': _TrackedHTTPSConnectionPool
+        }
+
+    def _new_pool(self, scheme, host, port, request_context=None):
+        pool = super()._new_pool(scheme, host, port, request_context=request_context)
+        pool.pool_stats = self.pool_stats
+        pool.idle_timeout = self.idle_timeout
+        return pool
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """requests adapter sized and tuned from a TransportConfig"""
+
+    def __init__(self, config: TransportConfig, pool_stats: PoolStats = None):
+        self.transport = config
+        self.pool_stats = pool_stats or PoolStats()
+        super().__init__(
+            pool_connections=config.pool_connections,
+            pool_maxsize=config.pool_maxsize,
+            pool_block=config.pool_block
+        )
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+        self.poolmanager = _TrackedPoolManager(
+            num_pools=connections,
+            maxsize=maxsize,
+            block=block,
+            socket_options=self.transport.socket_options(),
+            pool_stats=self.pool_stats,
+            idle_timeout=self.transport.keep_alive_timeout if self.transport.keep_alive else None,
+            **pool_kwargs
+        )
+
+
+def create_session(config: TransportConfig, headers: Dict[str, str]) -> Tuple[requests.Session, PoolStats]:
+    """
+    Build a requests.Session wired to a tuned, instrumented connection pool
+
+    Args:
+        config: Transport settings
+        headers: Default headers for every request
+
+    Returns:
+        Tuple of (session, pool statistics)
+    """
+    session = requests.Session()
+    session.headers.update(headers)
+    # Advertise every codec urllib3 can decode in this environment
+    session.headers['Accept-Encoding'] = ', '.join(ACCEPT_ENCODING.split(','))
+    if not config.keep_alive:
+        session.headers['Connection'] = 'close'
+
+    adapter = PooledHTTPAdapter(config)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session, adapter.pool_stats
+
+
+class WireStats:
+    """
+    Thread-safe per-endpoint transfer accounting
+
+    Tracks bytes received on the wire (possibly compressed) against bytes
+    after decoding, so transfer volume per sync run can be quantified.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, endpoint: str, encoding: Optional[str], wire_bytes: int, decoded_bytes: int) -> None:
+        encoding = encoding or 'identity'
+        with self._lock:
+            entry = self._endpoints.setdefault(endpoint, {
+                'requests': 0, 'wire_bytes': 0, 'decoded_bytes': 0, 'encodings': {}
+            })
+            entry['requests'] += 1
+            entry['wire_bytes'] += wire_bytes
+            entry['decoded_bytes'] += decoded_bytes
+            entry['encodings'][encoding] = entry['encodings'].get(encoding, 0) + 1
+
+    def record_response(self, response: requests.Response, decoded_bytes: int = None) -> None:
+        """Record a fully consumed requests response"""
+        if decoded_bytes is None:
+            decoded_bytes = len(response.content)
+        raw = response.raw
+        wire_bytes = raw.tell() if hasattr(raw, 'tell') else decoded_bytes
+        self.record(urlsplit(response.url).path, response.headers.get('Content-Encoding'),
+                    wire_bytes, decoded_bytes)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._endpoints.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            endpoints = {
+                endpoint: dict(entry, encodings=dict(entry['encodings']),
+                               compression_ratio=_ratio(entry['decoded_bytes'], entry['wire_bytes']))
+                for endpoint, entry in self._endpoints.items()
+            }
+        wire = sum(entry['wire_bytes'] for entry in endpoints.values())
+        decoded = sum(entry['decoded_bytes'] for entry in endpoints.values())
+        return {
+            'endpoints': endpoints,
+            'total': {
+                'requests': sum(entry['requests'] for entry in endpoints.values()),
+                'wire_bytes': wire,
+                'decoded_bytes': decoded,
+                'compression_ratio': _ratio(decoded, wire)
+            }
+        }
+
+
+def _ratio(decoded: int, wire: int) -> float:
+    return round(decoded / wire, 2) if wire else 0.0
+
+
+def supported_encodings() -> List[str]:
+    """Content codings this environment can decompress with make_decompressor()"""
+    encodings = ['gzip', 'deflate']
+    if any(_module_available(name) for name in ('brotli', 'brotlicffi')):
+        encodings.append('br')
+    if any(_module_available(name) for name in ('compression.zstd', 'backports.zstd', 'zstandard')):
+        encodings.append('zstd')
+    return encodings
+
+
+def _module_available(name: str) -> bool:
+    """Check for an importable module without importing it"""
+    parent = name.rpartition('.')[0]
+    if parent and importlib.util.find_spec(parent) is None:
+        return False
+    return importlib.util.find_spec(name) is not None
+
+
+class _DeflateDecoder:
+    """Handles both zlib-wrapped and raw deflate bodies, as servers send either"""
+
+    def __init__(self):
+        self._first = True
+        self._obj = zlib.decompressobj()
+
+    def decompress(self, data: bytes) -> bytes:
+        if not self._first:
+            return self._obj.decompress(data)
+        self._first = False
+        try:
+            return self._obj.decompress(data)
+        except zlib.error:
+            self._obj = zlib.decompressobj(-zlib.MAX_WBITS)
+            return self._obj.decompress(data)
+
+
+class _BrotliDecoder:
+    def __init__(self):
+        try:
+            import brotli
+        except ImportError:
+            import brotlicffi as brotli
+        self._obj = brotli.Decompressor()
+        # brotli exposes process(), brotlicffi exposes decompress()
+        self.decompress = getattr(self._obj, 'process', None) or self._obj.decompress
+
+
+def _zstd_decoder():
+    try:
+        from compression import zstd
+    except ImportError:
+        try:
+            from backports import zstd
+        except ImportError:
+            import zstandard
+            return zstandard.ZstdDecompressor().decompressobj()
+    return zstd.ZstdDecompressor()
+
+
+def make_decompressor(encoding: Optional[str]):
+    """
+    Incremental decoder for a Content-Encoding value
+
+    Returns:
+        Object with a decompress(bytes) -> bytes method, or None for identity
+    """
+    encoding = (encoding or 'identity').strip().lower()
+    if encoding in ('identity', ''):
+        return None
+    if encoding in ('gzip', 'x-gzip'):
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if encoding == 'deflate':
+        return _DeflateDecoder()
+    if encoding == 'br':
+        return _BrotliDecoder()
+    if encoding == 'zstd':
+        return _zstd_decoder()
+    raise ValueError(f"Unsupported Content-Encoding: {encoding}")
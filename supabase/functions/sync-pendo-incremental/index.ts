@@ -57,7 +57,7 @@ async function fetchPendoDataLimited(endpoint: string, maxRecords: number = MAX_
 
     if (results.length === 0) break;
 
-    allResults = allResults.concat(results);
+    allResults.push(...results);
     console.log(`  ✓ Fetched ${results.length} records (total: ${allResults.length})`);
 
     // Stop if we've reached our limit or got fewer results than requested
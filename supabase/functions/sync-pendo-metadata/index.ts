@@ -43,7 +43,7 @@ async function fetchPendoData(endpoint: string, params: Record<string, any> = {}
     const data = await response.json();
     const results = data.results || data || [];
 
-    allResults = allResults.concat(results);
+    allResults.push(...results);
 
     // Check if we got fewer results than the limit, which means we're done
     if (results.length < limit) {
@@ -0,0 +1,107 @@
+"""
+Shared pytest fixtures
+"""
+
+import os
+import sys
+
+import pytest
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+
+@pytest.fixture
+def store(tmp_path):
+    """EntityStore on a fresh database file"""
+    from pendo_store import EntityStore
+    return EntityStore(str(tmp_path / 'pendo_store.sqlite3'))
+
+
+class FakeSyncClient:
+    """
+    Stand-in for PendoAPIClientV2 as used by the sync engine
+
+    Serves events and entities from memory, applying the timeSeries window
+    and filters of each aggregation. With fail_after set, the stream raises
+    once that many rows have been served in total.
+    """
+
+    store = None
+
+    def __init__(self, events=(), entities=None, reports=()):
+        self.events = list(events)
+        self.entities = {'guides': [], 'features': [], 'pages': []}
+        self.entities.update(entities or {})
+        self.reports = list(reports)
+        self.queries = []
+        self.served = 0
+        self.fail_after = None
+
+    def _store_key(self, key):
+        return f'test:{key}'
+
+    def iter_aggregation(self, pipeline):
+        from pendo_aggregation import DAY_MS
+
+        query = pipeline.build()
+        self.queries.append(query)
+        stages = query['request']['pipeline']
+        source = stages[0]['source']
+        name = next(key for key in source if key != 'timeSeries')
+        rows = self.events if name.endswith('Events') else self.entities[name]
+        if 'timeSeries' in source:
+            window = source['timeSeries']
+            start = window['first']
+            rows = [row for row in rows if start <= row['browserTime'] < start + window['count'] * DAY_MS]
+        if name.endswith('Events'):
+            rows = [row for row in rows if row['source'] == name]
+        for stage in stages[1:]:
+            if 'filter' in stage:
+                expression = stage['filter'].replace('&&', ' and ').replace('||', ' or ')
+                rows = [row for row in rows if eval(expression, {}, dict(row))]
+        return self._serve([dict(row) for row in rows])
+
+    def iter_reports(self):
+        return self._serve([dict(report) for report in self.reports])
+
+    def _serve(self, rows):
+        for row in rows:
+            if self.fail_after is not None and self.served >= self.fail_after:
+                raise ConnectionError('connection reset')
+            self.served += 1
+            yield row
+
+
+def recent_events(count: int = 300, days: int = 3, seed: int = 5, now: int = None):
+    """Guide, feature and page events spread over the last few days"""
+    import random
+    import time
+    from pendo_aggregation import DAY_MS
+
+    rng = random.Random(seed)
+    now = now or int(time.time() * 1000)
+    events = []
+    for number in range(count):
+        kind = rng.choice(['guide', 'feature', 'page'])
+        events.append({
+            'source': f'{kind}Events',
+            f'{kind}Id': f'{kind}-{rng.randrange(5)}',
+            'visitorId': f'v{rng.randrange(60)}',
+            'accountId': f'a{rng.randrange(10)}',
+            'browserTime': now - 1000 - rng.randrange(days * DAY_MS),
+            'type': 'seen',
+            'sequence': number
+        })
+    return events
+
+
+@pytest.fixture
+def make_engine(store):
+    """Build a SyncEngine over a FakeSyncClient, a MemoryWriter and the test store"""
+    from pendo_sync import MemoryWriter, SyncEngine
+
+    def make(client, **options):
+        options.setdefault('event_batch_size', 40)
+        return SyncEngine(client, MemoryWriter(), store=store, **options)
+    return make
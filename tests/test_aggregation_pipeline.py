@@ -0,0 +1,88 @@
+"""
+Tests for the aggregation pipeline builder and its pushdown rewrites
+"""
+
+import pytest
+
+from pendo_aggregation import AggregationPipeline, PipelineError, field_references, query_fingerprint
+
+
+def guide_views(first_filter: bool) -> AggregationPipeline:
+    pipeline = AggregationPipeline('guideEvents').time_series(first=1700000000000, count=7)
+    if first_filter:
+        pipeline.filter('type == "guideSeen"').select('guideId', 'visitorId', 'type')
+    else:
+        pipeline.select('guideId', 'visitorId', 'type').filter('type == "guideSeen"')
+    return pipeline.group(['guideId'], views=('count', None)).sort('-views').limit(5)
+
+
+def test_fingerprint_is_stable_across_equivalent_stage_orders():
+    assert guide_views(True).fingerprint() == guide_views(False).fingerprint()
+
+
+def test_fingerprint_ignores_request_id():
+    pipeline = guide_views(True)
+    assert query_fingerprint(pipeline.build()) == pipeline.fingerprint()
+    assert pipeline.build(request_id='abc')['request']['requestId'] == 'abc'
+    assert pipeline.fingerprint() == guide_views(True).fingerprint()
+
+
+def test_filter_on_raw_field_runs_right_after_the_source():
+    stages = guide_views(False).optimized_stages()
+    assert 'source' in stages[0]
+    assert stages[1] == {'filter': 'type == "guideSeen"'}
+
+
+def test_projection_keeps_only_fields_later_stages_read():
+    stages = guide_views(False).optimized_stages()
+    assert stages[2] == {'select': {'guideId': 'guideId'}}
+
+
+def test_projection_is_added_before_group_when_missing():
+    pipeline = (AggregationPipeline('featureEvents').time_series(first=0, count=1)
+                .group(['featureId'], events=('sum', 'numEvents')))
+    assert pipeline.optimized_stages()[1] == {'select': {'featureId': 'featureId', 'numEvents': 'numEvents'}}
+
+
+def test_filter_on_renamed_field_is_not_hoisted():
+    pipeline = (AggregationPipeline('guideEvents').time_series(first=0, count=1)
+                .select(guide='guideId').filter('guide == "g1"'))
+    stages = pipeline.optimized_stages()
+    assert stages[1] == {'select': {'guide': 'guideId'}}
+    assert stages[2] == {'filter': 'guide == "g1"'}
+
+
+def test_filter_on_group_output_stays_after_group():
+    pipeline = (AggregationPipeline('guideEvents').time_series(first=0, count=1)
+                .group(['guideId'], views=('count', None)).filter('views > 10'))
+    stages = pipeline.optimized_stages()
+    assert list(stages[-1]) == ['filter']
+    assert list(stages[-2]) == ['group']
+
+
+def test_stages_keep_the_order_they_were_added_in():
+    assert [next(iter(stage)) for stage in guide_views(False).stages] == \
+        ['select', 'filter', 'group', 'sort', 'limit']
+
+
+@pytest.mark.parametrize('expression,fields', [
+    ('type == "guideSeen" && visitorId != "a.b"', {'type', 'visitorId'}),
+    ('parameters.url.length > 3', {'parameters'}),
+    ('contains(name, "x") || count >= 1e10', {'name', 'count'}),
+    ("browserTime >= 5 and not deleted", {'browserTime', 'deleted'}),
+])
+def test_field_references(expression, fields):
+    assert field_references(expression) == fields
+
+
+@pytest.mark.parametrize('build', [
+    lambda: AggregationPipeline('guideEvents').build(),
+    lambda: AggregationPipeline('guides').time_series(first=0, count=1),
+    lambda: AggregationPipeline('guideEvents').time_series(first=0, count=1).time_series(first=0, count=1),
+    lambda: AggregationPipeline('guides').limit(5).filter('x'),
+    lambda: AggregationPipeline('guides').limit(0),
+    lambda: AggregationPipeline('guides').group([]),
+])
+def test_invalid_pipelines_raise_pipeline_error(build):
+    with pytest.raises(PipelineError):
+        build()
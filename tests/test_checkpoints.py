@@ -0,0 +1,128 @@
+"""
+Tests for checkpointed sync runs and exactly-once rollup ingestion
+"""
+
+import time
+
+import pytest
+
+from conftest import FakeSyncClient, recent_events
+from pendo_rollup import RollupStore
+from pendo_sync import format_event
+
+
+def guide_events(events):
+    return [event for event in events if event['source'] == 'guideEvents']
+
+
+def crash_midway(engine, client, source='guideEvents', after=None):
+    client.fail_after = after
+    with pytest.raises(ConnectionError):
+        engine.sync_events(source)
+    client.fail_after = None
+
+
+def test_interrupted_run_is_failed_and_resumed(make_engine):
+    events = recent_events(count=600)
+    client = FakeSyncClient(events)
+    engine = make_engine(client)
+    expected = guide_events(events)
+
+    crash_midway(engine, client, after=len(expected) // 2)
+    failed = engine.checkpoints.history('guideEvents')[0]
+    assert failed['status'] == 'failed'
+    assert 'connection reset' in failed['error_message']
+
+    before = engine.start_event_run('guideEvents')
+    committed = set(before.committed)
+    pending = engine.pending_event_shards(before)
+    assert committed and pending
+
+    client.queries.clear()
+    result = engine.sync_events('guideEvents')
+
+    assert result['resumed'] is True
+    assert result['run_id'] == failed['id']
+    assert len(client.queries) == len(pending)
+    assert engine.checkpoints.history('guideEvents')[0]['status'] == 'completed'
+    written = engine.writer.tables['pendo_events']
+    assert {format_event(event, 'guideEvents', '')['id'] for event in expected} == set(written)
+
+
+def test_resumed_run_keeps_its_original_window(make_engine):
+    client = FakeSyncClient(recent_events())
+    engine = make_engine(client)
+    crash_midway(engine, client, after=5)
+    plan = engine.start_event_run('guideEvents').plan
+
+    time.sleep(0.01)
+    engine.sync_events('guideEvents')
+    assert engine.get_state('guideEvents')['read_through'] == plan['until']
+
+
+def test_completed_run_starts_fresh(make_engine):
+    engine = make_engine(FakeSyncClient(recent_events()))
+    first = engine.sync_events('featureEvents')
+    second = engine.sync_events('featureEvents')
+    assert second['run_id'] != first['run_id']
+    assert second['resumed'] is False
+
+
+def test_rollups_count_each_event_once_across_crash_and_late_events(make_engine, store):
+    events = recent_events(count=600)
+    client = FakeSyncClient(events)
+    engine = make_engine(client, rollups=RollupStore(store), event_overlap_seconds=3600)
+
+    crash_midway(engine, client, after=len(guide_events(events)) // 2)
+    # Late events land inside shards that were already read but not committed
+    newest = sorted(guide_events(events), key=lambda event: -event['browserTime'])[:25]
+    late = [dict(event, guideId='guide-late', sequence=-event['sequence'] - 1) for event in newest]
+    client.events.extend(late)
+    engine.sync_events('guideEvents')
+    # A later run re-reads the overlap
+    engine.sync_events('guideEvents')
+
+    days = sorted(time.strftime('%Y-%m-%d', time.gmtime(event['browserTime'] / 1000))
+                  for event in guide_events(client.events))
+    totals = engine.rollups.totals(days[0], days[-1])
+    assert sum(entry['events'] for entry in totals.values()) == len(guide_events(client.events))
+    assert totals['guide-late']['events'] == 25
+
+
+def test_ingest_rows_rerun_is_a_no_op(store):
+    rollups = RollupStore(store)
+    rows = recent_events(count=100)
+    ids = [format_event(row, row['source'], '')['id'] for row in rows]
+
+    assert rollups.ingest_rows(rows, ids) > 0
+    assert rollups.ingest_rows(rows, ids) == 0
+    assert rollups.ingest_rows(list(reversed(rows)), list(reversed(ids))) == 0
+
+
+def test_event_ids_are_pruned_only_once_no_window_can_reread_them(make_engine, store):
+    client = FakeSyncClient(recent_events())
+    engine = make_engine(client, rollups=RollupStore(store), event_overlap_seconds=0)
+
+    def remembered():
+        return store.execute('SELECT COUNT(*) FROM rollup_events').fetchone()[0]
+
+    crash_midway(engine, client, after=5)
+    assert remembered() > 0
+    # A run is left to resume, and sources that never completed have no read_through yet
+    assert engine.prune_rollup_events() == 0
+    assert remembered() > 0
+
+    # Once every source has completed a run planned after those events were ingested,
+    # no later window (there is no overlap) reaches back to them
+    engine.run(entity_types=())
+    engine.run(entity_types=())
+    assert remembered() == 0
+
+
+def test_prune_keeps_ids_ingested_after_the_horizon(store):
+    rollups = RollupStore(store)
+    rows = recent_events(count=10)
+    rollups.ingest_rows(rows, [format_event(row, row['source'], '')['id'] for row in rows])
+
+    assert rollups.prune(time.time() - 3600) == 0
+    assert rollups.prune(time.time() + 1) == 10
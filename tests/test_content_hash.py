@@ -0,0 +1,66 @@
+"""
+Tests for skipping entity writes whose content hash is unchanged
+"""
+
+from conftest import FakeSyncClient
+from pendo_sync import content_hash, format_guide
+
+
+def guide(guide_id: str, updated_at: int, name: str = None):
+    return {'id': guide_id, 'name': name or f'Guide {guide_id}', 'state': 'public',
+            'createdAt': 1700000000000, 'lastUpdatedAt': updated_at, 'steps': [{'id': 's1'}]}
+
+
+def catalog(count: int = 30, updated_at: int = 1000):
+    return [guide(f'g{number}', updated_at + number) for number in range(count)]
+
+
+def test_hash_ignores_volatile_columns_and_key_order():
+    row = format_guide(guide('a', 1000), '2024-01-01T00:00:00+00:00')
+    later = format_guide(guide('a', 9000), '2024-02-01T00:00:00+00:00')
+    reordered = dict(reversed(list(row.items())))
+    assert content_hash(row) == content_hash(later) == content_hash(reordered)
+    assert content_hash(row) != content_hash(dict(row, name='Other'))
+
+
+def test_full_resync_of_unchanged_catalog_writes_nothing(make_engine):
+    engine = make_engine(FakeSyncClient(entities={'guides': catalog()}), page_size=7)
+    assert engine.sync_entities('guide')['records'] == 30
+
+    engine.reset('guide')
+    result = engine.sync_entities('guide')
+    assert result['records'] == 0
+    assert result['unchanged'] == 30
+
+
+def test_only_rows_with_new_content_are_written(make_engine):
+    client = FakeSyncClient(entities={'guides': catalog()})
+    engine = make_engine(client)
+    engine.sync_entities('guide')
+
+    client.entities['guides'][3] = guide('g3', 5000, name='Renamed')
+    client.entities['guides'][4] = guide('g4', 5000)
+    result = engine.sync_entities('guide')
+
+    assert result['records'] == 1
+    assert result['unchanged'] == 1
+    assert engine.writer.tables['pendo_guides']['g3']['name'] == 'Renamed'
+
+
+def test_reset_with_rewrite_writes_every_row_again(make_engine):
+    changes = []
+    engine = make_engine(FakeSyncClient(entities={'guides': catalog(10)}),
+                         on_change=lambda entity_type, ids: changes.append((entity_type, ids)))
+    engine.sync_entities('guide')
+    changes.clear()
+
+    engine.reset('guide', rewrite=True)
+    assert engine.sync_entities('guide')['records'] == 10
+    assert sorted(sum((ids for _, ids in changes), [])) == sorted(f'g{number}' for number in range(10))
+
+
+def test_hashes_are_kept_per_entity_type(make_engine):
+    pages = [{'id': 'g1', 'name': 'Same id', 'url': '/x', 'lastUpdatedAt': 1000}]
+    engine = make_engine(FakeSyncClient(entities={'guides': catalog(3), 'pages': pages}))
+    engine.sync_entities('guide')
+    assert engine.sync_entities('page')['records'] == 1
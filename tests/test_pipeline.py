@@ -0,0 +1,110 @@
+"""
+Tests for the staged fetch/transform/write pipeline
+"""
+
+import threading
+import time
+
+import pytest
+
+from conftest import FakeSyncClient, recent_events
+from pendo_pipeline import PipelinedSync, Stage, StagedPipeline
+from pendo_rollup import RollupStore
+from pendo_sync import EVENT_SOURCES
+
+
+def test_every_item_flows_through_all_stages():
+    collected = []
+    lock = threading.Lock()
+
+    def record(item):
+        with lock:
+            collected.append(item)
+        return ()
+
+    pipeline = StagedPipeline([
+        Stage('split', lambda n: range(n), workers=2),
+        Stage('square', lambda n: [n * n], workers=3),
+        Stage('collect', record, workers=2)
+    ])
+    stats = pipeline.run([3, 5, 4])
+
+    assert sorted(collected) == sorted(n * n for count in (3, 5, 4) for n in range(count))
+    assert stats['split']['outputs'] == 12
+    assert stats['collect']['items'] == 12
+
+
+def test_queues_bound_the_items_in_flight():
+    produced = []
+    consumed = []
+    release = threading.Event()
+
+    def produce(_):
+        for n in range(50):
+            produced.append(n)
+            yield n
+
+    def consume(n):
+        release.wait()
+        consumed.append(n)
+        return ()
+
+    pipeline = StagedPipeline([Stage('produce', produce), Stage('consume', consume, queue_size=3)])
+    runner = threading.Thread(target=pipeline.run, args=([None],))
+    runner.start()
+    time.sleep(0.3)
+    # Queue capacity, plus one item held by the blocked consumer and one by the blocked producer
+    assert len(produced) <= 3 + 2
+    release.set()
+    runner.join(timeout=5)
+    assert consumed == list(range(50))
+
+
+def test_first_error_stops_the_pipeline_and_is_raised():
+    def explode(n):
+        if n == 7:
+            raise RuntimeError('write failed')
+        return ()
+
+    pipeline = StagedPipeline([Stage('emit', lambda n: range(n)), Stage('write', explode, workers=2)])
+    with pytest.raises(RuntimeError, match='write failed'):
+        pipeline.run([1000000])
+
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_pipelined_sync_writes_what_the_engine_writes(make_engine, tmp_path, workers):
+    from pendo_store import EntityStore
+    from pendo_sync import MemoryWriter, SyncEngine
+
+    events = recent_events(count=500)
+    sequential = make_engine(FakeSyncClient(events))
+    sequential.run(entity_types=())
+
+    store = EntityStore(str(tmp_path / 'pipelined.sqlite3'))
+    engine = SyncEngine(FakeSyncClient(events), MemoryWriter(), store=store, event_batch_size=40,
+                        rollups=RollupStore(store))
+    results = PipelinedSync(engine, fetch_workers=workers, write_workers=workers, queue_size=2).sync_events()
+
+    assert engine.writer.tables['pendo_events'].keys() == sequential.writer.tables['pendo_events'].keys()
+    for source in EVENT_SOURCES:
+        assert results[source]['last_event_time'] == sequential.get_state(source)['last_event_time']
+        assert engine.checkpoints.history(source)[0]['status'] == 'completed'
+    assert results['pipeline']['stages']['write']['items'] > 0
+    rolled = sum(entry['events'] for entry in engine.rollups.totals('2000-01-01', '2100-01-01').values())
+    assert rolled == len(events)
+
+
+def test_pipelined_sync_failure_fails_runs_and_resumes(make_engine):
+    events = recent_events(count=500)
+    client = FakeSyncClient(events)
+    engine = make_engine(client)
+    client.fail_after = 200
+
+    with pytest.raises(ConnectionError):
+        PipelinedSync(engine).sync_events()
+    assert all(engine.checkpoints.history(source)[0]['status'] == 'failed' for source in EVENT_SOURCES)
+
+    client.fail_after = None
+    results = PipelinedSync(engine).sync_events()
+    assert all(results[source]['resumed'] for source in EVENT_SOURCES)
+    assert len(engine.writer.tables['pendo_events']) == len(events)
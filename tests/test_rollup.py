@@ -0,0 +1,110 @@
+"""
+Tests for incrementally maintained daily rollups
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from pendo_frame import EventFrame
+from pendo_rollup import RollupStore
+from pendo_sketch import DAY_MS
+
+# 2024-03-01T00:00:00Z
+MARCH = 1709251200000
+HOUR_MS = 60 * 60 * 1000
+
+
+def make_events(count: int = 2000, days: int = 5, seed: int = 3):
+    rng = random.Random(seed)
+    events = []
+    for _ in range(count):
+        kind = rng.choice(['guide', 'feature', 'page'])
+        events.append({
+            f'{kind}Id': f'{kind}-{rng.randrange(4)}',
+            'visitorId': f'v{rng.randrange(150)}',
+            'accountId': f'a{rng.randrange(20)}',
+            'browserTime': MARCH + rng.randrange(days * DAY_MS),
+            'numEvents': rng.randint(1, 3) if kind != 'guide' else None
+        })
+    return events
+
+
+def entity_of(event):
+    return event.get('guideId') or event.get('featureId') or event.get('pageId')
+
+
+def expected_totals(events):
+    totals = {}
+    for event in events:
+        entry = totals.setdefault(entity_of(event), {'events': 0, 'visitors': set(), 'accounts': set()})
+        entry['events'] += event['numEvents'] or 1
+        entry['visitors'].add(event['visitorId'])
+        entry['accounts'].add(event['accountId'])
+    return totals
+
+
+def test_totals_match_the_raw_events(store):
+    events = make_events()
+    rollups = RollupStore(store)
+    rollups.ingest(EventFrame.from_rows(events))
+
+    totals = rollups.totals('2024-03-01', '2024-03-05')
+    expected = expected_totals(events)
+    assert set(totals) == set(expected)
+    for entity_id, entry in expected.items():
+        assert totals[entity_id]['events'] == entry['events']
+        assert totals[entity_id]['unique_visitors'] == pytest.approx(len(entry['visitors']), rel=0.03)
+        assert totals[entity_id]['unique_accounts'] == pytest.approx(len(entry['accounts']), rel=0.03)
+    assert totals['guide-0']['entity_type'] == 'guide'
+
+
+def test_batches_in_any_order_equal_one_ingest(store, tmp_path):
+    from pendo_store import EntityStore
+
+    events = make_events()
+    whole = RollupStore(store)
+    whole.ingest(EventFrame.from_rows(events))
+
+    shuffled = list(events)
+    random.Random(1).shuffle(shuffled)
+    batched = RollupStore(EntityStore(str(tmp_path / 'batched.sqlite3')))
+    for start in range(0, len(shuffled), 170):
+        batched.ingest(EventFrame.from_rows(shuffled[start:start + 170]))
+
+    assert batched.totals('2024-03-01', '2024-03-05') == whole.totals('2024-03-01', '2024-03-05')
+
+
+def test_day_range_and_entity_filters(store):
+    events = make_events()
+    rollups = RollupStore(store)
+    rollups.ingest(EventFrame.from_rows(events))
+
+    second_day = [event for event in events if MARCH + DAY_MS <= event['browserTime'] < MARCH + 2 * DAY_MS]
+    totals = rollups.totals('2024-03-02', '2024-03-02', entity_ids=['page-1'])
+    assert list(totals) == ['page-1']
+    assert totals['page-1']['events'] == expected_totals(second_day)['page-1']['events']
+    assert set(rollups.totals('2024-03-01', '2024-03-05', entity_type='feature')) == \
+        {f'feature-{i}' for i in range(4)}
+
+
+def test_hourly_counts(store):
+    rows = [{'guideId': 'g', 'visitorId': 'v', 'browserTime': MARCH + 3 * HOUR_MS + i} for i in range(5)]
+    rows.append({'pageId': 'p', 'visitorId': 'v', 'browserTime': MARCH + 23 * HOUR_MS, 'numEvents': 4})
+    rollups = RollupStore(store)
+    rollups.ingest(EventFrame.from_rows(rows))
+
+    hourly = rollups.hourly_counts('2024-03-01', '2024-03-01')['2024-03-01']
+    expected = np.zeros(24, dtype=np.int64)
+    expected[3], expected[23] = 5, 4
+    assert np.array_equal(hourly, expected)
+
+
+def test_batch_ingested_twice_is_applied_once(store):
+    rollups = RollupStore(store)
+    frame = EventFrame.from_rows(make_events(200))
+    assert rollups.ingest(frame, batch_id='b1') > 0
+    assert rollups.ingest(frame, batch_id='b1') == 0
+    assert sum(entry['events'] for entry in rollups.totals('2024-03-01', '2024-03-05').values()) == \
+        int(frame.count.sum())
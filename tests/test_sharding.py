@@ -0,0 +1,217 @@
+"""
+Tests for sharded aggregation: shard planning, merging and the closed-shard cache
+"""
+
+import random
+
+import pytest
+
+from pendo_aggregation import DAY_MS, AggregationPipeline, ShardPlanner
+from pendo_client_v2 import PendoAPIClientV2
+
+# 2023-11-01T00:00:00Z
+NOVEMBER = 1698796800000
+
+
+def make_events(first: int, days: int, count: int = 3000, seed: int = 7):
+    rng = random.Random(seed)
+    return [{
+        'browserTime': first + rng.randrange(days * DAY_MS),
+        'guideId': f'g{rng.randrange(6)}',
+        'visitorId': f'v{rng.randrange(80)}',
+        'type': rng.choice(['guideSeen', 'guideDismissed']),
+        'numEvents': rng.randint(1, 4)
+    } for _ in range(count)]
+
+
+def _evaluate(expression: str, row: dict) -> bool:
+    python = expression.replace('&&', ' and ').replace('||', ' or ')
+    return eval(python, {}, dict(row))
+
+
+def run_query(events, query):
+    """Minimal aggregation engine over in-memory events, standing in for Pendo"""
+    pipeline = query['request']['pipeline']
+    window = pipeline[0]['source']['timeSeries']
+    start = window['first']
+    end = start + window['count'] * DAY_MS
+    rows = [dict(event) for event in events if start <= event['browserTime'] < end]
+
+    for stage in pipeline[1:]:
+        (kind, spec), = stage.items()
+        if kind == 'filter':
+            rows = [row for row in rows if _evaluate(spec, row)]
+        elif kind == 'select':
+            rows = [{out: row.get(field) for out, field in spec.items()} for row in rows]
+        elif kind == 'group':
+            groups = {}
+            for row in rows:
+                key = tuple(row.get(name) for name in spec['group'])
+                group = groups.setdefault(key, dict(zip(spec['group'], key)))
+                for field in spec['fields']:
+                    (name, aggregate), = field.items()
+                    (operation, source), = aggregate.items()
+                    value = 1 if operation == 'count' else row.get(source)
+                    if name not in group:
+                        group[name] = value
+                    elif operation in ('count', 'sum'):
+                        group[name] += value
+                    else:
+                        group[name] = (min if operation == 'min' else max)(group[name], value)
+            rows = list(groups.values())
+        elif kind == 'sort':
+            for field in reversed(spec):
+                rows = sorted(rows, key=lambda row: row.get(field.lstrip('-')), reverse=field.startswith('-'))
+        elif kind == 'limit':
+            rows = rows[:spec]
+    return {'results': rows}
+
+
+class FakeAggregationClient(PendoAPIClientV2):
+    """Client whose aggregation endpoint is served from in-memory events"""
+
+    def __init__(self, events, store=None):
+        super().__init__(api_key='test-key', store=store)
+        self.events = events
+        self.queries = []
+
+    def post(self, endpoint, data=None):
+        assert endpoint == '/api/v1/aggregation'
+        self.queries.append(data)
+        return run_query(self.events, data)
+
+
+def grouped(first: int, days: int) -> AggregationPipeline:
+    return (AggregationPipeline('guideEvents').time_series(first=first, count=days)
+            .filter('type == "guideSeen"')
+            .group(['guideId'], views=('count', None), events=('sum', 'numEvents'),
+                   earliest=('min', 'browserTime'), latest=('max', 'browserTime'))
+            .sort('-events', 'guideId'))
+
+
+def raw_rows(first: int, days: int) -> AggregationPipeline:
+    return (AggregationPipeline('guideEvents').time_series(first=first, count=days)
+            .filter('guideId == "g1"')
+            .select('browserTime', 'visitorId')
+            .sort('-browserTime')
+            .limit(40))
+
+
+@pytest.mark.parametrize('first', [NOVEMBER, NOVEMBER + 5 * 60 * 60 * 1000 + 123])
+@pytest.mark.parametrize('shard_days', [1, 3, 7])
+@pytest.mark.parametrize('build', [grouped, raw_rows])
+def test_sharded_result_equals_unsharded_result(first, shard_days, build):
+    events = make_events(NOVEMBER - DAY_MS, 32)
+    pipeline = build(first, 30)
+    client = FakeAggregationClient(events)
+
+    sharded = client.run_sharded_aggregation(pipeline, shard_days=shard_days, max_workers=3)
+
+    assert sharded['results'] == run_query(events, pipeline.build())['results']
+    assert len(sharded['shards']) > 1
+
+
+def test_shards_tile_the_window_without_gaps_or_overlaps():
+    first = NOVEMBER + 7 * 60 * 60 * 1000
+    planner = ShardPlanner(grouped(first, 20), initial_days=3)
+    shards = []
+    while True:
+        shard = planner.next_shard()
+        if shard is None:
+            break
+        shards.append(shard)
+        planner.observe(shard, rows=100, seconds=0.5)
+
+    assert shards[0].first == first
+    assert shards[-1].last == first + 20 * DAY_MS
+    assert all(left.last == right.first for left, right in zip(shards, shards[1:]))
+    assert all(shard.last > shard.first for shard in shards)
+
+
+def test_shards_grow_when_cheap_and_shrink_when_expensive():
+    planner = ShardPlanner(grouped(NOVEMBER, 90), initial_days=2, max_days=31,
+                           target_seconds=10.0, target_rows=1000)
+    shard = planner.next_shard()
+    planner.observe(shard, rows=10, seconds=0.1)
+    assert planner.days == 31
+
+    shard = planner.next_shard()
+    planner.observe(shard, rows=31 * 500, seconds=1.0)
+    assert planner.days < 31
+
+
+def test_group_merge_rejects_aggregates_that_cannot_be_merged():
+    from pendo_aggregation import PipelineError
+
+    pipeline = (AggregationPipeline('guideEvents').time_series(first=NOVEMBER, count=10)
+                .group(['guideId'], mean=('avg', 'numEvents')))
+    with pytest.raises(PipelineError):
+        ShardPlanner(pipeline)
+
+
+def test_closed_shards_are_reused_by_a_later_run(store):
+    events = make_events(NOVEMBER, 40)
+    client = FakeAggregationClient(events, store=store)
+    pipeline = grouped(NOVEMBER, 40)
+
+    first_run = client.run_sharded_aggregation(pipeline, shard_days=5)
+    fetched = len(client.queries)
+    second_run = client.run_sharded_aggregation(pipeline, shard_days=5)
+
+    assert fetched == len(first_run['shards'])
+    assert len(client.queries) == fetched
+    assert all(stats['cached'] for stats in second_run['shards'])
+    assert second_run['results'] == first_run['results']
+
+
+def test_window_starting_at_another_time_of_day_reuses_closed_days(store):
+    events = make_events(NOVEMBER, 40)
+    client = FakeAggregationClient(events, store=store)
+    client.run_sharded_aggregation(grouped(NOVEMBER + 2 * 60 * 60 * 1000, 30), shard_days=7)
+
+    client.queries.clear()
+    shifted = grouped(NOVEMBER + 9 * 60 * 60 * 1000, 30)
+    result = client.run_sharded_aggregation(shifted, shard_days=7)
+
+    # Only the partial days at the two edges are new
+    assert len(client.queries) == 2
+    assert all(stats['cached'] for stats in result['shards'][1:-1])
+    assert result['results'] == run_query(events, shifted.build())['results']
+
+
+def test_open_days_are_refetched_and_closed_days_are_not(tmp_path):
+    import time
+    from pendo_store import EntityStore
+
+    now = int(time.time() * 1000)
+    today = now - now % DAY_MS
+    events = make_events(today - 9 * DAY_MS, 10)
+    store = EntityStore(str(tmp_path / 'store.sqlite3'), ttls={'aggregation': 0})
+    client = FakeAggregationClient(events, store=store)
+    pipeline = grouped(today - 9 * DAY_MS, 10)
+
+    client.run_sharded_aggregation(pipeline, shard_days=3, settle_seconds=0)
+    client.queries.clear()
+    result = client.run_sharded_aggregation(pipeline, shard_days=3, settle_seconds=0)
+
+    refetched = [stats for stats in result['shards'] if not stats['cached']]
+    assert refetched and all(not stats['closed'] for stats in refetched)
+    assert all(stats['cached'] for stats in result['shards'] if stats['closed'])
+    assert len(client.queries) == len(refetched)
+
+
+def test_cached_shards_off_the_day_grid_are_ignored():
+    planner = ShardPlanner(grouped(NOVEMBER, 20), closed_before=NOVEMBER + 30 * DAY_MS,
+                           cached_shards=[(NOVEMBER + DAY_MS // 2, 7), (NOVEMBER + 7 * DAY_MS, 0),
+                                          (NOVEMBER + 10 * DAY_MS, 3)])
+    shards = []
+    while True:
+        shard = planner.next_shard()
+        if shard is None:
+            break
+        shards.append(shard)
+        planner.observe(shard, rows=10, seconds=0.1)
+
+    assert [shard.first for shard in shards if shard.cached] == [NOVEMBER + 10 * DAY_MS]
+    assert all(shard.days >= 1 for shard in shards)
+    assert shards[-1].last == NOVEMBER + 20 * DAY_MS
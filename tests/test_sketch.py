@@ -0,0 +1,91 @@
+"""
+Tests for HyperLogLog distinct-count sketches
+"""
+
+import pytest
+
+from pendo_frame import EventFrame
+from pendo_sketch import DAY_MS, HyperLogLog, SketchRangeIndex, daily_sketches
+
+
+def visitors(start: int, stop: int):
+    return (f'visitor-{i}' for i in range(start, stop))
+
+
+def test_error_within_two_percent_at_one_million():
+    sketch = HyperLogLog().update(visitors(0, 1_000_000))
+    assert sketch.count() == pytest.approx(1_000_000, rel=0.02)
+
+
+@pytest.mark.parametrize('count', [0, 1, 7, 100, 1000, 20000])
+def test_small_and_medium_cardinalities(count):
+    sketch = HyperLogLog().update(visitors(0, count))
+    assert sketch.count() == pytest.approx(count, rel=0.03, abs=1)
+
+
+def test_duplicates_do_not_change_the_estimate():
+    once = HyperLogLog().update(visitors(0, 5000))
+    twice = HyperLogLog().update(visitors(0, 5000)).update(visitors(0, 5000))
+    assert once.count() == twice.count()
+
+
+def test_merge_equals_sketch_of_the_union():
+    left = HyperLogLog().update(visitors(0, 30000))
+    right = HyperLogLog().update(visitors(20000, 60000))
+    union = HyperLogLog().update(visitors(0, 60000))
+    assert left.copy().merge(right).count() == union.count()
+    assert right.copy().merge(left).count() == union.count()
+
+
+def test_merge_is_idempotent():
+    sketch = HyperLogLog().update(visitors(0, 3000))
+    assert sketch.copy().merge(sketch).count() == sketch.count()
+
+
+def test_sparse_sketch_densifies_as_it_grows():
+    sketch = HyperLogLog().update(visitors(0, 10))
+    assert sketch.is_sparse
+    sketch.update(visitors(10, 20000))
+    assert not sketch.is_sparse
+
+
+@pytest.mark.parametrize('count', [0, 5, 20000])
+def test_serialization_round_trip(count):
+    sketch = HyperLogLog(precision=11).update(visitors(0, count))
+    restored = HyperLogLog.from_bytes(sketch.to_bytes())
+    assert restored.precision == 11
+    assert restored.is_sparse == sketch.is_sparse
+    assert restored.count() == sketch.count()
+    assert restored.copy().merge(sketch).count() == sketch.count()
+
+
+def test_sparse_serialization_is_small():
+    assert len(HyperLogLog().update(visitors(0, 3)).to_bytes()) < 64
+
+
+@pytest.mark.parametrize('precision', [3, 17])
+def test_invalid_precision(precision):
+    with pytest.raises(ValueError):
+        HyperLogLog(precision)
+
+
+def test_daily_sketches_count_distinct_visitors_per_entity_and_day():
+    day = 19700 * DAY_MS
+    rows = [{'guideId': 'g1', 'visitorId': f'v{i % 40}', 'browserTime': day + i} for i in range(400)]
+    rows += [{'guideId': 'g1', 'visitorId': 'late', 'browserTime': day + DAY_MS + 5},
+             {'guideId': 'g2', 'visitorId': 'v1', 'browserTime': day + 1}]
+    sketches = daily_sketches(EventFrame.from_rows(rows))
+
+    assert set(sketches) == {('g1', '2023-12-09'), ('g1', '2023-12-10'), ('g2', '2023-12-09')}
+    assert sketches[('g1', '2023-12-09')].count() == 40
+    assert sketches[('g1', '2023-12-10')].count() == 1
+
+
+def test_range_index_matches_direct_unions():
+    days = [HyperLogLog().update(visitors(day * 100, day * 100 + 150)) for day in range(13)]
+    index = SketchRangeIndex(days)
+    for first, last in [(0, 0), (0, 12), (3, 9), (5, 6), (12, 12)]:
+        direct = HyperLogLog.union(days[first:last + 1])
+        assert index.count(first, last) == direct.count()
+    with pytest.raises(IndexError):
+        index.union(4, 13)
@@ -0,0 +1,104 @@
+"""
+Tests for the streaming JSON array decoder
+"""
+
+import json
+import random
+
+import pytest
+
+from pendo_stream import iter_json_array
+
+DOCUMENT = [
+    {'id': 'g1', 'name': 'Welcome tour ✨', 'steps': [{'n': 1}, {'n': 2}]},
+    3.14159, -2.5e-7, 1e21, 0, -17, True, False, None,
+    'quoted "text" with \\ and unicode é中',
+    [], {}, [[1, 2], {'nested': {'deep': [1.5, 'x']}}]
+]
+
+
+def random_chunks(data: bytes, rng: random.Random):
+    """Split bytes at random points, including inside numbers and multi-byte characters"""
+    position = 0
+    while position < len(data):
+        size = rng.randint(1, 7)
+        yield data[position:position + size]
+        position += size
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_random_chunk_splits_decode_like_json_loads(seed):
+    body = json.dumps(DOCUMENT, ensure_ascii=False).encode()
+    assert list(iter_json_array(random_chunks(body, random.Random(seed)))) == DOCUMENT
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_array_under_key_with_random_splits(seed):
+    body = json.dumps({'total': 2.5, 'meta': {'a': [1, 2]}, 'results': DOCUMENT}).encode()
+    chunks = random_chunks(body, random.Random(seed))
+    assert list(iter_json_array(chunks, key='results')) == DOCUMENT
+
+
+@pytest.mark.parametrize('chunks,expected', [
+    ([b'[3.', b'14, 2]'], [3.14, 2]),
+    ([b'[1e', b'5]'], [1e5]),
+    ([b'[-', b'1', b'2]'], [-12]),
+    ([b'[1', b'2', b'3', b']'], [123]),
+    ([b'[tr', b'ue]'], [True]),
+])
+def test_values_split_at_the_buffer_edge(chunks, expected):
+    assert list(iter_json_array(chunks)) == expected
+
+
+def test_empty_array():
+    assert list(iter_json_array([b' [ ', b' ] '])) == []
+
+
+def test_elements_are_yielded_before_the_stream_ends():
+    def chunks():
+        yield b'[{"id": 1},'
+        raise RuntimeError('network dropped')
+
+    stream = iter_json_array(chunks())
+    assert next(stream) == {'id': 1}
+    with pytest.raises(RuntimeError):
+        next(stream)
+
+
+def test_malformed_body_raises_value_error():
+    with pytest.raises(ValueError):
+        list(iter_json_array([b'[1 2]']))
+
+
+def test_missing_key_raises_key_error():
+    with pytest.raises(KeyError):
+        list(iter_json_array([b'{"message": "error"}'], key='results'))
+
+
+class _StreamedResponse:
+    status_code = 200
+    headers = {}
+    raw = None
+    url = 'https://app.pendo.io/api/v1/guide'
+
+    def __init__(self, body: bytes):
+        self.body = body
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        yield self.body
+
+    def close(self):
+        pass
+
+
+@pytest.mark.parametrize('body', [b'{"message": "Unauthorized"}', b'[1, 2'])
+def test_client_listing_raises_pendo_api_error_on_unexpected_body(body):
+    from pendo_client_v2 import PendoAPIClientV2, PendoAPIError
+
+    client = PendoAPIClientV2(api_key='test-key')
+    client._send = lambda *args, **kwargs: _StreamedResponse(body)
+    with pytest.raises(PendoAPIError):
+        list(client._stream_request('GET', '/api/v1/guide', key='results'))
@@ -0,0 +1,121 @@
+"""
+Tests for the incremental sync engine and its high-water marks
+"""
+
+import time
+
+from conftest import FakeSyncClient, recent_events
+from pendo_aggregation import DAY_MS
+from pendo_sync import EVENT_SOURCES, format_event
+
+
+def guide(guide_id: str, updated_at: int, name: str = None):
+    return {'id': guide_id, 'name': name or f'Guide {guide_id}', 'state': 'public',
+            'createdAt': 1700000000000, 'lastUpdatedAt': updated_at, 'steps': [{'id': 's1'}]}
+
+
+def event_rows(engine):
+    return engine.writer.tables.get('pendo_events', {})
+
+
+def test_first_event_run_writes_the_initial_window(make_engine):
+    events = recent_events()
+    engine = make_engine(FakeSyncClient(events))
+
+    results = engine.run(entity_types=())
+
+    assert sum(results[source]['records'] for source in EVENT_SOURCES) == len(events)
+    assert len(event_rows(engine)) == len(events)
+    for source in EVENT_SOURCES:
+        latest = max(event['browserTime'] for event in events if event['source'] == source)
+        assert results[source]['last_event_time'] == latest
+
+
+def test_next_run_reads_only_from_the_mark_minus_overlap(make_engine):
+    events = recent_events()
+    client = FakeSyncClient(events)
+    engine = make_engine(client, event_overlap_seconds=60)
+    engine.sync_events('guideEvents')
+
+    client.queries.clear()
+    late = dict(events[0], source='guideEvents', guideId='guide-late', browserTime=int(time.time() * 1000) - 500,
+                sequence=-1)
+    client.events.append(late)
+    result = engine.sync_events('guideEvents')
+
+    assert result['records'] == 1
+    # A minute-long window spans at most two day shards
+    assert len(client.queries) <= 2
+    assert format_event(late, 'guideEvents', '')['id'] in event_rows(engine)
+
+
+def test_idle_source_window_moves_forward(make_engine):
+    engine = make_engine(FakeSyncClient(), event_overlap_seconds=60)
+
+    engine.sync_events('pageEvents')
+    first_read = engine.get_state('pageEvents')['read_through']
+    time.sleep(0.01)
+    engine.sync_events('pageEvents')
+    second_read = engine.get_state('pageEvents')['read_through']
+
+    assert second_read > first_read
+    run = engine.start_event_run('pageEvents')
+    assert run.plan['since'] == second_read - 60 * 1000
+    assert len(engine.pending_event_shards(run)) <= 2
+
+
+def test_changed_entities_only(make_engine):
+    now = int(time.time() * 1000)
+    client = FakeSyncClient(entities={'guides': [guide('a', now - 3000), guide('b', now - 2000)]})
+    engine = make_engine(client)
+
+    assert engine.sync_entities('guide')['records'] == 2
+    assert engine.sync_entities('guide')['records'] == 0
+
+    client.entities['guides'][0] = guide('a', now - 1000, name='Renamed')
+    result = engine.sync_entities('guide')
+    assert result['records'] == 1
+    assert result['last_updated_at'] == now - 1000
+    assert engine.writer.tables['pendo_guides']['a']['name'] == 'Renamed'
+
+
+def test_entities_updated_at_the_mark_are_not_lost(make_engine):
+    client = FakeSyncClient(entities={'guides': [guide('a', 5000)]})
+    engine = make_engine(client)
+    engine.sync_entities('guide')
+
+    client.entities['guides'].append(guide('b', 5000))
+    assert engine.sync_entities('guide')['records'] == 1
+    assert set(engine.writer.tables['pendo_guides']) == {'a', 'b'}
+
+
+def test_event_window_covers_since_to_until():
+    from pendo_sync import SyncEngine
+
+    engine = SyncEngine.__new__(SyncEngine)
+    engine.event_shard_days = 1
+    since = 10 * DAY_MS + 5
+    shards = engine.event_shards(since, 12 * DAY_MS + 7)
+    assert shards == [(since, 11 * DAY_MS), (11 * DAY_MS, 12 * DAY_MS), (12 * DAY_MS, 12 * DAY_MS + 7)]
+
+
+def test_fallback_event_ids_distinguish_entities_and_types():
+    base = {'visitorId': 'v1', 'browserTime': 1700000000000}
+    ids = {
+        format_event(dict(base, guideId='g1', type='guideSeen'), 'guideEvents', '')['id'],
+        format_event(dict(base, guideId='g2', type='guideSeen'), 'guideEvents', '')['id'],
+        format_event(dict(base, guideId='g1', type='guideDismissed'), 'guideEvents', '')['id'],
+        format_event(dict(base, featureId='g1'), 'featureEvents', '')['id'],
+    }
+    assert len(ids) == 4
+
+
+def test_fallback_event_ids_without_time_hash_content():
+    first = {'visitorId': 'v1', 'pageId': 'p1', 'url': '/a'}
+    second = dict(first, url='/b')
+    assert format_event(first, 'pageEvents', 'x')['id'] == format_event(dict(first), 'pageEvents', 'y')['id']
+    assert format_event(first, 'pageEvents', '')['id'] != format_event(second, 'pageEvents', '')['id']
+
+
+def test_explicit_event_id_wins():
+    assert format_event({'id': 'e1', 'visitorId': 'v'}, 'guideEvents', '')['id'] == 'e1'